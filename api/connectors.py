@@ -3,6 +3,7 @@ API connector module for connecting to various financial data APIs.
 """
 import requests
 import datetime
+from api.http_client import get_json
 from config.settings import (
     ALPHAVANTAGE_API_KEY,
     FINHUB_API_KEY,
@@ -32,9 +33,7 @@ def connect_to_alphavantage(symbol, function="TIME_SERIES_DAILY"):
     }
     
     try:
-        response = requests.get(ALPHAVANTAGE_BASE_URL, params=params)
-        response.raise_for_status()
-        return response.json()
+        return get_json("alphavantage", ALPHAVANTAGE_BASE_URL, params=params, endpoint=function)
     except requests.exceptions.RequestException as e:
         print(f"Error connecting to AlphaVantage API: {e}")
         return {}
@@ -56,9 +55,7 @@ def connect_to_finhub(symbol):
     }
     
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+        return get_json("finhub", url, params=params, endpoint="quote")
     except requests.exceptions.RequestException as e:
         print(f"Error connecting to Finhub API: {e}")
         return {}
@@ -80,13 +77,39 @@ def connect_to_fmp(symbol, endpoint="profile"):
     }
     
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+        return get_json("fmp", url, params=params, endpoint=endpoint)
     except requests.exceptions.RequestException as e:
         print(f"Error connecting to FMP API: {e}")
         return {}
 
+# FMP endpoints that accept a comma-separated list of symbols
+FMP_BATCH_ENDPOINTS = ("profile", "quote")
+
+def connect_to_fmp_batch(symbols, endpoint="profile"):
+    """
+    Retrieve data for several symbols with a single FMP request.
+    
+    Args:
+        symbols (list): Stock ticker symbols
+        endpoint (str): API endpoint to call (must accept symbol lists)
+        
+    Returns:
+        dict: Mapping of upper-case symbol to its record. Symbols missing from
+        the response are not included.
+    """
+    if endpoint not in FMP_BATCH_ENDPOINTS:
+        raise ValueError(f"FMP endpoint '{endpoint}' does not accept multiple symbols")
+    
+    data = connect_to_fmp(",".join(symbols), endpoint=endpoint)
+    if not isinstance(data, list):
+        return {}
+    
+    return {
+        record['symbol'].upper(): record
+        for record in data
+        if isinstance(record, dict) and record.get('symbol')
+    }
+
 def connect_to_news_api(query):
     """
     Connect to News API and retrieve news articles.
@@ -104,9 +127,7 @@ def connect_to_news_api(query):
     }
     
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+        return get_json("news", url, params=params, endpoint="everything")
     except requests.exceptions.RequestException as e:
         print(f"Error connecting to News API: {e}")
         return {} 
\ No newline at end of file
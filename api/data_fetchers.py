@@ -4,293 +4,660 @@ Data fetcher module for retrieving and processing data from financial APIs.
 from api.connectors import (
     connect_to_finhub,
     connect_to_fmp,
+    connect_to_fmp_batch,
     connect_to_news_api
 )
-from config.settings import NEWS_ARTICLE_LIMIT
+from api.http_client import get_session
+from api.orchestrator import fetch_concurrently
+from api.replay import is_recording, is_replaying, record_price_rows, replay_price_rows
+from database.db_manager import build_upsert_sql, executemany_in_chunks, write_rows
+from utils.data_utils import dataframe_to_rows
+from utils.news_dedup import NewsDeduplicator, news_content_hash
+from config.settings import (
+    NEWS_ARTICLE_LIMIT,
+    YFINANCE_BATCH_SIZE,
+    FMP_BATCH_SIZE,
+    PRICE_HISTORY_START,
+    PRICE_OVERLAP_DAYS
+)
 import datetime
-import yfinance as yf
-import pandas as pd
 
-def fetch_yfinance_data(conn, tickers):
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+def _history_to_rows(hist):
+    """
+    Normalize a Yahoo Finance history frame into long format.
+    
+    Args:
+        hist (pandas.DataFrame): Frame indexed by date. Columns are either the
+            OHLCV fields or a (ticker, field) MultiIndex for batch downloads
+        
+    Returns:
+        pandas.DataFrame: Columns ticker, date, open, high, low, close, volume
+    """
+    import pandas as pd
+    
+    # Split the wide (ticker, field) frame into one row per ticker and day
+    long_df = hist.stack(level=0, future_stack=True)
+    long_df = long_df.reindex(columns=PRICE_COLUMNS).dropna(subset=['Close'])
+    long_df.index.names = ['date', 'ticker']
+    long_df = long_df.reset_index()
+    
+    long_df['date'] = pd.DatetimeIndex(long_df['date']).strftime('%Y-%m-%d')
+    long_df['Volume'] = long_df['Volume'].fillna(0).astype('int64')
+    long_df.columns = [column.lower() for column in long_df.columns]
+    return long_df[['ticker', 'date', 'open', 'high', 'low', 'close', 'volume']]
+
+def download_yfinance_batch(tickers, start, end):
+    """
+    Download daily history for several tickers with one yfinance call.
+    
+    Args:
+        tickers (list): Ticker symbols in the batch
+        start (str): Start date (YYYY-MM-DD)
+        end (str): End date (YYYY-MM-DD), exclusive
+        
+    Returns:
+        pandas.DataFrame: Long-format price rows (see _history_to_rows)
+    """
+    import pandas as pd
+    import yfinance as yf
+    
+    if is_replaying():
+        return replay_price_rows(tickers, start, end)
+    
+    hist = yf.download(
+        tickers,
+        start=start,
+        end=end,
+        group_by='ticker',
+        auto_adjust=True,
+        actions=False,
+        progress=False,
+        session=get_session("yfinance")
+    )
+    
+    if hist.empty:
+        return pd.DataFrame(columns=['ticker', 'date', 'open', 'high', 'low', 'close', 'volume'])
+    
+    # yfinance returns flat columns when a single ticker is requested
+    if not isinstance(hist.columns, pd.MultiIndex):
+        hist.columns = pd.MultiIndex.from_product([[tickers[0]], hist.columns])
+    
+    rows = _history_to_rows(hist)
+    if is_recording():
+        record_price_rows(rows)
+    return rows
+
+def download_yfinance_single(ticker, start, end):
+    """
+    Download daily history for one ticker through yf.Ticker.history.
+    
+    Args:
+        ticker (str): Ticker symbol
+        start (str): Start date (YYYY-MM-DD)
+        end (str): End date (YYYY-MM-DD), exclusive
+        
+    Returns:
+        pandas.DataFrame: Long-format price rows (see _history_to_rows)
+    """
+    import pandas as pd
+    import yfinance as yf
+    
+    if is_replaying():
+        return replay_price_rows([ticker], start, end)
+    
+    hist = yf.Ticker(ticker, session=get_session("yfinance")).history(start=start, end=end)
+    if hist.empty:
+        return pd.DataFrame(columns=['ticker', 'date', 'open', 'high', 'low', 'close', 'volume'])
+    hist.columns = pd.MultiIndex.from_product([[ticker], hist.columns])
+    rows = _history_to_rows(hist)
+    if is_recording():
+        record_price_rows(rows)
+    return rows
+
+# Rows whose prices did not change are not rewritten (see build_upsert_sql)
+PRICE_UPSERT_SQL = build_upsert_sql(
+    'stock_daily_data',
+    ['ticker', 'date', 'open', 'high', 'low', 'close', 'volume', 'source'],
+    ['ticker', 'date', 'source'],
+    touch_column='timestamp'
+)
+
+def get_latest_price_dates(conn, tickers, source='yfinance'):
+    """
+    Get the latest stored price date for each ticker.
+    
+    Args:
+        conn (sqlite3.Connection): Database connection
+        tickers (list): List of ticker symbols
+        source (str): Data source
+        
+    Returns:
+        dict: Mapping of ticker symbol to its latest date (YYYY-MM-DD)
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+    SELECT ticker, MAX(date)
+    FROM stock_daily_data
+    WHERE source = ?
+    GROUP BY ticker
+    ''', (source,))
+    wanted = set(tickers)
+    return {ticker: date for ticker, date in cursor.fetchall() if ticker in wanted}
+
+def _plan_price_downloads(conn, tickers, full_refresh):
+    """
+    Compute the start date to download for each ticker.
+    
+    Tickers without stored prices (or every ticker on a full refresh) start at
+    PRICE_HISTORY_START. The rest start PRICE_OVERLAP_DAYS before their latest
+    stored date so late revisions from the provider are picked up.
+    
+    Returns:
+        dict: Mapping of start date to the list of tickers starting there
+    """
+    latest_dates = {} if full_refresh else get_latest_price_dates(conn, tickers)
+    
+    plan = {}
+    for ticker in tickers:
+        latest = latest_dates.get(ticker)
+        if latest:
+            start = datetime.datetime.strptime(latest, '%Y-%m-%d') - datetime.timedelta(days=PRICE_OVERLAP_DAYS)
+            start = max(start.strftime('%Y-%m-%d'), PRICE_HISTORY_START)
+        else:
+            start = PRICE_HISTORY_START
+        plan.setdefault(start, []).append(ticker)
+    return plan
+
+def fetch_yfinance_data(conn, tickers, batch=True, batch_size=YFINANCE_BATCH_SIZE, full_refresh=False,
+                        writer=None, fetched=None):
     """
     Fetch data from Yahoo Finance API and store in database.
     
+    By default only the days after each ticker's latest stored date (plus a
+    small overlap window) are downloaded and upserted. With full_refresh the
+    whole history since PRICE_HISTORY_START is downloaded again and replaces
+    the stored rows of that range batch by batch, so the table is never empty
+    mid-run. Older rows (e.g. loaded by backfill.py) are kept.
+    
     Args:
         conn (sqlite3.Connection): Database connection
         tickers (list): List of ticker symbols to fetch data for
+        batch (bool): Download many tickers per yfinance call instead of one by one
+        batch_size (int): Number of tickers per batch download
+        full_refresh (bool): Rebuild the stored history instead of fetching incrementally
+        writer (DatabaseWriter, optional): Queue the rows on a background writer
+            instead of writing them on conn
+        fetched (set, optional): Filled with the tickers whose data was stored
+            (or queued), so callers can tell them from tickers that failed
         
     Returns:
-        int: Number of records inserted
+        int: Number of records inserted or updated (queued when a writer is used)
     """
     cursor = conn.cursor()
     records_inserted = 0
     
-    # Eliminar registros antiguos para evitar duplicados
-    try:
-        cursor.execute("DELETE FROM stock_daily_data WHERE source = 'yfinance'")
-        print(f"Registros antiguos de yfinance eliminados.")
-    except Exception as e:
-        print(f"Error al eliminar registros antiguos: {e}")
+    # yfinance treats the end date as exclusive, so ask for tomorrow to include today
+    end_date = (datetime.datetime.now() + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
     
-    # Get current date for end date
-    end_date = datetime.datetime.now().strftime('%Y-%m-%d')
+    groups = []
+    for start_date, start_tickers in sorted(_plan_price_downloads(conn, tickers, full_refresh).items()):
+        size = batch_size if batch else 1
+        for i in range(0, len(start_tickers), size):
+            groups.append((start_date, start_tickers[i:i + size]))
     
-    for ticker in tickers:
-        print(f"Fetching Yahoo Finance data for {ticker}...")
+    for start_date, group in groups:
+        print(f"Fetching Yahoo Finance data for {', '.join(group)} since {start_date}...")
         try:
-            # Get data from Yahoo Finance desde el inicio de 2024
-            ticker_data = yf.Ticker(ticker)
-            hist = ticker_data.history(start="2024-01-01", end=end_date)
-            
-            if not hist.empty:
-                # Process and store each day's data
-                for date, row in hist.iterrows():
-                    try:
-                        date_str = date.strftime('%Y-%m-%d')
-                        cursor.execute('''
-                        INSERT OR REPLACE INTO stock_daily_data 
-                        (ticker, date, open, high, low, close, volume, source)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            ticker,
-                            date_str,
-                            float(row['Open']),
-                            float(row['High']),
-                            float(row['Low']),
-                            float(row['Close']),
-                            int(row['Volume']),
-                            'yfinance'
-                        ))
-                        records_inserted += 1
-                    except Exception as e:
-                        print(f"Error inserting data for {ticker} on {date_str}: {e}")
+            if batch:
+                rows = download_yfinance_batch(group, start_date, end_date)
             else:
-                print(f"No data available for {ticker}")
+                rows = download_yfinance_single(group[0], start_date, end_date)
         except Exception as e:
-            print(f"Error fetching data for {ticker}: {e}")
+            print(f"Error fetching data for {', '.join(group)}: {e}")
+            continue
+        
+        group_fetched = set(rows['ticker'].unique())
+        for ticker in sorted(set(group) - group_fetched):
+            print(f"No data available for {ticker}")
+        
+        price_rows = dataframe_to_rows(
+            rows.assign(source='yfinance'),
+            ['ticker', 'date', 'open', 'high', 'low', 'close', 'volume', 'source']
+        )
+        
+        statements = []
+        if full_refresh and group_fetched:
+            # Replace the downloaded range in the same transaction as the new rows;
+            # history before start_date is not downloaded again and must stay
+            statements.append((
+                "DELETE FROM stock_daily_data WHERE source = 'yfinance' AND ticker = ? AND date >= ?",
+                [(ticker, start_date) for ticker in sorted(group_fetched)]
+            ))
+        statements.append((PRICE_UPSERT_SQL, price_rows))
+        
+        if writer is not None:
+            writer.submit_group(statements)
+            records_inserted += len(price_rows)
+            if fetched is not None:
+                fetched.update(group_fetched)
+            continue
+        
+        # Store the batch with one prepared statement in chunked transactions.
+        # A full refresh keeps the delete and the inserts in a single transaction.
+        try:
+            for query, params in statements[:-1]:
+                cursor.executemany(query, params)
+            records_inserted += executemany_in_chunks(conn, PRICE_UPSERT_SQL, price_rows, commit=not full_refresh)
+        except Exception as e:
+            conn.rollback()
+            print(f"Error inserting data for {', '.join(group)}: {e}")
+            continue
+        
+        conn.commit()
+        if fetched is not None:
+            fetched.update(group_fetched)
     
-    conn.commit()
     return records_inserted
 
-def fetch_finhub_data(conn, tickers):
+# The key includes the default timestamp, so every poll adds a snapshot; an
+# identical quote polled twice within the same second is written once
+QUOTE_INSERT_SQL = build_upsert_sql(
+    'market_quotes',
+    ['ticker', 'current_price', 'change', 'percent_change', 'high', 'low', 'open', 'previous_close', 'source'],
+    ['ticker', 'timestamp', 'source']
+)
+
+def quote_to_row(ticker, quote_data):
+    """
+    Convert a Finhub quote into a market_quotes row.
+    
+    Args:
+        ticker (str): Ticker symbol
+        quote_data (dict): Finhub quote response
+        
+    Returns:
+        tuple: Values in the order of QUOTE_INSERT_SQL
+    """
+    return (
+        ticker,
+        quote_data.get('c', 0),  # Current price
+        quote_data.get('d', 0),  # Change
+        quote_data.get('dp', 0),  # Percent change
+        quote_data.get('h', 0),  # High
+        quote_data.get('l', 0),  # Low
+        quote_data.get('o', 0),  # Open
+        quote_data.get('pc', 0),  # Previous close
+        'finhub'
+    )
+
+def fetch_finhub_data(conn, tickers, writer=None, fetched=None):
     """
     Fetch data from Finhub API and store in database.
     
     Args:
         conn (sqlite3.Connection): Database connection
         tickers (list): List of ticker symbols to fetch data for
+        writer (DatabaseWriter, optional): Queue the rows on a background writer
+            instead of writing them on conn
+        fetched (set, optional): Filled with the tickers whose data was stored
+            (or queued), so callers can tell them from tickers that failed
         
     Returns:
-        int: Number of records inserted
+        int: Number of records inserted (queued when a writer is used)
     """
-    cursor = conn.cursor()
-    records_inserted = 0
+    rows = []
     
-    for ticker in tickers:
+    def fetch_quote(ticker):
         print(f"Fetching Finhub data for {ticker}...")
-        try:
-            # Get data from Finhub
-            quote_data = connect_to_finhub(ticker)
-            
-            if quote_data and 'c' in quote_data:
-                # Store quote data
-                cursor.execute('''
-                INSERT OR REPLACE INTO market_quotes 
-                (ticker, current_price, change, percent_change, high, low, open, previous_close, source)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    ticker,
-                    quote_data.get('c', 0),  # Current price
-                    quote_data.get('d', 0),  # Change
-                    quote_data.get('dp', 0),  # Percent change
-                    quote_data.get('h', 0),  # High
-                    quote_data.get('l', 0),  # Low
-                    quote_data.get('o', 0),  # Open
-                    quote_data.get('pc', 0),  # Previous close
-                    'finhub'
-                ))
-                records_inserted += 1
-            else:
-                print(f"No quote data available for {ticker}")
-        except Exception as e:
-            print(f"Error fetching quote data for {ticker}: {e}")
+        return connect_to_finhub(ticker)
     
-    conn.commit()
-    return records_inserted
+    # Quotes are fetched concurrently within the Finhub quota, then stored together
+    for ticker, quote_data in fetch_concurrently("finhub", fetch_quote, tickers):
+        if quote_data and 'c' in quote_data:
+            rows.append(quote_to_row(ticker, quote_data))
+        else:
+            print(f"No quote data available for {ticker}")
+    
+    try:
+        records = write_rows(conn, QUOTE_INSERT_SQL, rows, writer=writer)
+    except Exception as e:
+        print(f"Error storing quote data: {e}")
+        return 0
+    
+    if fetched is not None:
+        fetched.update(row[0] for row in rows)
+    return records
 
-def fetch_fmp_data(conn, tickers):
+def fetch_fmp_batch(tickers, endpoint="profile", batch_size=FMP_BATCH_SIZE):
+    """
+    Fetch FMP records for many tickers, packing up to batch_size symbols per request.
+    
+    Symbols missing from a batch response (partial answers, failed batches)
+    are retried one by one before giving up on them.
+    
+    Args:
+        tickers (list): List of ticker symbols
+        endpoint (str): FMP endpoint accepting symbol lists ("profile" or "quote")
+        batch_size (int): Maximum number of symbols per request
+        
+    Returns:
+        dict: Mapping of ticker symbol to its FMP record
+    """
+    batches = [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
+    
+    def fetch_batch(batch):
+        print(f"Fetching FMP {endpoint} data for {', '.join(batch)}...")
+        return connect_to_fmp_batch(batch, endpoint=endpoint)
+    
+    records = {}
+    for batch, batch_records in fetch_concurrently("fmp", fetch_batch, batches):
+        for ticker in batch:
+            record = (batch_records or {}).get(ticker.upper())
+            if record:
+                records[ticker] = record
+    
+    missing = [ticker for ticker in tickers if ticker not in records]
+    if missing and batch_size > 1:
+        print(f"Retrying {len(missing)} FMP symbols missing from batch responses...")
+        
+        def fetch_single(ticker):
+            data = connect_to_fmp(ticker, endpoint=endpoint)
+            return data[0] if isinstance(data, list) and data else None
+        
+        for ticker, record in fetch_concurrently("fmp", fetch_single, missing):
+            if record:
+                records[ticker] = record
+    
+    return records
+
+PROFILE_INSERT_SQL = build_upsert_sql(
+    'company_profiles',
+    ['ticker', 'company_name', 'industry', 'sector', 'market_cap', 'employees', 'description', 'ceo',
+     'website', 'exchange', 'ipo_date', 'source'],
+    ['ticker', 'source'],
+    touch_column='timestamp'
+)
+
+def fetch_fmp_data(conn, tickers, batch_size=FMP_BATCH_SIZE, writer=None, fetched=None):
     """
     Fetch data from Financial Modeling Prep API and store in database.
     
     Args:
         conn (sqlite3.Connection): Database connection
         tickers (list): List of ticker symbols to fetch data for
+        batch_size (int): Number of symbols per profile request (1 disables batching)
+        writer (DatabaseWriter, optional): Queue the rows on a background writer
+            instead of writing them on conn
+        fetched (set, optional): Filled with the tickers whose data was stored
+            (or queued), so callers can tell them from tickers that failed
         
     Returns:
-        int: Number of records inserted
+        int: Number of records inserted (queued when a writer is used)
     """
-    cursor = conn.cursor()
-    records_inserted = 0
+    rows = []
+    
+    # Profiles are fetched in batches within the FMP quota, then stored together
+    profiles = fetch_fmp_batch(tickers, endpoint="profile", batch_size=batch_size)
     
     for ticker in tickers:
-        print(f"Fetching FMP data for {ticker}...")
-        try:
-            # Get company profile from FMP
-            profile_data = connect_to_fmp(ticker, endpoint="profile")
-            
-            if profile_data and isinstance(profile_data, list) and len(profile_data) > 0:
-                profile = profile_data[0]
-                
-                # Store company profile
-                cursor.execute('''
-                INSERT OR REPLACE INTO company_profiles 
-                (ticker, company_name, industry, sector, market_cap, employees, description, ceo, website, exchange, ipo_date, source)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    ticker,
-                    profile.get('companyName', ''),
-                    profile.get('industry', ''),
-                    profile.get('sector', ''),
-                    profile.get('mktCap', 0),
-                    profile.get('fullTimeEmployees', 0),
-                    profile.get('description', ''),
-                    profile.get('ceo', ''),
-                    profile.get('website', ''),
-                    profile.get('exchange', ''),
-                    profile.get('ipoDate', ''),
-                    'fmp'
-                ))
-                records_inserted += 1
-                
-                # También podríamos obtener datos fundamentales aquí
-                # fetch_fundamental_data(conn, ticker)
-            else:
-                print(f"No profile data available for {ticker}")
-        except Exception as e:
-            print(f"Error fetching profile data for {ticker}: {e}")
+        profile = profiles.get(ticker)
+        if not profile:
+            print(f"No profile data available for {ticker}")
+            continue
+        
+        rows.append((
+            ticker,
+            profile.get('companyName', ''),
+            profile.get('industry', ''),
+            profile.get('sector', ''),
+            profile.get('mktCap', 0),
+            profile.get('fullTimeEmployees', 0),
+            profile.get('description', ''),
+            profile.get('ceo', ''),
+            profile.get('website', ''),
+            profile.get('exchange', ''),
+            profile.get('ipoDate', ''),
+            'fmp'
+        ))
     
-    conn.commit()
-    return records_inserted
+    try:
+        records = write_rows(conn, PROFILE_INSERT_SQL, rows, writer=writer)
+    except Exception as e:
+        print(f"Error storing profile data: {e}")
+        return 0
+    
+    if fetched is not None:
+        fetched.update(row[0] for row in rows)
+    return records
 
-def fetch_news_data(conn, tickers):
+NEWS_INSERT_SQL = '''
+INSERT OR IGNORE INTO news_articles 
+(ticker, title, source, url, published_at, content, content_hash)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+def fetch_news_data(conn, tickers, writer=None, deduplicator=None, fetched=None):
     """
     Fetch news data for tickers and store in database.
     
+    Articles already stored for the same ticker, either under the same URL or
+    as a syndicated copy with the same normalized title published within
+    NEWS_DEDUP_WINDOW_DAYS, are dropped in memory before writing.
+    
     Args:
         conn (sqlite3.Connection): Database connection
         tickers (list): List of ticker symbols to fetch news for
+        writer (DatabaseWriter, optional): Queue the rows on a background writer
+            instead of writing them on conn
+        deduplicator (NewsDeduplicator, optional): Pre-filter of known articles.
+            Loaded from the database when not given
+        fetched (set, optional): Filled with the tickers that returned articles
+            (including articles dropped as duplicates)
         
     Returns:
-        int: Number of records inserted
+        int: Number of records inserted (queued when a writer is used)
     """
-    cursor = conn.cursor()
-    records_inserted = 0
+    rows = []
+    duplicates = 0
+    tickers_with_news = set()
     
-    for ticker in tickers:
+    if deduplicator is None:
+        deduplicator = NewsDeduplicator.from_database(conn)
+    
+    def fetch_news(ticker):
         print(f"Fetching news for {ticker}...")
-        try:
-            # Get news from News API
-            news_data = connect_to_news_api(ticker)
+        return connect_to_news_api(ticker)
+    
+    # News are fetched concurrently within the News API quota, then stored together
+    for ticker, news_data in fetch_concurrently("news", fetch_news, tickers):
+        if news_data and news_data.get('articles'):
+            articles = news_data['articles'][:NEWS_ARTICLE_LIMIT]  # Limit number of articles
+            tickers_with_news.add(ticker)
             
-            if news_data and 'articles' in news_data:
-                articles = news_data['articles'][:NEWS_ARTICLE_LIMIT]  # Limit number of articles
+            for article in articles:
+                url = article.get('url', '')
+                content_hash = news_content_hash(article.get('title'), article.get('content'))
+                if not deduplicator.add_if_new(ticker, url, content_hash, article.get('publishedAt')):
+                    duplicates += 1
+                    continue
                 
-                for article in articles:
-                    try:
-                        # Store news article
-                        cursor.execute('''
-                        INSERT OR IGNORE INTO news_articles 
-                        (ticker, title, source, url, published_at, content)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                        ''', (
-                            ticker,
-                            article.get('title', ''),
-                            article.get('source', {}).get('name', ''),
-                            article.get('url', ''),
-                            article.get('publishedAt', ''),
-                            article.get('content', '')
-                        ))
-                        if cursor.rowcount > 0:
-                            records_inserted += 1
-                    except Exception as e:
-                        print(f"Error inserting news article for {ticker}: {e}")
-            else:
-                print(f"No news available for {ticker}")
-        except Exception as e:
-            print(f"Error fetching news for {ticker}: {e}")
+                rows.append((
+                    ticker,
+                    article.get('title', ''),
+                    (article.get('source') or {}).get('name', ''),
+                    url,
+                    article.get('publishedAt', ''),
+                    article.get('content', ''),
+                    content_hash
+                ))
+        else:
+            print(f"No news available for {ticker}")
     
-    conn.commit()
-    return records_inserted
+    if duplicates:
+        print(f"Skipped {duplicates} duplicate news articles")
+    
+    try:
+        records = write_rows(conn, NEWS_INSERT_SQL, rows, writer=writer)
+    except Exception as e:
+        print(f"Error storing news: {e}")
+        return 0
+    
+    if fetched is not None:
+        fetched.update(tickers_with_news)
+    return records
+
+FUNDAMENTAL_VALUE_COLUMNS = [
+    'pe_ratio', 'pb_ratio', 'dividend_yield', 'debt_to_equity', 'roa', 'roe', 'gross_margin',
+    'operating_margin', 'net_margin', 'revenue', 'net_income', 'eps', 'free_cash_flow'
+]
+
+# A statement missing from a response is NULL and keeps the stored values
+FUNDAMENTAL_UPSERT_SQL = build_upsert_sql(
+    'fundamental_data',
+    ['ticker', 'period', 'period_end_date'] + FUNDAMENTAL_VALUE_COLUMNS + ['data_source'],
+    ['ticker', 'period', 'period_end_date'],
+    touch_column='timestamp',
+    coalesce_columns=FUNDAMENTAL_VALUE_COLUMNS
+)
+
+FUNDAMENTAL_PERIODS = 4  # Number of most recent periods stored per ticker
+
+# FMP endpoints merged into each fundamental_data row
+FUNDAMENTAL_STATEMENTS = ("ratios", "income-statement")
+
+def fetch_fundamental_statement(ticker, statement):
+    """
+    Fetch one FMP statement of a ticker.
+    
+    Args:
+        ticker (str): Ticker symbol
+        statement (str): FMP endpoint, one of FUNDAMENTAL_STATEMENTS
+        
+    Returns:
+        list: Period records (empty if the request failed)
+    """
+    data = connect_to_fmp(ticker, statement)
+    return data if isinstance(data, list) else []
+
+def _period_key(period_data):
+    # Fiscal year and period identify a report even when the two statements
+    # carry slightly different end dates
+    year = period_data.get('calendarYear') or str(period_data.get('date', ''))[:4]
+    return (str(year), period_data.get('period', ''))
+
+def merge_fundamental_statements(ticker, ratios_data, income_data, periods=FUNDAMENTAL_PERIODS):
+    """
+    Merge ratios and income statement records into one fundamental_data row per period.
+    
+    Args:
+        ticker (str): Ticker symbol
+        ratios_data (list): FMP ratios records
+        income_data (list): FMP income statement records
+        periods (int): Number of most recent periods to keep
+        
+    Returns:
+        list: Rows in the order of FUNDAMENTAL_UPSERT_SQL
+    """
+    merged = {}
+    for period_data in ratios_data:
+        merged.setdefault(_period_key(period_data), {})['ratios'] = period_data
+    for period_data in income_data:
+        merged.setdefault(_period_key(period_data), {})['income'] = period_data
+    
+    # Fields of a missing statement stay None, never 0, so they do not
+    # overwrite values stored by an earlier run
+    rows = []
+    for statements in merged.values():
+        ratios = statements.get('ratios', {})
+        income = statements.get('income', {})
+        rows.append((
+            ticker,
+            ratios.get('period') or income.get('period', ''),
+            ratios.get('date') or income.get('date', ''),
+            ratios.get('priceEarningsRatio'),
+            ratios.get('priceToBookRatio'),
+            ratios.get('dividendYield'),
+            ratios.get('debtToEquity'),
+            ratios.get('returnOnAssets'),
+            ratios.get('returnOnEquity'),
+            ratios.get('grossProfitMargin'),
+            ratios.get('operatingProfitMargin'),
+            ratios.get('netProfitMargin'),
+            income.get('revenue'),
+            income.get('netIncome'),
+            income.get('eps'),
+            income.get('freeCashFlow'),
+            'fmp'
+        ))
+    
+    # Keep the most recent periods (period_end_date is ISO formatted)
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows[:periods]
 
-def fetch_fundamental_data(conn, ticker):
+def fetch_fundamental_data(conn, ticker, writer=None, fetched=None):
     """
     Fetch fundamental financial data for a ticker and store in database.
     
     Args:
         conn (sqlite3.Connection): Database connection
         ticker (str): Ticker symbol to fetch data for
+        writer (DatabaseWriter, optional): Queue the rows on a background writer
+            instead of writing them on conn
+        fetched (set, optional): Filled with the tickers whose data was stored
+            (or queued), so callers can tell them from tickers that failed
         
     Returns:
         int: Number of records inserted
     """
-    cursor = conn.cursor()
-    records_inserted = 0
+    return fetch_all_fundamental_data(conn, [ticker], writer=writer, fetched=fetched)
+
+def fetch_all_fundamental_data(conn, tickers, writer=None, fetched=None):
+    """
+    Fetch fundamental financial data for many tickers in parallel and store it.
     
-    try:
-        # Get financial ratios from FMP
-        ratios_data = connect_to_fmp(ticker, endpoint="ratios")
-        
-        if ratios_data and isinstance(ratios_data, list):
-            for period_data in ratios_data[:4]:  # Get last 4 periods
-                try:
-                    # Store fundamental data
-                    cursor.execute('''
-                    INSERT OR REPLACE INTO fundamental_data 
-                    (ticker, period, period_end_date, pe_ratio, pb_ratio, dividend_yield, 
-                     debt_to_equity, roa, roe, gross_margin, operating_margin, net_margin, data_source)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        ticker,
-                        period_data.get('period', ''),
-                        period_data.get('date', ''),
-                        period_data.get('priceEarningsRatio', 0),
-                        period_data.get('priceToBookRatio', 0),
-                        period_data.get('dividendYield', 0),
-                        period_data.get('debtToEquity', 0),
-                        period_data.get('returnOnAssets', 0),
-                        period_data.get('returnOnEquity', 0),
-                        period_data.get('grossProfitMargin', 0),
-                        period_data.get('operatingProfitMargin', 0),
-                        period_data.get('netProfitMargin', 0),
-                        'fmp'
-                    ))
-                    records_inserted += 1
-                except Exception as e:
-                    print(f"Error inserting fundamental data for {ticker}: {e}")
-        
-        # Get income statement data
-        income_data = connect_to_fmp(ticker, endpoint="income-statement")
+    Every (ticker, statement) request goes through the same pool, so the
+    FMP concurrency cap holds; the statements are then merged in memory on
+    their period and written with a single upsert per period.
+    
+    Args:
+        conn (sqlite3.Connection): Database connection
+        tickers (list): List of ticker symbols
+        writer (DatabaseWriter, optional): Queue the rows on a background writer
+            instead of writing them on conn
+        fetched (set, optional): Filled with the tickers whose data was stored
+            (or queued), so callers can tell them from tickers that failed
         
-        if income_data and isinstance(income_data, list):
-            for period_data in income_data[:4]:  # Get last 4 periods
-                try:
-                    # Update fundamental data with income statement info
-                    cursor.execute('''
-                    UPDATE fundamental_data 
-                    SET revenue = ?, net_income = ?, eps = ?, free_cash_flow = ?
-                    WHERE ticker = ? AND period_end_date = ?
-                    ''', (
-                        period_data.get('revenue', 0),
-                        period_data.get('netIncome', 0),
-                        period_data.get('eps', 0),
-                        period_data.get('freeCashFlow', 0),
-                        ticker,
-                        period_data.get('date', '')
-                    ))
-                except Exception as e:
-                    print(f"Error updating fundamental data for {ticker}: {e}")
+    Returns:
+        int: Number of records inserted (queued when a writer is used)
+    """
+    def fetch_statement(request):
+        ticker, statement = request
+        print(f"Fetching {statement} for {ticker}...")
+        return fetch_fundamental_statement(ticker, statement)
+    
+    requests = [(ticker, statement) for ticker in tickers for statement in FUNDAMENTAL_STATEMENTS]
+    statements = {}
+    for (ticker, statement), data in fetch_concurrently("fmp", fetch_statement, requests):
+        statements.setdefault(ticker, {})[statement] = data or []
+    
+    rows = []
+    for ticker in tickers:
+        ticker_statements = statements.get(ticker, {})
+        ticker_rows = merge_fundamental_statements(
+            ticker, ticker_statements.get("ratios", []), ticker_statements.get("income-statement", [])
+        )
+        if not ticker_rows:
+            print(f"No fundamental data available for {ticker}")
+        rows.extend(ticker_rows)
+    
+    try:
+        records = write_rows(conn, FUNDAMENTAL_UPSERT_SQL, rows, writer=writer)
     except Exception as e:
-        print(f"Error fetching fundamental data for {ticker}: {e}")
+        print(f"Error storing fundamental data: {e}")
+        return 0
     
-    conn.commit()
-    return records_inserted 
\ No newline at end of file
+    if fetched is not None:
+        fetched.update(row[0] for row in rows)
+    return records
@@ -0,0 +1,195 @@
+"""
+HTTP client module with pooled keep-alive sessions for each API provider.
+"""
+import threading
+import time
+import requests
+from api.rate_limiter import get_rate_limiter
+from api.replay import make_adapter, skip_rate_limits
+from api.response_cache import get_cache_ttl, get_response_cache, is_cacheable_response
+from api.resilience import backoff_delay, get_circuit_breaker, get_request_stats
+from config.settings import (
+    HTTP_MAX_RETRIES,
+    HTTP_RETRY_STATUS_CODES,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_POOL_MAXSIZE,
+    HTTP_DEFAULT_POOL_MAXSIZE
+)
+
+# One session per provider, created on first use and shared by every fetcher
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+DEFAULT_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+def _create_session(provider):
+    """
+    Create a requests session with a connection pool sized for a provider.
+
+    Args:
+        provider (str): Provider name (e.g. "finhub", "fmp")
+
+    Returns:
+        requests.Session: Configured session
+    """
+    pool_maxsize = HTTP_POOL_MAXSIZE.get(provider, HTTP_DEFAULT_POOL_MAXSIZE)
+
+    # pool_block makes extra threads wait for a free connection instead of
+    # opening throwaway connections that are discarded after the request.
+    # In record/replay mode the adapter also captures or serves fixtures
+    adapter = make_adapter(provider, pool_connections=2, pool_maxsize=pool_maxsize, pool_block=True)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_session(provider):
+    """
+    Get the shared keep-alive session for a provider.
+
+    Args:
+        provider (str): Provider name (e.g. "finhub", "fmp")
+
+    Returns:
+        requests.Session: Shared session for the provider
+    """
+    session = _sessions.get(provider)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(provider)
+            if session is None:
+                session = _create_session(provider)
+                _sessions[provider] = session
+    return session
+
+def _send_with_retries(provider, url, params, headers, timeout):
+    """
+    Send a GET request, retrying timeouts, connection errors, 429 and 5xx
+    responses with jittered exponential backoff (honoring Retry-After).
+    
+    The provider's circuit breaker is checked before the first attempt and
+    records the final outcome, so a provider that keeps failing is skipped
+    until its reset timeout has passed.
+    
+    Returns:
+        requests.Response: The last response received
+    
+    Raises:
+        requests.exceptions.RequestException: If the circuit is open or every
+            attempt failed without a response
+    """
+    breaker = get_circuit_breaker(provider)
+    stats = get_request_stats(provider)
+    breaker.before_request()
+    session = get_session(provider)
+    
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        if not skip_rate_limits():
+            get_rate_limiter(provider).acquire()
+        stats.increment("requests")
+        can_retry = attempt < HTTP_MAX_RETRIES
+        
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if can_retry:
+                stats.increment("retries")
+                time.sleep(backoff_delay(attempt))
+                continue
+            stats.increment("failures")
+            breaker.record_failure()
+            raise
+        except requests.exceptions.RequestException:
+            stats.increment("failures")
+            breaker.record_failure()
+            raise
+        
+        if response.status_code in HTTP_RETRY_STATUS_CODES:
+            if can_retry:
+                stats.increment("retries")
+                time.sleep(backoff_delay(attempt, response))
+                continue
+            breaker.record_failure()
+            return response
+        
+        # Any other answer (including 4xx for unknown symbols) means the provider is up
+        breaker.record_success()
+        return response
+
+def get_json(provider, url, params=None, timeout=None, endpoint=None):
+    """
+    Perform a GET request through the provider's session and decode the JSON body.
+    
+    Every network call takes a token from the provider's rate limiter first, so
+    the provider quota is respected no matter how many threads are fetching.
+    Transient failures are retried with backoff and guarded by the provider's
+    circuit breaker (see _send_with_retries).
+    When the endpoint has a cache TTL, fresh cached responses are returned
+    without touching the network and expired ones are revalidated with
+    If-None-Match / If-Modified-Since when the provider sent validators.
+    Error bodies sent with a 200 status are returned but never cached
+    (see is_cacheable_response).
+
+    Args:
+        provider (str): Provider name used to select the session
+        url (str): Request URL
+        params (dict, optional): Query string parameters
+        timeout (tuple, optional): (connect, read) timeout in seconds
+        endpoint (str, optional): Endpoint name used to look up the cache TTL
+
+    Returns:
+        dict or list: Decoded JSON response
+
+    Raises:
+        requests.exceptions.RequestException: On connection errors, timeouts or HTTP errors
+    """
+    ttl = get_cache_ttl(provider, endpoint)
+    cached = None
+    headers = {}
+    
+    if ttl:
+        cache = get_response_cache()
+        key = cache.make_key(provider, endpoint, url, params)
+        cached = cache.get(key)
+        # Entries stored before error bodies were filtered out are ignored
+        if cached and not is_cacheable_response(provider, cached["data"]):
+            cached = None
+        if cached and cached["fresh"]:
+            return cached["data"]
+        if cached and cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+    
+    response = _send_with_retries(provider, url, params, headers, timeout or DEFAULT_TIMEOUT)
+    
+    if ttl and cached and response.status_code == 304:
+        cache.refresh(key, ttl)
+        return cached["data"]
+    
+    try:
+        response.raise_for_status()
+    except requests.exceptions.HTTPError:
+        get_request_stats(provider).increment("failures")
+        raise
+    data = response.json()
+    
+    if ttl and is_cacheable_response(provider, data):
+        cache.put(
+            key, provider, endpoint, data, ttl,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified")
+        )
+    
+    return data
+
+def close_sessions():
+    """
+    Close every open provider session and release its pooled connections.
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
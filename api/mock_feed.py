@@ -0,0 +1,123 @@
+"""
+Local mock of the Finnhub WebSocket trade feed for offline runs and load tests.
+
+Clients subscribe with {"type": "subscribe", "symbol": "AAPL"} and receive
+{"type": "trade", "data": [{"s", "p", "t", "v"}, ...]} messages generated by a
+random walk at a configurable number of trades per second.
+
+Uso:
+    python -m api.mock_feed [--port 8765] [--rate 5000]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from config.settings import MOCK_FEED_HOST, MOCK_FEED_PORT, MOCK_FEED_RATE
+
+# Trades are sent in small bursts, each message carrying several trades
+TICK_SECONDS = 0.01
+MAX_TRADES_PER_MESSAGE = 50
+
+class MockTradeFeed:
+    """
+    Random-walk trade generator serving every connected client.
+    """
+
+    def __init__(self, rate=MOCK_FEED_RATE, seed=None):
+        """
+        Args:
+            rate (int): Trades per second sent to each client
+            seed (int, optional): Random seed for reproducible runs
+        """
+        self.rate = rate
+        self.random = random.Random(seed)
+        self.prices = {}
+        self.messages_sent = 0
+
+    def _next_trades(self, symbols, count):
+        now_ms = int(time.time() * 1000)
+        trades = []
+        for _ in range(count):
+            symbol = self.random.choice(symbols)
+            price = self.prices.get(symbol) or self.random.uniform(20, 500)
+            price = round(max(0.01, price * (1 + self.random.gauss(0, 0.0005))), 4)
+            self.prices[symbol] = price
+            trades.append({'s': symbol, 'p': price, 't': now_ms, 'v': self.random.randint(1, 500)})
+        return trades
+
+    async def handler(self, websocket):
+        """
+        Serve one client connection.
+        """
+        symbols = []
+
+        async def receive():
+            async for message in websocket:
+                request = json.loads(message)
+                if request.get('type') == 'subscribe' and request.get('symbol') not in symbols:
+                    symbols.append(request['symbol'])
+                elif request.get('type') == 'unsubscribe' and request.get('symbol') in symbols:
+                    symbols.remove(request['symbol'])
+
+        receiver = asyncio.create_task(receive())
+        per_tick = self.rate * TICK_SECONDS
+        carry = 0.0
+        try:
+            while not receiver.done():
+                started = time.monotonic()
+                carry += per_tick
+                count = int(carry)
+                carry -= count
+                if symbols and count:
+                    trades = self._next_trades(symbols, count)
+                    for i in range(0, len(trades), MAX_TRADES_PER_MESSAGE):
+                        await websocket.send(json.dumps({'type': 'trade', 'data': trades[i:i + MAX_TRADES_PER_MESSAGE]}))
+                        self.messages_sent += 1
+                await asyncio.sleep(max(0.0, TICK_SECONDS - (time.monotonic() - started)))
+        except Exception:
+            # Client went away
+            pass
+        finally:
+            receiver.cancel()
+
+async def serve_mock_feed(host=MOCK_FEED_HOST, port=MOCK_FEED_PORT, rate=MOCK_FEED_RATE, seed=None):
+    """
+    Start the mock feed server.
+
+    Args:
+        host (str): Interface to listen on
+        port (int): Port to listen on
+        rate (int): Trades per second sent to each client
+        seed (int, optional): Random seed
+
+    Returns:
+        websockets.server.WebSocketServer: Running server (close it to stop)
+    """
+    import websockets
+
+    feed = MockTradeFeed(rate=rate, seed=seed)
+    return await websockets.serve(feed.handler, host, port, max_size=None)
+
+def main():
+    """
+    Run the mock feed until interrupted.
+    """
+    parser = argparse.ArgumentParser(description="Feed de trades simulado estilo Finnhub")
+    parser.add_argument("--host", default=MOCK_FEED_HOST)
+    parser.add_argument("--port", type=int, default=MOCK_FEED_PORT)
+    parser.add_argument("--rate", type=int, default=MOCK_FEED_RATE, help="Trades por segundo")
+    args = parser.parse_args()
+
+    async def run():
+        server = await serve_mock_feed(args.host, args.port, args.rate)
+        print(f"Mock feed escuchando en ws://{args.host}:{args.port} ({args.rate} trades/s)")
+        await server.wait_closed()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
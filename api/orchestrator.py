@@ -0,0 +1,45 @@
+"""
+Concurrent fetch orchestrator for the per-ticker API loops.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from api.rate_limiter import get_quota
+
+def fetch_concurrently(provider, fetch_func, items, max_workers=None):
+    """
+    Call ``fetch_func(item)`` for every item using a thread pool sized by the
+    provider's concurrency cap.
+
+    The request rate itself is enforced by the provider's token bucket in the
+    HTTP client, so workers simply block when the quota is exhausted. Only the
+    network calls run in the pool; callers write the results to the database
+    from their own thread.
+
+    Args:
+        provider (str): Provider name used to look up the quota
+        fetch_func (callable): Function taking one item and returning its data
+        items (list): Items to fetch (typically ticker symbols)
+        max_workers (int, optional): Override for the provider's max_concurrency
+
+    Returns:
+        list: (item, result) tuples in the same order as ``items``. The result
+        is None when ``fetch_func`` raised an exception.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    if max_workers is None:
+        max_workers = get_quota(provider)["max_concurrency"]
+    max_workers = max(1, min(max_workers, len(items)))
+
+    def run(item):
+        try:
+            return fetch_func(item)
+        except Exception as e:
+            print(f"Error fetching {provider} data for {item}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{provider}-fetch") as executor:
+        results = list(executor.map(run, items))
+
+    return list(zip(items, results))
@@ -0,0 +1,88 @@
+"""
+Token bucket rate limiters enforcing the per-provider API quotas.
+"""
+import threading
+import time
+from config.settings import PROVIDER_QUOTAS, DEFAULT_PROVIDER_QUOTA
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens are refilled continuously at ``rate`` tokens per second up to
+    ``capacity``. Each request consumes one token and blocks until one is
+    available, so callers run at the highest rate the quota allows.
+    """
+
+    def __init__(self, rate, capacity):
+        """
+        Args:
+            rate (float): Tokens added per second
+            capacity (int): Maximum number of tokens (burst size)
+        """
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """
+        Take tokens from the bucket, waiting until enough are available.
+
+        Args:
+            tokens (int): Number of tokens to consume
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+def get_quota(provider):
+    """
+    Get the configured quota for a provider.
+
+    Args:
+        provider (str): Provider name
+
+    Returns:
+        dict: Quota with requests_per_minute, burst and max_concurrency
+    """
+    return {**DEFAULT_PROVIDER_QUOTA, **PROVIDER_QUOTAS.get(provider, {})}
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(provider):
+    """
+    Get the shared token bucket for a provider.
+
+    Args:
+        provider (str): Provider name
+
+    Returns:
+        TokenBucket: Rate limiter for the provider
+    """
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(provider)
+            if limiter is None:
+                quota = get_quota(provider)
+                limiter = TokenBucket(quota["requests_per_minute"] / 60.0, quota["burst"])
+                _limiters[provider] = limiter
+    return limiter
@@ -0,0 +1,220 @@
+"""
+Record/replay harness for connector and Yahoo Finance traffic.
+
+In record mode every HTTP response received by the provider sessions, and
+every price frame downloaded from Yahoo Finance, is saved as a fixture file.
+In replay mode the sessions are served from those fixtures by a local
+transport adapter instead of the network, with optional latency and error
+injection, so the whole ingestion path can be benchmarked offline.
+
+The mode is selected with the HTTP_REPLAY_MODE environment variable
+("off", "record" or "replay").
+"""
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from api.response_cache import SECRET_PARAMS
+from config.settings import (
+    HTTP_REPLAY_MODE,
+    HTTP_FIXTURES_DIR,
+    HTTP_REPLAY_LATENCY,
+    HTTP_REPLAY_ERROR_RATE,
+    HTTP_REPLAY_ENFORCE_QUOTAS
+)
+
+PRICE_FIXTURE_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume']
+
+def is_recording():
+    return HTTP_REPLAY_MODE == "record"
+
+def is_replaying():
+    return HTTP_REPLAY_MODE == "replay"
+
+def skip_rate_limits():
+    """
+    Whether provider quotas are ignored (replay runs do not use the real APIs).
+    """
+    return is_replaying() and not HTTP_REPLAY_ENFORCE_QUOTAS
+
+def _strip_secrets(url):
+    """
+    Remove credential parameters from a URL and sort the remaining ones.
+    """
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in SECRET_PARAMS)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}?{urlencode(query)}"
+
+def fixture_key(method, url):
+    """
+    Build a stable fixture key for a request, ignoring credentials and parameter order.
+
+    Args:
+        method (str): HTTP method
+        url (str): Full request URL including the query string
+
+    Returns:
+        str: Hex digest
+    """
+    canonical = f"{method.upper()} {_strip_secrets(url)}"
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _fixture_path(provider, key):
+    return os.path.join(HTTP_FIXTURES_DIR, provider, f"{key}.json")
+
+def _write_atomic(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def _inject_faults(url):
+    """
+    Apply the configured latency and randomly fail a share of the requests.
+
+    Returns:
+        int: HTTP status to answer with instead of the fixture, or None
+    """
+    if HTTP_REPLAY_LATENCY:
+        time.sleep(HTTP_REPLAY_LATENCY)
+    if HTTP_REPLAY_ERROR_RATE and random.random() < HTTP_REPLAY_ERROR_RATE:
+        if random.random() < 0.5:
+            raise requests.exceptions.ConnectionError(f"Injected connection error for {url}")
+        return 503
+    return None
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    Transport adapter that performs real requests and saves each response as a fixture.
+    """
+
+    def __init__(self, provider, **kwargs):
+        self.provider = provider
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if response.status_code < 500 and response.status_code != 429:
+            fixture = {
+                "url": _strip_secrets(request.url),
+                "status": response.status_code,
+                "headers": {k: v for k, v in response.headers.items() if k.lower() in ("content-type", "etag", "last-modified")},
+                "body": response.text
+            }
+            _write_atomic(_fixture_path(self.provider, fixture_key(request.method, request.url)), json.dumps(fixture))
+        return response
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Transport adapter that answers requests from recorded fixtures.
+
+    Requests without a fixture get a 404 response with an empty JSON body.
+    """
+
+    def __init__(self, provider):
+        self.provider = provider
+        super().__init__()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        status = _inject_faults(request.url)
+
+        fixture = None
+        if status is None:
+            path = _fixture_path(self.provider, fixture_key(request.method, request.url))
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    fixture = json.load(f)
+
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.encoding = "utf-8"
+        if fixture:
+            response.status_code = fixture["status"]
+            response.headers = CaseInsensitiveDict(fixture.get("headers", {}))
+            response._content = fixture["body"].encode("utf-8")
+        else:
+            response.status_code = status or 404
+            response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+            response._content = b"{}"
+        response.reason = requests.status_codes._codes.get(response.status_code, ("",))[0].replace("_", " ").title()
+        return response
+
+    def close(self):
+        pass
+
+def make_adapter(provider, **pool_kwargs):
+    """
+    Build the transport adapter for a provider session according to the replay mode.
+
+    Args:
+        provider (str): Provider name
+        **pool_kwargs: Connection pool arguments for HTTPAdapter
+
+    Returns:
+        requests.adapters.BaseAdapter: Adapter to mount on the session
+    """
+    if is_replaying():
+        return ReplayAdapter(provider)
+    if is_recording():
+        return RecordingAdapter(provider, **pool_kwargs)
+    return HTTPAdapter(**pool_kwargs)
+
+def _price_fixture_path(ticker):
+    return os.path.join(HTTP_FIXTURES_DIR, "yfinance", f"{ticker}.csv")
+
+def record_price_rows(rows):
+    """
+    Merge downloaded Yahoo Finance rows into the per-ticker price fixtures.
+
+    Args:
+        rows (pandas.DataFrame): Long-format rows (ticker, date, open, high, low, close, volume)
+    """
+    import pandas as pd
+
+    for ticker, ticker_rows in rows.groupby('ticker'):
+        path = _price_fixture_path(ticker)
+        ticker_rows = ticker_rows[PRICE_FIXTURE_COLUMNS]
+        if os.path.exists(path):
+            ticker_rows = pd.concat([pd.read_csv(path), ticker_rows])
+        ticker_rows = ticker_rows.drop_duplicates('date', keep='last').sort_values('date')
+        _write_atomic(path, ticker_rows.to_csv(index=False))
+
+def replay_price_rows(tickers, start, end):
+    """
+    Serve Yahoo Finance rows for a date range from the per-ticker price fixtures.
+
+    Args:
+        tickers (list): Ticker symbols
+        start (str): Start date (YYYY-MM-DD)
+        end (str): End date (YYYY-MM-DD), exclusive
+
+    Returns:
+        pandas.DataFrame: Long-format rows (ticker, date, open, high, low, close, volume)
+
+    Raises:
+        requests.exceptions.RequestException: When an error is injected
+    """
+    import pandas as pd
+
+    if _inject_faults(f"yfinance {','.join(tickers)}"):
+        raise requests.exceptions.HTTPError(f"Injected server error for {', '.join(tickers)}")
+
+    frames = []
+    for ticker in tickers:
+        path = _price_fixture_path(ticker)
+        if os.path.exists(path):
+            ticker_rows = pd.read_csv(path)
+            ticker_rows = ticker_rows[(ticker_rows['date'] >= start) & (ticker_rows['date'] < end)]
+            frames.append(ticker_rows.assign(ticker=ticker))
+
+    if not frames:
+        return pd.DataFrame(columns=['ticker'] + PRICE_FIXTURE_COLUMNS)
+    return pd.concat(frames, ignore_index=True)[['ticker'] + PRICE_FIXTURE_COLUMNS]
@@ -0,0 +1,189 @@
+"""
+Retry backoff, per-provider circuit breakers and request statistics.
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+import requests
+from config.settings import (
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_RESET_TIMEOUT
+)
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """
+    Raised instead of sending a request while a provider's circuit is open.
+    """
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    The circuit opens after ``failure_threshold`` consecutive failures and
+    rejects requests until ``reset_timeout`` seconds have passed. Then a
+    single probe request is let through: success closes the circuit again,
+    failure re-opens it for another timeout.
+    """
+
+    def __init__(self, provider, failure_threshold=CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout=CIRCUIT_BREAKER_RESET_TIMEOUT):
+        """
+        Args:
+            provider (str): Provider name, used in error messages
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds to wait before probing the provider again
+        """
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """
+        Check whether a request may be sent.
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        with self._lock:
+            if self.state == "closed":
+                return
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+        get_request_stats(self.provider).increment("rejected")
+        raise CircuitOpenError(f"Circuit open for {self.provider}, skipping request")
+
+    def record_success(self):
+        """
+        Record a successful request and close the circuit.
+        """
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            self.state = "closed"
+
+    def record_failure(self):
+        """
+        Record a failed request, opening the circuit when the threshold is reached.
+        """
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    get_request_stats(self.provider).increment("breaker_trips")
+                    print(f"Circuit breaker opened for {self.provider} after {self._failures} failures")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+class RequestStats:
+    """
+    Thread-safe request counters for one provider.
+    """
+
+    FIELDS = ("requests", "retries", "failures", "rejected", "breaker_trips")
+
+    def __init__(self):
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+        self._lock = threading.Lock()
+
+    def increment(self, field, amount=1):
+        with self._lock:
+            self._counts[field] += amount
+
+    def as_dict(self):
+        with self._lock:
+            return dict(self._counts)
+
+_breakers = {}
+_stats = {}
+_registry_lock = threading.Lock()
+
+def get_circuit_breaker(provider):
+    """
+    Get the shared circuit breaker for a provider.
+
+    Args:
+        provider (str): Provider name
+
+    Returns:
+        CircuitBreaker: Circuit breaker for the provider
+    """
+    with _registry_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker(provider)
+        return _breakers[provider]
+
+def get_request_stats(provider):
+    """
+    Get the request counters of a provider.
+
+    Args:
+        provider (str): Provider name
+
+    Returns:
+        RequestStats: Counters for the provider
+    """
+    with _registry_lock:
+        if provider not in _stats:
+            _stats[provider] = RequestStats()
+        return _stats[provider]
+
+def get_run_stats():
+    """
+    Get the retry and circuit breaker statistics of every provider used so far.
+
+    Returns:
+        dict: Mapping of provider to its counters and current breaker state
+    """
+    with _registry_lock:
+        providers = sorted(set(_stats) | set(_breakers))
+    result = {}
+    for provider in providers:
+        result[provider] = get_request_stats(provider).as_dict()
+        result[provider]["breaker_state"] = get_circuit_breaker(provider).state
+    return result
+
+def reset_run_stats():
+    """
+    Reset every provider's counters and close every circuit.
+    """
+    with _registry_lock:
+        _stats.clear()
+        _breakers.clear()
+
+def backoff_delay(attempt, response=None):
+    """
+    Compute how long to wait before retrying a request.
+
+    A Retry-After header (seconds or HTTP date) is honored when present.
+    Otherwise full-jitter exponential backoff is used.
+
+    Args:
+        attempt (int): Zero-based number of the attempt that just failed
+        response (requests.Response, optional): Failed response
+
+    Returns:
+        float: Seconds to wait
+    """
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), HTTP_BACKOFF_MAX)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                return min(max(delay, 0.0), HTTP_BACKOFF_MAX)
+            except (TypeError, ValueError):
+                pass
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
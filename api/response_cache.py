@@ -0,0 +1,232 @@
+"""
+Persistent HTTP response cache for the API connectors.
+
+Responses are stored in a small SQLite database keyed by provider, endpoint,
+URL and query parameters (API keys excluded). Each (provider, endpoint) has
+its own TTL, expired entries are revalidated with ETag / Last-Modified when
+the provider sent them, and the least recently used entries are evicted when
+the cache grows beyond its size limit.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from config.settings import (
+    HTTP_CACHE_ENABLED,
+    HTTP_REPLAY_MODE,
+    HTTP_CACHE_PATH,
+    HTTP_CACHE_MAX_BYTES,
+    HTTP_CACHE_TTLS
+)
+
+# Query parameters holding credentials are not part of the cache key
+SECRET_PARAMS = {"apikey", "apiKey", "token"}
+
+CACHE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS http_cache (
+    key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    body TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+)
+'''
+
+class ResponseCache:
+    """
+    Thread-safe, size-bounded cache of decoded JSON responses.
+    """
+
+    def __init__(self, path=HTTP_CACHE_PATH, max_bytes=HTTP_CACHE_MAX_BYTES):
+        """
+        Args:
+            path (str): Path of the SQLite cache file
+            max_bytes (int): Maximum total size of the cached bodies
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(CACHE_SCHEMA)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_last_access ON http_cache(last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(provider, endpoint, url, params=None):
+        """
+        Build the cache key for a request.
+
+        Args:
+            provider (str): Provider name
+            endpoint (str): Endpoint name
+            url (str): Request URL
+            params (dict, optional): Query string parameters
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        public_params = sorted((k, str(v)) for k, v in (params or {}).items() if k not in SECRET_PARAMS)
+        raw = json.dumps([provider, endpoint, url, public_params])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            dict: Entry with data, etag, last_modified and fresh, or None if missing
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, expires_at FROM http_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE http_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+
+        body, etag, last_modified, expires_at = row
+        return {
+            "data": json.loads(body),
+            "etag": etag,
+            "last_modified": last_modified,
+            "fresh": expires_at > now
+        }
+
+    def put(self, key, provider, endpoint, data, ttl, etag=None, last_modified=None):
+        """
+        Store a response and evict old entries if the cache is over its size limit.
+
+        Args:
+            key (str): Cache key
+            provider (str): Provider name
+            endpoint (str): Endpoint name
+            data (dict or list): Decoded JSON response
+            ttl (float): Seconds the entry stays fresh
+            etag (str, optional): ETag header sent by the provider
+            last_modified (str, optional): Last-Modified header sent by the provider
+        """
+        body = json.dumps(data)
+        now = time.time()
+        with self._lock:
+            self._conn.execute('''
+            INSERT OR REPLACE INTO http_cache
+            (key, provider, endpoint, body, etag, last_modified, size, stored_at, expires_at, last_access)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (key, provider, endpoint, body, etag, last_modified, len(body), now, now + ttl, now))
+            self._evict()
+            self._conn.commit()
+
+    def refresh(self, key, ttl):
+        """
+        Mark an entry as fresh again after the provider answered 304 Not Modified.
+
+        Args:
+            key (str): Cache key
+            ttl (float): Seconds the entry stays fresh
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE http_cache SET expires_at = ?, last_access = ? WHERE key = ?", (now + ttl, now, key)
+            )
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Drop least recently used entries until the cache fits again
+        cursor = self._conn.execute("SELECT key, size FROM http_cache ORDER BY last_access")
+        doomed = []
+        for key, size in cursor:
+            doomed.append((key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        self._conn.executemany("DELETE FROM http_cache WHERE key = ?", doomed)
+
+    def clear(self, provider=None):
+        """
+        Remove cached responses.
+
+        Args:
+            provider (str, optional): Only remove entries of this provider
+        """
+        with self._lock:
+            if provider:
+                self._conn.execute("DELETE FROM http_cache WHERE provider = ?", (provider,))
+            else:
+                self._conn.execute("DELETE FROM http_cache")
+            self._conn.commit()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+# Alpha Vantage answers errors and quota notices with HTTP 200 and one of these keys
+_ALPHAVANTAGE_ERROR_KEYS = ("Error Message", "Note", "Information")
+
+# Provider -> check of a decoded 200 body, mirroring what the connectors
+# accept. Error bodies (an FMP {"Error Message": ...}, a News API
+# {"status": "error"}) must not be served from the cache until the TTL expires
+_VALID_RESPONSE = {
+    "alphavantage": lambda data: isinstance(data, dict) and not any(key in data for key in _ALPHAVANTAGE_ERROR_KEYS),
+    "finhub": lambda data: isinstance(data, dict) and "c" in data,
+    "fmp": lambda data: isinstance(data, list),
+    "news": lambda data: isinstance(data, dict) and data.get("status") == "ok",
+}
+
+def is_cacheable_response(provider, data):
+    """
+    Check whether a decoded response is a real answer that may be cached.
+
+    Args:
+        provider (str): Provider name
+        data (dict or list): Decoded JSON body
+
+    Returns:
+        bool: False for the error bodies the provider returns with HTTP 200
+    """
+    check = _VALID_RESPONSE.get(provider)
+    return check is None or check(data)
+
+def get_cache_ttl(provider, endpoint):
+    """
+    Get the cache TTL configured for an endpoint.
+
+    Args:
+        provider (str): Provider name
+        endpoint (str): Endpoint name
+
+    Returns:
+        float: TTL in seconds, or 0 if responses of the endpoint are not cached
+    """
+    # Record/replay runs must see every request, so the cache is bypassed
+    if not HTTP_CACHE_ENABLED or HTTP_REPLAY_MODE != "off" or endpoint is None:
+        return 0
+    return HTTP_CACHE_TTLS.get((provider, endpoint), 0)
+
+def get_response_cache():
+    """
+    Get the shared response cache, creating it on first use.
+
+    Returns:
+        ResponseCache: Shared cache instance
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
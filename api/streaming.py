@@ -0,0 +1,210 @@
+"""
+Streaming trade ingestion over a Finnhub-style WebSocket feed.
+
+Trades are aggregated in memory per symbol and flushed periodically as
+compact snapshots into market_quotes through the single database writer.
+"""
+import asyncio
+import datetime
+import json
+import random
+import time
+from config.settings import (
+    FINHUB_API_KEY,
+    FINHUB_WS_URL,
+    STREAM_FLUSH_INTERVAL,
+    STREAM_RECONNECT_DELAY_MAX
+)
+from database.db_manager import build_upsert_sql
+
+STREAM_SOURCE = 'finhub_stream'
+
+STREAM_QUOTE_INSERT_SQL = build_upsert_sql(
+    'market_quotes',
+    ['ticker', 'current_price', 'change', 'percent_change', 'high', 'low', 'open', 'previous_close',
+     'source', 'timestamp'],
+    ['ticker', 'timestamp', 'source']
+)
+
+class TradeAggregator:
+    """
+    In-memory per-symbol trade aggregation.
+
+    Keeps the open, high, low and last price of every symbol for the current
+    run and remembers which symbols traded since the last flush.
+    """
+
+    def __init__(self, previous_closes=None):
+        """
+        Args:
+            previous_closes (dict, optional): Previous close per symbol, used
+                to compute change and percent change
+        """
+        self.previous_closes = previous_closes or {}
+        self.snapshots = {}
+        self._dirty = set()
+        self.trades_seen = 0
+
+    def add_trades(self, trades):
+        """
+        Apply a list of Finnhub trade records.
+
+        Args:
+            trades (list): Dicts with s (symbol), p (price), t (ms timestamp) and v (volume)
+        """
+        for trade in trades:
+            symbol = trade.get('s')
+            price = trade.get('p')
+            if not symbol or price is None:
+                continue
+
+            snapshot = self.snapshots.get(symbol)
+            if snapshot is None:
+                snapshot = {'open': price, 'high': price, 'low': price, 'last': price, 'volume': 0, 'time': 0}
+                self.snapshots[symbol] = snapshot
+
+            if price > snapshot['high']:
+                snapshot['high'] = price
+            elif price < snapshot['low']:
+                snapshot['low'] = price
+            snapshot['last'] = price
+            snapshot['volume'] += trade.get('v') or 0
+            snapshot['time'] = max(snapshot['time'], trade.get('t') or 0)
+            self._dirty.add(symbol)
+
+        self.trades_seen += len(trades)
+
+    def drain(self):
+        """
+        Build market_quotes rows for the symbols that traded since the last call.
+
+        Returns:
+            list: Rows in the order of STREAM_QUOTE_INSERT_SQL
+        """
+        rows = []
+        for symbol in self._dirty:
+            snapshot = self.snapshots[symbol]
+            previous_close = self.previous_closes.get(symbol)
+            change = snapshot['last'] - previous_close if previous_close else 0
+            percent_change = change / previous_close * 100 if previous_close else 0
+            trade_time = (datetime.datetime.fromtimestamp(snapshot['time'] / 1000, datetime.timezone.utc)
+                          if snapshot['time'] else datetime.datetime.now(datetime.timezone.utc))
+            rows.append((
+                symbol,
+                snapshot['last'],
+                change,
+                percent_change,
+                snapshot['high'],
+                snapshot['low'],
+                snapshot['open'],
+                previous_close,
+                STREAM_SOURCE,
+                trade_time.strftime('%Y-%m-%d %H:%M:%S')
+            ))
+        self._dirty.clear()
+        return rows
+
+def load_previous_closes(conn, tickers):
+    """
+    Load the latest known previous close of each ticker from market_quotes.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        tickers (list): List of ticker symbols
+
+    Returns:
+        dict: Mapping of ticker symbol to previous close
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+    SELECT ticker, previous_close
+    FROM market_quotes
+    WHERE previous_close IS NOT NULL AND previous_close != 0
+    ORDER BY timestamp
+    ''')
+    wanted = set(tickers)
+    return {ticker: close for ticker, close in cursor.fetchall() if ticker in wanted}
+
+def get_stream_url():
+    """
+    Get the Finnhub WebSocket URL including the API token.
+
+    Returns:
+        str: WebSocket URL
+    """
+    return f"{FINHUB_WS_URL}?token={FINHUB_API_KEY}"
+
+async def _flush_periodically(aggregator, writer, flush_interval, stats):
+    while True:
+        await asyncio.sleep(flush_interval)
+        rows = aggregator.drain()
+        if rows:
+            # submit() may block on backpressure, keep it off the event loop
+            await asyncio.to_thread(writer.submit, STREAM_QUOTE_INSERT_SQL, rows)
+            stats['snapshots'] += len(rows)
+            stats['flushes'] += 1
+
+async def stream_quotes(url, symbols, aggregator, writer, flush_interval=STREAM_FLUSH_INTERVAL, duration=None):
+    """
+    Subscribe to a trade feed and flush aggregated snapshots until stopped.
+
+    Reconnects with jittered exponential backoff when the connection drops.
+
+    Args:
+        url (str): WebSocket URL of the feed
+        symbols (list): Symbols to subscribe to
+        aggregator (TradeAggregator): Aggregator receiving the trades
+        writer (DatabaseWriter): Writer storing the snapshots
+        flush_interval (float): Seconds between flushes
+        duration (float, optional): Stop after this many seconds
+
+    Returns:
+        dict: Messages, trades, snapshots, flushes, reconnects and seconds elapsed
+    """
+    import websockets
+
+    stats = {'messages': 0, 'trades': 0, 'snapshots': 0, 'flushes': 0, 'reconnects': 0, 'seconds': 0.0}
+    started = time.monotonic()
+    flusher = asyncio.create_task(_flush_periodically(aggregator, writer, flush_interval, stats))
+
+    async def consume():
+        attempt = 0
+        while True:
+            try:
+                async with websockets.connect(url, max_size=None) as websocket:
+                    for symbol in symbols:
+                        await websocket.send(json.dumps({'type': 'subscribe', 'symbol': symbol}))
+                    attempt = 0
+                    async for message in websocket:
+                        stats['messages'] += 1
+                        payload = json.loads(message)
+                        if payload.get('type') == 'trade':
+                            trades = payload.get('data') or []
+                            aggregator.add_trades(trades)
+                            stats['trades'] += len(trades)
+            except (OSError, websockets.exceptions.WebSocketException) as e:
+                print(f"Conexión con el feed perdida: {e}")
+
+            stats['reconnects'] += 1
+            delay = random.uniform(0, min(STREAM_RECONNECT_DELAY_MAX, 2 ** attempt))
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    try:
+        if duration:
+            try:
+                await asyncio.wait_for(consume(), timeout=duration)
+            except asyncio.TimeoutError:
+                pass
+        else:
+            await consume()
+    finally:
+        flusher.cancel()
+        rows = aggregator.drain()
+        if rows:
+            await asyncio.to_thread(writer.submit, STREAM_QUOTE_INSERT_SQL, rows)
+            stats['snapshots'] += len(rows)
+            stats['flushes'] += 1
+        stats['seconds'] = time.monotonic() - started
+
+    return stats
@@ -1,45 +1,140 @@
 import os
 import sys
-from config.settings import TICKERS, TICKER_DATA
-from database.db_manager import create_database, insert_or_update_ticker_info
+from config.tickers import get_ticker_universe
+from database.db_manager import create_database, get_connection, insert_or_update_company_profile
+from database.writer import DatabaseWriter
 from api.data_fetchers import (
     fetch_yfinance_data,
     fetch_finhub_data,
     fetch_fmp_data,
     fetch_news_data
 )
+from api.http_client import close_sessions
+from database.connection import close_all_connections
+from api.resilience import get_run_stats
+from utils.data_utils import update_technical_indicators_for_all_stocks
+from utils.pipeline import Stage, run_stages, print_stage_report
+from utils.refresh_planner import plan_refresh, record_refresh, group_by_table, print_refresh_plan
+
+# Tables filled by the fetch stages below
+FETCHED_TABLES = ['stock_daily_data', 'market_quotes', 'company_profiles', 'news_articles']
+
+def run_fetcher(fetcher, writer, table, tickers, **kwargs):
+    """
+    Build a stage function running a fetcher whose writes go through the shared writer.
+    
+    The tickers that returned data are recorded in refresh_log so the planner
+    treats them as fresh even when no stored row changed; tickers whose fetch
+    failed stay stale and are retried on the next run.
+    
+    Args:
+        fetcher (callable): fetch_* function taking (conn, tickers, writer=..., fetched=...)
+        writer (DatabaseWriter): Single writer shared by every stage
+        table (str): Table the fetcher fills
+        tickers (list): Tickers to fetch (nothing is fetched when empty)
+        **kwargs: Extra keyword arguments for the fetcher
+        
+    Returns:
+        callable: Function without arguments returning the number of records stored
+    """
+    def run():
+        if not tickers:
+            return 0
+        # The connection is only used for reads; rows are queued on the writer
+        conn = get_connection()
+        try:
+            fetched = set()
+            records = fetcher(conn, tickers, writer=writer, fetched=fetched, **kwargs)
+            record_refresh(conn, table, sorted(fetched), writer=writer)
+        finally:
+            conn.close()
+        # Make the rows visible before dependent stages start
+        writer.flush()
+        return records
+    return run
+
+def run_indicators(writer):
+    """
+    Build a stage function computing the technical indicators, whose writes
+    go through the shared writer like every fetch stage.
+    
+    Args:
+        writer (DatabaseWriter): Single writer shared by every stage
+        
+    Returns:
+        callable: Function without arguments returning the number of records stored
+    """
+    def run():
+        records = update_technical_indicators_for_all_stocks(writer=writer)
+        writer.flush()
+        return records
+    return run
 
 def main():
     """Main function to create and populate the database."""
     print("Iniciando la aplicación...")
     
+    universe = get_ticker_universe()
+    tickers = universe.default_tickers()
+    
     # Print tickers to verify filtering
-    print(f"Tickers a procesar: {TICKERS}")
-    print(f"Tipos de tickers: {[TICKER_DATA.get(ticker, {}).get('tipo', 'Desconocido') for ticker in TICKERS]}")
+    print(f"Tickers a procesar: {tickers}")
+    print(f"Tipos de tickers: {[universe.get(ticker, {}).get('tipo', 'Desconocido') for ticker in tickers]}")
     
-    # Create database and get connection
+    # Create database tables
     conn = create_database()
+    conn.close()
     
     # Store ticker information
     print("Almacenando información de tickers...")
-    records_inserted = insert_or_update_ticker_info(TICKER_DATA)
+    records_inserted = insert_or_update_company_profile(universe.data)
     print(f"Se han almacenado {records_inserted} registros de información de tickers.")
     
-    # Fetch and store data from each API
-    print("Obteniendo datos de Yahoo Finance...")
-    fetch_yfinance_data(conn, TICKERS)
+    # Prices are fetched incrementally unless a full rebuild is requested
+    full_refresh = "--full-refresh" in sys.argv
+    if full_refresh:
+        print("Reconstrucción completa del histórico de precios activada.")
     
-    print("Obteniendo datos de Finhub...")
-    fetch_finhub_data(conn, TICKERS)
+    # Only the tables and tickers whose data is out of date are fetched,
+    # unless --force asks for everything
+    if "--force" in sys.argv:
+        plan = {table: tickers for table in FETCHED_TABLES}
+    else:
+        conn = get_connection()
+        work = plan_refresh(conn, tickers, FETCHED_TABLES)
+        conn.close()
+        print("Plan de actualización:")
+        print_refresh_plan(work, tickers, FETCHED_TABLES)
+        plan = group_by_table(work)
+    if full_refresh:
+        plan['stock_daily_data'] = tickers
     
-    print("Obteniendo datos de Financial Modeling Prep...")
-    fetch_fmp_data(conn, TICKERS)
+    # Providers are independent and run in parallel; indicators need the prices.
+    # Every stage hands its rows to a single writer thread.
+    with DatabaseWriter() as writer:
+        stages = [
+            Stage("yfinance", run_fetcher(fetch_yfinance_data, writer, 'stock_daily_data',
+                                          plan.get('stock_daily_data', []), full_refresh=full_refresh)),
+            Stage("finhub", run_fetcher(fetch_finhub_data, writer, 'market_quotes', plan.get('market_quotes', []))),
+            Stage("fmp", run_fetcher(fetch_fmp_data, writer, 'company_profiles', plan.get('company_profiles', []))),
+            Stage("news", run_fetcher(fetch_news_data, writer, 'news_articles', plan.get('news_articles', []))),
+            Stage("technical_indicators", run_indicators(writer), depends_on=["yfinance"]),
+        ]
+        print("Obteniendo datos de todas las fuentes...")
+        results = run_stages(stages)
     
-    print("Obteniendo noticias...")
-    fetch_news_data(conn, TICKERS)
+    print("Resumen de etapas:")
+    print_stage_report(results)
+    print(f"Escritor de base de datos: {writer.stats}")
     
-    # Close connection
-    conn.close()
+    # Report retries and circuit breaker activity per provider
+    print("Estadísticas de peticiones HTTP:")
+    for provider, stats in get_run_stats().items():
+        print(f"  {provider}: {stats}")
+    
+    # Close pooled HTTP sessions and database connections
+    close_sessions()
+    close_all_connections()
     print("Base de datos creada y poblada exitosamente!")
 
 if __name__ == "__main__":
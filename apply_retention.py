@@ -0,0 +1,53 @@
+"""
+Script para aplicar la política de retención de market_quotes y news_articles.
+
+Las cotizaciones antiguas se reducen a una por ticker, fuente y día, y las
+filas que superan la antigüedad de archivo se mueven a bases de datos anuales
+en RETENTION_ARCHIVE_DIR (ver RETENTION_POLICIES en config/settings.py).
+Pensado para ejecutarse periódicamente, por ejemplo una vez al día.
+
+Uso:
+    python apply_retention.py [--vacuum]
+"""
+import argparse
+from config.settings import DB_NAME, RETENTION_ARCHIVE_DIR
+from database.db_manager import create_database
+from database.retention import apply_retention, get_database_size
+
+def print_size(conn):
+    """
+    Muestra el tamaño de la base de datos y si cabe en la caché de páginas.
+    """
+    size = get_database_size(conn)
+    cache = "cabe" if size['fits_in_cache'] else "no cabe"
+    print(f"Tamaño de {DB_NAME}: {size['size_bytes'] / 1e6:.1f} MB "
+          f"({size['free_bytes'] / 1e6:.1f} MB libres), {cache} en la caché de páginas")
+
+def main():
+    """
+    Función principal para aplicar la retención.
+    """
+    parser = argparse.ArgumentParser(description="Retención y archivo de cotizaciones y noticias")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="Compactar la base de datos después (VACUUM) para devolver el espacio liberado")
+    args = parser.parse_args()
+
+    conn = create_database()
+    print_size(conn)
+
+    report = apply_retention(conn)
+    for table, result in report.items():
+        print(f"{table}:")
+        print(f"  {result['downsampled']} filas eliminadas al reducir a una por día")
+        for year, moved in result['archived'].items():
+            print(f"  {moved} filas de {year} archivadas en {RETENTION_ARCHIVE_DIR}/")
+
+    if args.vacuum:
+        print("Compactando la base de datos...")
+        conn.execute("VACUUM")
+    print_size(conn)
+
+    conn.close()
+
+if __name__ == "__main__":
+    main()
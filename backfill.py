@@ -0,0 +1,257 @@
+"""
+Script para cargar el histórico de precios por tramos con checkpoints reanudables.
+
+Cada ticker guarda en la tabla backfill_progress la primera fecha que todavía
+no se ha cargado. Cada tramo descargado se escribe en la misma transacción que
+su checkpoint, así que un proceso interrumpido continúa donde se quedó.
+
+Uso:
+    python backfill.py [--start 2000-01-01] [--end 2025-01-01] [--chunk-days 1825]
+                       [--tickers AAPL MSFT ...] [--restart]
+"""
+import argparse
+import datetime
+from config.settings import (
+    YFINANCE_BATCH_SIZE,
+    BACKFILL_START_DATE,
+    BACKFILL_CHUNK_DAYS
+)
+from config.tickers import get_tickers
+from database.compact import adapt_statement, date_key
+from database.db_manager import create_database
+from api.data_fetchers import PRICE_UPSERT_SQL, download_yfinance_batch
+from utils.data_utils import dataframe_to_rows
+
+SOURCE = 'yfinance'
+
+def init_backfill(conn, tickers, start_date, end_date, restart=False):
+    """
+    Register the backfill target range for each ticker.
+
+    Tickers that already have a checkpoint for the same start date keep it, so
+    a rerun resumes instead of starting over. A different start date, or
+    restart=True, resets the checkpoint.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        tickers (list): List of ticker symbols
+        start_date (str): First date to load (YYYY-MM-DD)
+        end_date (str): Date to load up to, exclusive (YYYY-MM-DD)
+        restart (bool): Discard existing checkpoints
+    """
+    cursor = conn.cursor()
+    if restart:
+        cursor.executemany(
+            "DELETE FROM backfill_progress WHERE ticker = ? AND source = ?",
+            [(ticker, SOURCE) for ticker in tickers]
+        )
+
+    cursor.executemany('''
+    INSERT INTO backfill_progress (ticker, source, start_date, end_date, next_date, status)
+    VALUES (?, ?, ?, ?, ?, 'pending')
+    ON CONFLICT(ticker, source) DO UPDATE SET
+        next_date = CASE WHEN backfill_progress.start_date = excluded.start_date
+                         THEN backfill_progress.next_date ELSE excluded.next_date END,
+        status = CASE WHEN backfill_progress.start_date = excluded.start_date
+                       AND backfill_progress.next_date >= excluded.end_date
+                      THEN 'done' ELSE 'pending' END,
+        start_date = excluded.start_date,
+        end_date = excluded.end_date,
+        error = NULL
+    ''', [(ticker, SOURCE, start_date, end_date, start_date) for ticker in tickers])
+    conn.commit()
+
+def get_pending_backfill(conn, tickers):
+    """
+    Get the tickers whose backfill is not finished.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        tickers (list): List of ticker symbols
+
+    Returns:
+        list: (ticker, next_date, end_date) tuples
+    """
+    wanted = set(tickers)
+    cursor = conn.cursor()
+    cursor.execute('''
+    SELECT ticker, next_date, end_date
+    FROM backfill_progress
+    WHERE source = ? AND status != 'done'
+    ORDER BY next_date, ticker
+    ''', (SOURCE,))
+    return [row for row in cursor.fetchall() if row[0] in wanted]
+
+def _store_chunk(conn, group, chunk_end, end_date, rows):
+    """
+    Write one downloaded chunk and advance the checkpoints of every ticker in
+    group in a single transaction. Tickers without rows in the chunk advance
+    too: before a listing date (or after a delisting) there is nothing to load.
+    """
+    cursor = conn.cursor()
+    price_rows = dataframe_to_rows(
+        rows.assign(source=SOURCE),
+        ['ticker', 'date', 'open', 'high', 'low', 'close', 'volume', 'source']
+    )
+    status = 'done' if chunk_end >= end_date else 'running'
+
+    try:
+        cursor.executemany(adapt_statement(conn, PRICE_UPSERT_SQL), price_rows)
+        cursor.executemany('''
+        UPDATE backfill_progress
+        SET next_date = ?, status = ?, error = NULL, timestamp = CURRENT_TIMESTAMP
+        WHERE ticker = ? AND source = ?
+        ''', [(chunk_end, status, ticker, SOURCE) for ticker in group])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return len(price_rows)
+
+def _tickers_without_rows(conn, tickers):
+    """
+    Get the tickers with no stored price anywhere in their backfill range.
+    """
+    date_column, to_key = date_key(conn)
+    cursor = conn.cursor()
+    empty = []
+    for ticker in tickers:
+        cursor.execute(
+            "SELECT start_date, end_date FROM backfill_progress WHERE ticker = ? AND source = ?",
+            (ticker, SOURCE)
+        )
+        start_date, end_date = cursor.fetchone()
+        cursor.execute(f'''
+        SELECT 1 FROM stock_daily_data
+        WHERE ticker = ? AND source = ? AND {date_column} >= ? AND {date_column} < ?
+        LIMIT 1
+        ''', (ticker, SOURCE, to_key(start_date), to_key(end_date)))
+        if cursor.fetchone() is None:
+            empty.append(ticker)
+    return empty
+
+def _mark_failed(conn, group, error):
+    cursor = conn.cursor()
+    cursor.executemany('''
+    UPDATE backfill_progress
+    SET status = 'failed', error = ?, timestamp = CURRENT_TIMESTAMP
+    WHERE ticker = ? AND source = ?
+    ''', [(str(error), ticker, SOURCE) for ticker in group])
+    conn.commit()
+
+def run_backfill(conn, tickers, start_date=BACKFILL_START_DATE, end_date=None,
+                 chunk_days=BACKFILL_CHUNK_DAYS, batch_size=YFINANCE_BATCH_SIZE, restart=False,
+                 download=download_yfinance_batch):
+    """
+    Load daily price history in date-range chunks, checkpointing every chunk.
+
+    Tickers sharing the same checkpoint are downloaded together in batches.
+    A chunk that downloads without error advances every ticker in the batch,
+    with or without rows, so tickers listed after start_date move through the
+    years before their listing. A ticker whose chunk raises is marked 'failed'
+    and skipped for the rest of the run; the next run retries it from its
+    last checkpoint. A ticker that finishes its range without a single row is
+    also reported as 'failed'.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        tickers (list): List of ticker symbols
+        start_date (str): First date to load (YYYY-MM-DD)
+        end_date (str, optional): Date to load up to, exclusive. Defaults to tomorrow
+        chunk_days (int): Days of history per request
+        batch_size (int): Number of tickers per request
+        restart (bool): Discard existing checkpoints
+        download (callable): Function taking (tickers, start, end) and returning
+            the price rows (defaults to download_yfinance_batch)
+
+    Returns:
+        dict: Rows written, chunks completed and failed tickers
+    """
+    if end_date is None:
+        end_date = (datetime.date.today() + datetime.timedelta(days=1)).isoformat()
+
+    init_backfill(conn, tickers, start_date, end_date, restart=restart)
+
+    stats = {'rows': 0, 'chunks': 0, 'failed': set()}
+
+    while True:
+        pending = [row for row in get_pending_backfill(conn, tickers) if row[0] not in stats['failed']]
+        if not pending:
+            break
+
+        # Group tickers that resume from the same date so they can share requests
+        groups = {}
+        for ticker, next_date, ticker_end in pending:
+            groups.setdefault((next_date, ticker_end), []).append(ticker)
+
+        for (next_date, ticker_end), group_tickers in sorted(groups.items()):
+            chunk_end = min(
+                (datetime.date.fromisoformat(next_date) + datetime.timedelta(days=chunk_days)).isoformat(),
+                ticker_end
+            )
+            for i in range(0, len(group_tickers), batch_size):
+                group = group_tickers[i:i + batch_size]
+                print(f"Backfill {next_date} -> {chunk_end}: {', '.join(group)}")
+                try:
+                    rows = download(group, next_date, chunk_end)
+                    stats['rows'] += _store_chunk(conn, group, chunk_end, ticker_end, rows)
+                    stats['chunks'] += 1
+                except Exception as e:
+                    print(f"Error en el backfill de {', '.join(group)}: {e}")
+                    _mark_failed(conn, group, e)
+                    stats['failed'].update(group)
+                    continue
+
+                missing = sorted(set(group) - set(rows['ticker'].unique()))
+                if missing:
+                    print(f"Sin datos para {', '.join(missing)} entre {next_date} y {chunk_end}")
+                # yfinance drops symbols that failed from a batch without raising;
+                # a ticker that never returned a row over its whole range is reported
+                if chunk_end >= ticker_end:
+                    empty = _tickers_without_rows(conn, missing)
+                    if empty:
+                        print(f"Sin datos para {', '.join(empty)} en todo el rango del backfill")
+                        _mark_failed(conn, empty, "Sin datos en todo el rango del backfill")
+                        stats['failed'].update(empty)
+
+    stats['failed'] = sorted(stats['failed'])
+    return stats
+
+def main():
+    """
+    Función principal para ejecutar el backfill desde la línea de comandos.
+    """
+    parser = argparse.ArgumentParser(description="Carga histórica de precios reanudable")
+    parser.add_argument("--start", default=BACKFILL_START_DATE, help="Primera fecha a cargar (YYYY-MM-DD)")
+    parser.add_argument("--end", default=None, help="Fecha final exclusiva (YYYY-MM-DD), por defecto mañana")
+    parser.add_argument("--chunk-days", type=int, default=BACKFILL_CHUNK_DAYS, help="Días por tramo")
+    parser.add_argument("--batch-size", type=int, default=YFINANCE_BATCH_SIZE, help="Tickers por petición")
+    parser.add_argument("--tickers", nargs="+", default=None, help="Tickers a cargar (por defecto todos)")
+    parser.add_argument("--restart", action="store_true", help="Descartar los checkpoints existentes")
+    args = parser.parse_args()
+
+    tickers = [ticker.upper() for ticker in args.tickers] if args.tickers else get_tickers()
+
+    conn = create_database()
+    try:
+        stats = run_backfill(
+            conn, tickers,
+            start_date=args.start,
+            end_date=args.end,
+            chunk_days=args.chunk_days,
+            batch_size=args.batch_size,
+            restart=args.restart
+        )
+    except KeyboardInterrupt:
+        print("\nBackfill interrumpido. Vuelve a ejecutarlo para continuar desde el último checkpoint.")
+        return
+    finally:
+        conn.close()
+
+    print(f"\nBackfill completado: {stats['rows']} registros en {stats['chunks']} tramos.")
+    if stats['failed']:
+        print(f"Tickers con errores (se reintentarán en la próxima ejecución): {', '.join(stats['failed'])}")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
 """
 Script para limpiar la base de datos y actualizar los datos.
 """
-import sqlite3
-from config.settings import DB_NAME, TICKERS
+from config.tickers import get_tickers
 from database.db_manager import cleanup_database, get_connection
-from api.data_fetchers import fetch_yfinance_data, fetch_finhub_data, fetch_fmp_data, fetch_news_data, fetch_fundamental_data
+from api.resilience import get_run_stats
+from api.data_fetchers import fetch_yfinance_data, fetch_finhub_data, fetch_fmp_data, fetch_news_data, fetch_all_fundamental_data
 
 def remove_duplicate_data():
     """
@@ -62,35 +62,39 @@ def update_all_data():
     """
     Actualiza todos los datos de las APIs.
     """
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection()
+    tickers = get_tickers()
     
     # Actualizar datos de Yahoo Finance
     print("\nActualizando datos de Yahoo Finance...")
-    yf_records = fetch_yfinance_data(conn, TICKERS)
+    yf_records = fetch_yfinance_data(conn, tickers)
     print(f"Se insertaron {yf_records} registros de Yahoo Finance.")
     
     # Actualizar datos de Finhub
     print("\nActualizando datos de Finhub...")
-    fh_records = fetch_finhub_data(conn, TICKERS)
+    fh_records = fetch_finhub_data(conn, tickers)
     print(f"Se insertaron {fh_records} registros de Finhub.")
     
     # Actualizar datos de FMP
     print("\nActualizando datos de FMP...")
-    fmp_records = fetch_fmp_data(conn, TICKERS)
+    fmp_records = fetch_fmp_data(conn, tickers)
     print(f"Se insertaron {fmp_records} registros de FMP.")
     
     # Actualizar noticias
     print("\nActualizando noticias...")
-    news_records = fetch_news_data(conn, TICKERS)
+    news_records = fetch_news_data(conn, tickers)
     print(f"Se insertaron {news_records} noticias.")
     
     # Actualizar datos fundamentales
     print("\nActualizando datos fundamentales...")
-    fund_records = 0
-    for ticker in TICKERS:
-        fund_records += fetch_fundamental_data(conn, ticker)
+    fund_records = fetch_all_fundamental_data(conn, tickers)
     print(f"Se insertaron {fund_records} registros de datos fundamentales.")
     
+    # Mostrar reintentos y estado de los circuit breakers por proveedor
+    print("\nEstadísticas de peticiones HTTP:")
+    for provider, stats in get_run_stats().items():
+        print(f"  {provider}: {stats}")
+    
     conn.close()
 
 def main():
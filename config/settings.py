@@ -2,7 +2,6 @@
 Configuration settings for the financial data application.
 """
 import os
-import json
 
 # API Keys - Load from environment variables with fallback to default values
 ALPHAVANTAGE_API_KEY = os.environ.get("ALPHAVANTAGE_API_KEY", "IVTDDERCMU1QF611")
@@ -13,6 +12,41 @@ NEWS_API_KEY = os.environ.get("NEWS_API_KEY", "68da47963b2f4ca79b7e397abf680d60"
 
 # Database settings
 DB_NAME = 'financial_data.db'
+DB_TIMEOUT = 60  # Seconds a connection waits for a lock held by another writer
+BULK_INSERT_CHUNK_SIZE = 5000  # Rows per executemany call / transaction in bulk writes
+
+# SQLite connection tuning (database/connection.py)
+DB_JOURNAL_MODE = "WAL"  # Readers do not block on the writer and vice versa
+DB_SYNCHRONOUS = "NORMAL"  # Safe with WAL, avoids an fsync on every commit
+DB_CACHE_SIZE_KB = 64 * 1024  # Page cache per connection
+DB_MMAP_SIZE = 256 * 1024 * 1024  # Bytes of the database file memory-mapped for reads
+
+# Compact storage layout for the price and indicator tables (database/compact.py):
+# integer ticker/source ids and epoch-day dates in WITHOUT ROWID tables, read and
+# written through views with the original table names. Databases are converted
+# with python -m database.compact; create_database only warns on a mismatch.
+DB_COMPACT_LAYOUT = os.environ.get("DB_COMPACT_LAYOUT", "0") == "1"
+
+# Single writer thread settings
+WRITER_QUEUE_SIZE = 100  # Pending row batches before producers block (backpressure)
+WRITER_BATCH_ROWS = 5000  # Rows committed per writer transaction
+WRITER_FLUSH_INTERVAL = 2.0  # Seconds before a partially filled transaction is committed
+
+# Import-time budgets (milliseconds) per entry point, checked with
+# python -m utils.import_budget
+IMPORT_TIME_BUDGETS_MS = {
+    "app": 300,
+    "apply_retention": 200,
+    "backfill": 300,
+    "cleanup_db": 300,
+    "migrate_database": 200,
+    "quote_poller": 300,
+    "quote_stream": 300,
+    "utils.indicators": 300,
+    "web_app": 2000,
+}
+# Heavy dependencies the command line entry points may only import on first use
+DEFERRED_IMPORTS = ("pandas", "numpy", "plotly", "dash", "yfinance")
 
 # Tickers file path
 TICKERS_FILE = 'tickers.json'
@@ -33,69 +67,146 @@ def load_tickers_from_json(file_path=TICKERS_FILE, filter_type=None):
         list: List of ticker symbols
         dict: Dictionary mapping ticker symbols to their metadata
     """
-    if not os.path.exists(file_path):
-        print(f"Tickers file '{file_path}' not found. Using default tickers.")
-        return DEFAULT_TICKERS, {}
+    from config.tickers import TickerUniverse
     
-    try:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-        
-        ticker_data = {}
-        ticker_symbols = []
-        filtered_symbols = []
-        
-        if 'tickers' in data and isinstance(data['tickers'], list) and data['tickers']:
-            for ticker_info in data['tickers']:
-                # Check if ticker_info is a dictionary with a 'symbol' key
-                if isinstance(ticker_info, dict) and 'symbol' in ticker_info:
-                    symbol = ticker_info['symbol'].strip().upper()
-                    ticker_data[symbol] = ticker_info
-                    
-                    # If filter_type is specified, only include tickers of that type in filtered list
-                    if filter_type:
-                        if 'tipo' in ticker_info and ticker_info['tipo'] == filter_type:
-                            filtered_symbols.append(symbol)
-                            print(f"Incluyendo ticker {symbol} de tipo {ticker_info['tipo']}")
-                        else:
-                            tipo = ticker_info.get('tipo', 'No especificado')
-                            print(f"Excluyendo ticker {symbol} de tipo {tipo}")
-                    else:
-                        ticker_symbols.append(symbol)
-                # Handle the case where ticker_info is just a string (old format)
-                elif isinstance(ticker_info, str) and ticker_info.strip():
-                    symbol = ticker_info.strip().upper()
-                    ticker_symbols.append(symbol)
-                    ticker_data[symbol] = {'symbol': symbol}
-                    
-                    # Can't filter by type if ticker_info is just a string
-                    if filter_type:
-                        print(f"No se puede filtrar ticker {symbol} por tipo (formato antiguo)")
-            
-            if filter_type and filtered_symbols:
-                print(f"Se han filtrado {len(filtered_symbols)} tickers de tipo '{filter_type}' de un total de {len(ticker_data)}")
-                return filtered_symbols, ticker_data
-            elif not ticker_symbols and not filtered_symbols:
-                print(f"No valid tickers found in '{file_path}'. Using default tickers.")
-                return DEFAULT_TICKERS, {}
-            else:
-                return ticker_symbols, ticker_data
-        else:
-            print(f"No valid tickers found in '{file_path}'. Using default tickers.")
-            return DEFAULT_TICKERS, {}
-    except Exception as e:
-        print(f"Error loading tickers from '{file_path}': {e}. Using default tickers.")
-        return DEFAULT_TICKERS, {}
-
-# Load tickers (only stocks)
-TICKERS, TICKER_DATA = load_tickers_from_json(filter_type="Stock")
-print(f"Loaded {len(TICKERS)} tickers of type 'Stock'")
+    universe = TickerUniverse(file_path)
+    tickers = universe.filter(tipo=filter_type) if filter_type else universe.symbols
+    return tickers or list(DEFAULT_TICKERS), universe.data
+
+def __getattr__(name):
+    """
+    Resolve TICKERS and TICKER_DATA from the ticker universe on first access.
+    
+    The tickers file is no longer parsed when this module is imported; see
+    config.tickers.TickerUniverse.
+    """
+    if name == "TICKERS":
+        from config.tickers import get_tickers
+        return get_tickers()
+    if name == "TICKER_DATA":
+        from config.tickers import get_ticker_universe
+        return get_ticker_universe().data
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # API endpoints
 ALPHAVANTAGE_BASE_URL = "https://www.alphavantage.co/query"
 FINHUB_BASE_URL = "https://finnhub.io/api/v1"
 FMP_BASE_URL = "https://financialmodelingprep.com/api/v3"
 NEWS_API_BASE_URL = "https://newsapi.org/v2"
+FINHUB_WS_URL = "wss://ws.finnhub.io"
 
 # Data fetch settings
-NEWS_ARTICLE_LIMIT = 10  # Number of news articles to fetch per ticker 
\ No newline at end of file
+NEWS_ARTICLE_LIMIT = 10  # Number of news articles to fetch per ticker
+NEWS_DEDUP_WINDOW_DAYS = 2  # Same-title articles of a ticker published this many days apart or less are copies
+YFINANCE_BATCH_SIZE = 50  # Number of tickers per Yahoo Finance batch download
+FMP_BATCH_SIZE = 50  # Number of symbols per FMP profile/quote request
+PRICE_HISTORY_START = "2024-01-01"  # First date loaded for tickers without stored prices
+PRICE_OVERLAP_DAYS = 5  # Days re-fetched before the latest stored date to catch revisions
+BACKFILL_START_DATE = "2000-01-01"  # Default first date loaded by backfill.py
+BACKFILL_CHUNK_DAYS = 5 * 365  # Days of history downloaded per ticker and request during a backfill
+
+# Freshness policies used by the refresh planner (utils/refresh_planner.py).
+# A ticker is refreshed for a table when its newest row is older than max_age
+# seconds; source restricts the rows considered to those written by the fetcher.
+REFRESH_POLICIES = {
+    "stock_daily_data": {"max_age": 24 * 3600, "source": "yfinance"},
+    "market_quotes": {"max_age": 15 * 60, "source": None},
+    "company_profiles": {"max_age": 7 * 24 * 3600, "source": "fmp"},
+    "news_articles": {"max_age": 6 * 3600, "source": None},
+    "fundamental_data": {"max_age": 30 * 24 * 3600, "source": None},
+}
+
+# Retention of the append-only tables (database/retention.py, apply_retention.py)
+#   time_column: column holding the age of each row
+#   downsample_after_days: older rows keep only the last row per ticker, source
+#       and day (None = keep every row)
+#   archive_after_days: older rows move to yearly archive databases in
+#       RETENTION_ARCHIVE_DIR (None = never)
+RETENTION_POLICIES = {
+    "market_quotes": {"time_column": "timestamp", "downsample_after_days": 7, "archive_after_days": 90},
+    "news_articles": {"time_column": "published_at", "downsample_after_days": None, "archive_after_days": 180},
+}
+RETENTION_ARCHIVE_DIR = os.environ.get("RETENTION_ARCHIVE_DIR", "archive")
+
+# Quote poller settings (quote_poller.py). Times are in the market timezone.
+MARKET_TIMEZONE = "America/New_York"
+MARKET_OPEN_TIME = "09:30"
+MARKET_CLOSE_TIME = "16:00"
+EXTENDED_OPEN_TIME = "04:00"  # Pre-market start
+EXTENDED_CLOSE_TIME = "20:00"  # After-hours end
+# Seconds between two sweeps of the universe per market session (None = do not poll)
+QUOTE_POLL_INTERVALS = {
+    "open": 60,
+    "extended": 300,
+    "closed": None,
+}
+
+# Streaming settings (quote_stream.py)
+STREAM_FLUSH_INTERVAL = 1.0  # Seconds between snapshot flushes into market_quotes
+STREAM_RECONNECT_DELAY_MAX = 60  # Maximum seconds between reconnection attempts
+MOCK_FEED_HOST = "127.0.0.1"
+MOCK_FEED_PORT = 8765
+MOCK_FEED_RATE = 5000  # Trades per second generated by the mock feed
+
+# HTTP connection settings (timeouts in seconds)
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 30))
+
+# Maximum number of keep-alive connections kept open per provider
+HTTP_POOL_MAXSIZE = {
+    "alphavantage": 4,
+    "finhub": 16,
+    "fmp": 16,
+    "news": 8,
+    "yfinance": 16,
+}
+HTTP_DEFAULT_POOL_MAXSIZE = 8
+
+# Retry settings for transient HTTP failures (timeouts, 429 and 5xx responses)
+HTTP_MAX_RETRIES = 3
+HTTP_BACKOFF_BASE = 0.5  # seconds, doubled on every attempt
+HTTP_BACKOFF_MAX = 30  # seconds
+HTTP_RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Circuit breaker: stop calling a provider after this many consecutive failed
+# requests and probe it again once the reset timeout (seconds) has passed
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+CIRCUIT_BREAKER_RESET_TIMEOUT = 60
+
+# Provider quotas used by the rate limiter and the concurrent fetchers
+#   requests_per_minute: sustained request rate allowed by the provider
+#   burst: number of requests that can be sent back to back
+#   max_concurrency: maximum number of requests in flight at once
+PROVIDER_QUOTAS = {
+    "alphavantage": {"requests_per_minute": 5, "burst": 1, "max_concurrency": 1},
+    "finhub": {"requests_per_minute": 60, "burst": 10, "max_concurrency": 8},
+    "fmp": {"requests_per_minute": 300, "burst": 10, "max_concurrency": 8},
+    "news": {"requests_per_minute": 30, "burst": 5, "max_concurrency": 4},
+}
+DEFAULT_PROVIDER_QUOTA = {"requests_per_minute": 60, "burst": 5, "max_concurrency": 4}
+
+# Record/replay of connector traffic for offline benchmarks (api/replay.py)
+#   off: normal network access
+#   record: capture every response into HTTP_FIXTURES_DIR
+#   replay: serve the captured responses instead of using the network
+HTTP_REPLAY_MODE = os.environ.get("HTTP_REPLAY_MODE", "off")
+HTTP_FIXTURES_DIR = os.environ.get("HTTP_FIXTURES_DIR", "fixtures")
+HTTP_REPLAY_LATENCY = float(os.environ.get("HTTP_REPLAY_LATENCY", 0))  # Seconds added to every replayed response
+HTTP_REPLAY_ERROR_RATE = float(os.environ.get("HTTP_REPLAY_ERROR_RATE", 0))  # Share of replayed requests that fail
+HTTP_REPLAY_ENFORCE_QUOTAS = os.environ.get("HTTP_REPLAY_ENFORCE_QUOTAS", "0") == "1"
+
+# On-disk HTTP response cache
+HTTP_CACHE_ENABLED = os.environ.get("HTTP_CACHE_ENABLED", "1") != "0"
+HTTP_CACHE_PATH = os.environ.get("HTTP_CACHE_PATH", "http_cache.db")
+HTTP_CACHE_MAX_BYTES = 200 * 1024 * 1024  # Least recently used entries are evicted above this size
+
+# Cache TTL in seconds per (provider, endpoint). Endpoints not listed are not cached.
+HTTP_CACHE_TTLS = {
+    ("alphavantage", "TIME_SERIES_DAILY"): 6 * 3600,
+    ("finhub", "quote"): 15,
+    ("fmp", "profile"): 7 * 86400,
+    ("fmp", "quote"): 15,
+    ("fmp", "ratios"): 7 * 86400,
+    ("fmp", "income-statement"): 7 * 86400,
+    ("news", "everything"): 15 * 60,
+} 
\ No newline at end of file
@@ -0,0 +1,222 @@
+"""
+Lazily loaded, indexed universe of tickers defined in the tickers file.
+"""
+import json
+import os
+import threading
+from config.settings import TICKERS_FILE, DEFAULT_TICKERS
+
+# Metadata fields with a secondary index
+INDEXED_FIELDS = ('tipo', 'sector', 'subsector', 'pais')
+
+# Type of the tickers processed by default
+DEFAULT_TICKER_TYPE = "Stock"
+
+class TickerUniverse:
+    """
+    Tickers and their metadata, loaded from the tickers file on first use.
+
+    The file is parsed again only when its modification time changes, so a
+    long-running process (e.g. the web server) picks up edits without a
+    restart. Lookups by symbol and by indexed field are O(1) and filters are
+    set intersections.
+    """
+
+    def __init__(self, file_path=TICKERS_FILE):
+        """
+        Args:
+            file_path (str): Path to the JSON tickers file
+        """
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._symbols = []
+        self._symbol_set = frozenset()
+        self._data = {}
+        self._indexes = {field: {} for field in INDEXED_FIELDS}
+
+    def _current_mtime(self):
+        try:
+            return os.stat(self.file_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _parse(self):
+        """
+        Read the tickers file.
+
+        Returns:
+            tuple: (symbols in file order, metadata per symbol)
+        """
+        if not os.path.exists(self.file_path):
+            return list(DEFAULT_TICKERS), {}
+
+        try:
+            with open(self.file_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading tickers from '{self.file_path}': {e}. Using default tickers.")
+            return list(DEFAULT_TICKERS), {}
+
+        symbols = []
+        ticker_data = {}
+        for ticker_info in data.get('tickers') or []:
+            if isinstance(ticker_info, dict) and 'symbol' in ticker_info:
+                symbol = ticker_info['symbol'].strip().upper()
+            elif isinstance(ticker_info, str) and ticker_info.strip():
+                # Old format: plain symbol without metadata
+                symbol = ticker_info.strip().upper()
+                ticker_info = {'symbol': symbol}
+            else:
+                continue
+            if symbol not in ticker_data:
+                symbols.append(symbol)
+            ticker_data[symbol] = ticker_info
+
+        if not symbols:
+            print(f"No valid tickers found in '{self.file_path}'. Using default tickers.")
+            return list(DEFAULT_TICKERS), {}
+        return symbols, ticker_data
+
+    def _ensure_loaded(self):
+        mtime = self._current_mtime()
+        if self._symbols and mtime == self._mtime:
+            return
+        with self._lock:
+            if self._symbols and mtime == self._mtime:
+                return
+            symbols, ticker_data = self._parse()
+            indexes = {field: {} for field in INDEXED_FIELDS}
+            for symbol in symbols:
+                info = ticker_data.get(symbol, {})
+                for field in INDEXED_FIELDS:
+                    if info.get(field):
+                        indexes[field].setdefault(info[field], set()).add(symbol)
+            # Swap everything at once so readers never see a partial load
+            self._symbols, self._symbol_set, self._data, self._indexes = symbols, frozenset(symbols), ticker_data, indexes
+            self._mtime = mtime
+
+    def reload(self):
+        """
+        Force the tickers file to be parsed again on the next access.
+        """
+        with self._lock:
+            self._mtime = None
+            self._symbols = []
+
+    @property
+    def symbols(self):
+        """list: Every ticker symbol, in file order."""
+        self._ensure_loaded()
+        return list(self._symbols)
+
+    @property
+    def data(self):
+        """dict: Metadata of every ticker, keyed by symbol."""
+        self._ensure_loaded()
+        return self._data
+
+    def get(self, symbol, default=None):
+        """
+        Get the metadata of a ticker.
+
+        Args:
+            symbol (str): Ticker symbol
+            default: Value returned for unknown symbols
+
+        Returns:
+            dict: Ticker metadata
+        """
+        self._ensure_loaded()
+        return self._data.get(symbol.upper(), default)
+
+    def values(self, field):
+        """
+        Get the distinct values of an indexed field.
+
+        Args:
+            field (str): One of INDEXED_FIELDS
+
+        Returns:
+            list: Sorted field values
+        """
+        self._ensure_loaded()
+        return sorted(self._indexes[field])
+
+    def filter(self, **criteria):
+        """
+        Get the tickers matching every given field value.
+
+        Args:
+            **criteria: Indexed field names (tipo, sector, subsector, pais)
+                mapped to a value or a collection of accepted values
+
+        Returns:
+            list: Matching ticker symbols, in file order
+        """
+        self._ensure_loaded()
+        matches = None
+        for field, accepted in criteria.items():
+            if field not in self._indexes:
+                raise ValueError(f"Field {field} is not indexed (use one of {', '.join(INDEXED_FIELDS)})")
+            if isinstance(accepted, str):
+                accepted = (accepted,)
+            field_matches = set()
+            for value in accepted:
+                field_matches |= self._indexes[field].get(value, set())
+            matches = field_matches if matches is None else matches & field_matches
+        if matches is None:
+            return list(self._symbols)
+        return [symbol for symbol in self._symbols if symbol in matches]
+
+    def default_tickers(self):
+        """
+        Get the tickers processed by default (those of type DEFAULT_TICKER_TYPE).
+
+        Old-format entries without a type are included when no ticker has
+        that type, and DEFAULT_TICKERS is used when nothing matches.
+
+        Returns:
+            list: Ticker symbols
+        """
+        tickers = self.filter(tipo=DEFAULT_TICKER_TYPE)
+        if not tickers:
+            tickers = [symbol for symbol in self.symbols if 'tipo' not in self._data.get(symbol, {})]
+        return tickers or list(DEFAULT_TICKERS)
+
+    def __contains__(self, symbol):
+        self._ensure_loaded()
+        return isinstance(symbol, str) and symbol.upper() in self._symbol_set
+
+    def __iter__(self):
+        return iter(self.symbols)
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._symbols)
+
+_universe = None
+_universe_lock = threading.Lock()
+
+def get_ticker_universe():
+    """
+    Get the shared ticker universe, creating it on first use.
+
+    Returns:
+        TickerUniverse: Universe for TICKERS_FILE
+    """
+    global _universe
+    if _universe is None:
+        with _universe_lock:
+            if _universe is None:
+                _universe = TickerUniverse()
+    return _universe
+
+def get_tickers():
+    """
+    Get the tickers processed by default.
+
+    Returns:
+        list: Ticker symbols of type DEFAULT_TICKER_TYPE
+    """
+    return get_ticker_universe().default_tickers()
@@ -0,0 +1,429 @@
+"""
+Optional compact storage layout for the price and indicator tables.
+
+stock_daily_data and technical_indicators repeat the ticker, the ISO date,
+the source and a text timestamp on every row behind an AUTOINCREMENT key. In
+the compact layout the rows live in WITHOUT ROWID tables keyed on integer ids
+(tickers and sources dictionaries) and epoch-day integers, so the rows of a
+ticker are stored contiguously in date order and each row takes a fraction of
+the space.
+
+The original table names become views with INSTEAD OF INSERT and DELETE
+triggers, so existing queries and writes keep working unchanged. The views
+compute date from the stored day, so a filter or ORDER BY on date cannot seek
+on the primary key; they also expose day itself, and the hot read queries
+filter and sort on the column returned by date_key. Upserts
+(ON CONFLICT) cannot target a view: the write paths pass statements through
+adapt_statement, which drops the ON CONFLICT clause when the database on disk
+uses this layout, and the view's trigger performs the change-only upsert.
+
+Converting rewrites the whole price history, so it only happens through this
+command; create_database keeps the layout on disk and warns when it differs
+from DB_COMPACT_LAYOUT.
+
+Uso:
+    python -m database.compact [--enable | --disable] [--vacuum] [--db financial_data.db]
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+from datetime import date, datetime
+from config.settings import DB_NAME, DB_COMPACT_LAYOUT
+from database.schema import (
+    STOCK_DAILY_SCHEMA,
+    TECHNICAL_INDICATORS_SCHEMA,
+    TICKERS_SCHEMA,
+    SOURCES_SCHEMA,
+    STOCK_DAILY_COMPACT_SCHEMA,
+    TECHNICAL_INDICATORS_COMPACT_SCHEMA,
+    READ_INDEXES
+)
+
+# Logical key column: (storage column, value from a logical value, expression in the view)
+KEY_COLUMNS = {
+    'ticker': ('ticker_id', "(SELECT id FROM tickers WHERE symbol = {})", "t.symbol"),
+    'source': ('source_id', "(SELECT id FROM sources WHERE name = {})", "s.name"),
+    'date': ('day', "CAST(strftime('%s', {}) AS INTEGER) / 86400", "date(d.day * 86400, 'unixepoch')"),
+}
+
+# View name: storage table, schemas of both layouts and logical key in storage order
+COMPACT_TABLES = {
+    'stock_daily_data': {
+        'storage': 'stock_daily_compact',
+        'row_schema': STOCK_DAILY_SCHEMA,
+        'compact_schema': STOCK_DAILY_COMPACT_SCHEMA,
+        'key': ['ticker', 'source', 'date'],
+    },
+    'technical_indicators': {
+        'storage': 'technical_indicators_compact',
+        'row_schema': TECHNICAL_INDICATORS_SCHEMA,
+        'compact_schema': TECHNICAL_INDICATORS_COMPACT_SCHEMA,
+        'key': ['ticker', 'date'],
+    },
+}
+
+_NOW = "CAST(strftime('%s', 'now') AS INTEGER)"
+_INSERT_TARGET = re.compile(r"\s*INSERT\s+INTO\s+(\w+)", re.IGNORECASE)
+_EPOCH = date(1970, 1, 1)
+
+def is_compact(conn):
+    """
+    Check whether a database uses the compact layout.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        bool: True when stock_daily_data is a compatibility view
+    """
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'stock_daily_data'").fetchone()
+    return row is not None and row[0] == 'view'
+
+def to_day(value):
+    """
+    Convert a date to the epoch-day number stored by the compact tables.
+
+    Args:
+        value (str): Date as YYYY-MM-DD (anything after the date is ignored)
+
+    Returns:
+        int: Days since 1970-01-01
+    """
+    return (datetime.strptime(str(value)[:10], '%Y-%m-%d').date() - _EPOCH).days
+
+def date_key(conn):
+    """
+    Get the column to filter and sort price and indicator rows by date.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        tuple: (column name, function converting a YYYY-MM-DD parameter for it);
+            day and to_day in the compact layout, date unchanged otherwise
+    """
+    if is_compact(conn):
+        return 'day', to_day
+    return 'date', str
+
+def _value_columns(conn, table):
+    """
+    Get the non-key data columns of a compact table, in storage order.
+    """
+    spec = COMPACT_TABLES[table]
+    storage_keys = {KEY_COLUMNS[column][0] for column in spec['key']}
+    columns = conn.execute(f"PRAGMA table_info({spec['storage']})").fetchall()
+    return [column[1] for column in columns if column[1] not in storage_keys and column[1] != 'updated_at']
+
+def _logical_columns(conn, table):
+    """
+    Get the columns of the view in the order of the original table.
+    """
+    key = COMPACT_TABLES[table]['key']
+    columns = ['ticker', 'date'] + _value_columns(conn, table)
+    if 'source' in key:
+        columns.append('source')
+    return columns
+
+def _select_sql(conn, table, storage=None):
+    """
+    Build the SELECT that reads a compact table with the original columns.
+    """
+    spec = COMPACT_TABLES[table]
+    selected = []
+    for column in _logical_columns(conn, table):
+        expression = KEY_COLUMNS[column][2] if column in KEY_COLUMNS else f"d.{column}"
+        selected.append(f"{expression} AS {column}")
+    joins = "JOIN tickers t ON t.id = d.ticker_id"
+    if 'source' in spec['key']:
+        joins += " JOIN sources s ON s.id = d.source_id"
+    # The layout has no surrogate id; a NULL id makes id-based deduplication a no-op,
+    # which is correct since the primary key already rules out duplicates
+    return (f"SELECT NULL AS id, {', '.join(selected)}, datetime(d.updated_at, 'unixepoch') AS timestamp, "
+            f"d.day AS day FROM {storage or spec['storage']} d {joins}")
+
+def _insert_trigger_sql(conn, table):
+    spec = COMPACT_TABLES[table]
+    values = _value_columns(conn, table)
+    storage_keys = [KEY_COLUMNS[column][0] for column in spec['key']]
+    key_values = [KEY_COLUMNS[column][1].format(f"NEW.{column}") for column in spec['key']]
+
+    dimensions = "INSERT OR IGNORE INTO tickers (symbol) VALUES (NEW.ticker);"
+    if 'source' in spec['key']:
+        dimensions += " INSERT OR IGNORE INTO sources (name) VALUES (NEW.source);"
+    assignments = ', '.join(f"{column} = excluded.{column}" for column in values)
+    changed = ' OR '.join(f"{column} IS NOT excluded.{column}" for column in values)
+    return (f"CREATE TRIGGER {table}_insert INSTEAD OF INSERT ON {table} BEGIN {dimensions} "
+            f"INSERT INTO {spec['storage']} ({', '.join(storage_keys + values)}, updated_at) "
+            f"VALUES ({', '.join(key_values + [f'NEW.{column}' for column in values])}, {_NOW}) "
+            f"ON CONFLICT({', '.join(storage_keys)}) DO UPDATE SET {assignments}, updated_at = excluded.updated_at "
+            f"WHERE {changed}; END")
+
+def _delete_trigger_sql(table):
+    spec = COMPACT_TABLES[table]
+    conditions = ' AND '.join(
+        f"{KEY_COLUMNS[column][0]} = {KEY_COLUMNS[column][1].format(f'OLD.{column}')}" for column in spec['key']
+    )
+    return (f"CREATE TRIGGER {table}_delete INSTEAD OF DELETE ON {table} BEGIN "
+            f"DELETE FROM {spec['storage']} WHERE {conditions}; END")
+
+def adapt_statement(conn, query):
+    """
+    Adapt a statement built by db_manager.build_upsert_sql to the layout on disk.
+
+    An upsert into a table stored behind a compatibility view loses its
+    ON CONFLICT clause; the view's insert trigger upserts changed rows only.
+    Other statements are returned unchanged.
+
+    Args:
+        conn (sqlite3.Connection): Database connection the statement runs on
+        query (str): SQL statement
+
+    Returns:
+        str: SQL statement to execute
+    """
+    match = _INSERT_TARGET.match(query)
+    if match is None or match.group(1) not in COMPACT_TABLES or '\nON CONFLICT' not in query:
+        return query
+    if not is_compact(conn):
+        return query
+    return query[:query.index('\nON CONFLICT')]
+
+def ensure_dimensions(conn, columns, rows):
+    """
+    Add the tickers and sources of some rows to the dictionaries.
+
+    The insert triggers do the same per row; doing it up front keeps the
+    trigger's change count down to the rows actually written.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        columns (list): Column names of the rows
+        rows (list): List of value tuples
+    """
+    for column, table, name in (('ticker', 'tickers', 'symbol'), ('source', 'sources', 'name')):
+        if column in columns:
+            position = columns.index(column)
+            values = {row[position] for row in rows}
+            conn.executemany(f"INSERT OR IGNORE INTO {table} ({name}) VALUES (?)", [(value,) for value in values])
+
+def count_existing_keys(conn, table, keys):
+    """
+    Count how many logical keys of a compact table are already stored.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        table (str): View name (one of COMPACT_TABLES)
+        keys (list): Key tuples in the order of COMPACT_TABLES[table]['key']
+
+    Returns:
+        int: Number of stored keys
+    """
+    spec = COMPACT_TABLES[table]
+    storage_keys = ', '.join(KEY_COLUMNS[column][0] for column in spec['key'])
+    # column1, column2... are the columns of a VALUES list
+    translated = ', '.join(
+        KEY_COLUMNS[column][1].format(f"column{i + 1}") for i, column in enumerate(spec['key'])
+    )
+    placeholders = '(' + ', '.join('?' for _ in spec['key']) + ')'
+    batch_size = max(1, 900 // len(spec['key']))
+    existing = 0
+
+    for i in range(0, len(keys), batch_size):
+        batch = keys[i:i + batch_size]
+        params = [value for key in batch for value in key]
+        existing += conn.execute(
+            f"SELECT COUNT(*) FROM {spec['storage']} WHERE ({storage_keys}) IN "
+            f"(SELECT {translated} FROM (VALUES {', '.join(placeholders for _ in batch)}))",
+            params
+        ).fetchone()[0]
+    return existing
+
+def _indexes_on(table):
+    return [sql for sql in READ_INDEXES.values() if f"ON {table}(" in sql]
+
+def _create_view(conn, table):
+    """
+    Create the compatibility view of a compact table and its triggers.
+    """
+    conn.execute(f"CREATE VIEW {table} AS {_select_sql(conn, table)}")
+    conn.execute(_insert_trigger_sql(conn, table))
+    conn.execute(_delete_trigger_sql(table))
+
+def upgrade_views(conn):
+    """
+    Recreate the compatibility views created before they exposed day.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        list: Views recreated
+    """
+    outdated = [
+        table for table in COMPACT_TABLES
+        if 'day' not in {column[1] for column in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+    ]
+    if not outdated:
+        return []
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for table in outdated:
+            # Dropping the view also drops its triggers
+            conn.execute(f"DROP VIEW {table}")
+            _create_view(conn, table)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return outdated
+
+def enable_compact_layout(conn):
+    """
+    Move the price and indicator rows into the compact tables and replace the
+    original tables by compatibility views, in a single transaction.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+    """
+    conn.commit()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute(TICKERS_SCHEMA)
+        cursor.execute(SOURCES_SCHEMA)
+        for table, spec in COMPACT_TABLES.items():
+            cursor.execute(spec['row_schema'])
+            cursor.execute(spec['compact_schema'])
+            cursor.execute(f"INSERT OR IGNORE INTO tickers (symbol) SELECT DISTINCT ticker FROM {table}")
+            if 'source' in spec['key']:
+                cursor.execute(f"INSERT OR IGNORE INTO sources (name) SELECT DISTINCT source FROM {table}")
+
+            values = _value_columns(conn, table)
+            storage_keys = [KEY_COLUMNS[column][0] for column in spec['key']]
+            key_values = [KEY_COLUMNS[column][1].format(f"r.{column}") for column in spec['key']]
+            # Storage order keeps the b-tree appends sequential
+            cursor.execute(
+                f"INSERT OR IGNORE INTO {spec['storage']} ({', '.join(storage_keys + values)}, updated_at) "
+                f"SELECT {', '.join(key_values + [f'r.{column}' for column in values])}, "
+                f"COALESCE(CAST(strftime('%s', r.timestamp) AS INTEGER), {_NOW}) "
+                f"FROM {table} r ORDER BY {', '.join(key_values)}"
+            )
+            cursor.execute(f"DROP TABLE {table}")
+            _create_view(conn, table)
+        cursor.execute("ANALYZE")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def disable_compact_layout(conn):
+    """
+    Move the rows back into the original tables and drop the compact tables.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+    """
+    conn.commit()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        for table, spec in COMPACT_TABLES.items():
+            columns = _logical_columns(conn, table)
+            select_sql = _select_sql(conn, table, spec['storage'] + '_old')
+            cursor.execute(f"ALTER TABLE {spec['storage']} RENAME TO {spec['storage']}_old")
+            cursor.execute(f"DROP VIEW {table}")
+            cursor.execute(spec['row_schema'])
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}, timestamp) "
+                f"SELECT {', '.join(columns)}, timestamp FROM ({select_sql}) ORDER BY ticker, date"
+            )
+            cursor.execute(f"DROP TABLE {spec['storage']}_old")
+            for index_sql in _indexes_on(table):
+                cursor.execute(index_sql)
+        cursor.execute("DROP TABLE IF EXISTS tickers")
+        cursor.execute("DROP TABLE IF EXISTS sources")
+        cursor.execute("ANALYZE")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def check_layout(conn, compact=DB_COMPACT_LAYOUT):
+    """
+    Keep the layout on disk and warn if it is not the configured one.
+
+    The views of a compact database are brought up to date; the database is
+    never converted (see apply_layout).
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        compact (bool): Whether the compact layout is expected
+
+    Returns:
+        bool: True if the database uses the expected layout
+    """
+    on_disk = is_compact(conn)
+    if on_disk:
+        upgrade_views(conn)
+    if on_disk != compact:
+        print(f"Aviso: la base usa el formato {'compacto' if on_disk else 'por filas'} y DB_COMPACT_LAYOUT "
+              f"indica el otro; se mantiene el formato actual "
+              f"(python -m database.compact --{'enable' if compact else 'disable'} para convertirla)")
+    return on_disk == compact
+
+def apply_layout(conn, compact=DB_COMPACT_LAYOUT):
+    """
+    Convert a database to the configured layout if it uses the other one.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        compact (bool): Whether the compact layout is wanted
+
+    Returns:
+        bool: True if the database was converted
+    """
+    if is_compact(conn) == compact:
+        if compact:
+            upgrade_views(conn)
+        return False
+    if compact:
+        print("Convirtiendo stock_daily_data y technical_indicators al formato compacto...")
+        enable_compact_layout(conn)
+    else:
+        print("Convirtiendo stock_daily_data y technical_indicators al formato por filas...")
+        disable_compact_layout(conn)
+    return True
+
+def main():
+    """
+    Show the layout and size of a database, optionally converting it.
+    """
+    parser = argparse.ArgumentParser(description="Formato de almacenamiento de precios e indicadores")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--enable", action="store_true", help="Convertir al formato compacto")
+    group.add_argument("--disable", action="store_true", help="Volver al formato por filas")
+    parser.add_argument("--vacuum", action="store_true", help="Compactar el fichero después (VACUUM)")
+    parser.add_argument("--db", default=DB_NAME, help="Base de datos")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"No existe la base de datos {args.db}")
+        sys.exit(1)
+    conn = sqlite3.connect(args.db)
+    size_before = os.path.getsize(args.db)
+    if args.enable or args.disable:
+        apply_layout(conn, compact=args.enable)
+    if args.vacuum:
+        conn.execute("VACUUM")
+    print(f"Formato: {'compacto' if is_compact(conn) else 'por filas'}")
+    conn.close()
+    print(f"Tamaño del fichero: {size_before / 1e6:.1f} MB -> {os.path.getsize(args.db) / 1e6:.1f} MB")
+    if args.disable == DB_COMPACT_LAYOUT and (args.enable or args.disable):
+        print("Aviso: DB_COMPACT_LAYOUT indica el otro formato; actualízalo para que coincida con la base.")
+
+if __name__ == "__main__":
+    main()
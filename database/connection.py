@@ -0,0 +1,95 @@
+"""
+Shared SQLite connections, one per thread and database file.
+
+Connections are opened on first use in each thread, tuned with the pragmas
+from the settings (WAL journal, synchronous=NORMAL, page cache, mmap and
+busy timeout) and then reused, so helpers no longer pay the connect and
+setup cost on every call.
+"""
+import sqlite3
+import threading
+import weakref
+from config.settings import (
+    DB_NAME,
+    DB_TIMEOUT,
+    DB_JOURNAL_MODE,
+    DB_SYNCHRONOUS,
+    DB_CACHE_SIZE_KB,
+    DB_MMAP_SIZE
+)
+
+class SharedConnection(sqlite3.Connection):
+    """
+    Connection reused by every caller in the same thread.
+
+    close() keeps the connection open so existing "open, use, close" code
+    keeps working, but rolls back any transaction left open, as closing a
+    real connection would; callers must commit their writes before closing.
+    The connection is really closed by close_all_connections() or when its
+    thread ends.
+    """
+
+    def close(self):
+        # Uncommitted writes must not leak into the next caller on this thread
+        if self.in_transaction:
+            self.rollback()
+
+    def close_for_real(self):
+        super().close()
+
+_local = threading.local()
+_all_connections = weakref.WeakSet()
+_all_connections_lock = threading.Lock()
+# Bumped by close_all_connections so every thread reopens its connections
+_generation = 0
+
+def _configure(conn):
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA journal_mode = {DB_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
+    # Negative cache_size is in KiB instead of pages
+    cursor.execute(f"PRAGMA cache_size = -{int(DB_CACHE_SIZE_KB)}")
+    cursor.execute(f"PRAGMA mmap_size = {int(DB_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA busy_timeout = {int(DB_TIMEOUT * 1000)}")
+    cursor.close()
+
+def get_shared_connection(path=DB_NAME):
+    """
+    Get the current thread's connection to a database, opening it on first use.
+
+    Args:
+        path (str): Database file
+
+    Returns:
+        SharedConnection: Tuned connection owned by the current thread
+    """
+    connections = getattr(_local, 'connections', None)
+    if connections is None or _local.generation != _generation:
+        connections = _local.connections = {}
+        _local.generation = _generation
+
+    conn = connections.get(path)
+    if conn is None:
+        # check_same_thread is off only so close_all_connections can close
+        # it; the connection is still used by its own thread alone
+        conn = sqlite3.connect(path, timeout=DB_TIMEOUT, factory=SharedConnection, check_same_thread=False)
+        _configure(conn)
+        connections[path] = conn
+        with _all_connections_lock:
+            _all_connections.add(conn)
+    return conn
+
+def close_all_connections():
+    """
+    Close every shared connection, e.g. before deleting or replacing the database file.
+    """
+    global _generation
+    with _all_connections_lock:
+        _generation += 1
+        connections = list(_all_connections)
+        _all_connections.clear()
+    for conn in connections:
+        try:
+            conn.close_for_real()
+        except sqlite3.Error:
+            pass
@@ -1,117 +1,44 @@
 """
 Database manager module for creating and managing the SQLite database.
 """
-import sqlite3
-from config.settings import DB_NAME
-from database.schema import (
-    STOCK_DAILY_SCHEMA,
-    FINHUB_QUOTES_SCHEMA,
-    COMPANY_PROFILES_SCHEMA,
-    NEWS_ARTICLES_SCHEMA,
-    TECHNICAL_INDICATORS_SCHEMA,
-    FUNDAMENTAL_DATA_SCHEMA,
-    PORTFOLIO_SCHEMA,
-    WATCHLIST_SCHEMA
-)
+from config.settings import DB_NAME, BULK_INSERT_CHUNK_SIZE, DB_COMPACT_LAYOUT
+from database.connection import get_shared_connection
+from database import compact
+# migrate_data and the ensure_* helpers are re-exported for existing callers
+from database.migrations import apply_migrations, migrate_data, ensure_news_content_hash, ensure_read_indexes
 
 def create_database():
     """
     Create the SQLite database and all required tables.
     
+    Pending schema migrations are applied; on an up-to-date database this is
+    a single PRAGMA user_version read (see database.migrations). The layout
+    of the price and indicator tables on disk is kept as is, with a warning
+    when it is not the one in DB_COMPACT_LAYOUT; converting is left to
+    ``python -m database.compact``. READ_INDEXES are then brought up to date,
+    so a new index version reaches existing databases.
+    
     Returns:
         sqlite3.Connection: Database connection object
     """
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    # Create tables for each data type
-    cursor.execute(STOCK_DAILY_SCHEMA)
-    cursor.execute(FINHUB_QUOTES_SCHEMA)
-    cursor.execute(COMPANY_PROFILES_SCHEMA)
-    cursor.execute(NEWS_ARTICLES_SCHEMA)
-    cursor.execute(TECHNICAL_INDICATORS_SCHEMA)
-    
-    # Create additional tables for extended functionality
-    cursor.execute(FUNDAMENTAL_DATA_SCHEMA)
-    cursor.execute(PORTFOLIO_SCHEMA)
-    cursor.execute(WATCHLIST_SCHEMA)
-    
-    # Migrar datos de tablas antiguas si existen
-    migrate_data(conn)
-    
-    conn.commit()
+    conn = get_connection()
+    apply_migrations(conn)
+    compact.check_layout(conn, DB_COMPACT_LAYOUT)
+    ensure_read_indexes(conn)
     return conn
 
-def migrate_data(conn):
-    """
-    Migra datos de las tablas antiguas a las nuevas si existen.
-    
-    Args:
-        conn (sqlite3.Connection): Conexión a la base de datos
-    """
-    cursor = conn.cursor()
-    
-    # Verificar si existen tablas antiguas
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='alphavantage_daily'")
-    if cursor.fetchone():
-        print("Migrando datos de alphavantage_daily a stock_daily_data...")
-        cursor.execute("""
-        INSERT OR IGNORE INTO stock_daily_data 
-        (ticker, date, open, high, low, close, volume, source)
-        SELECT ticker, date, open, high, low, close, volume, 'alphavantage'
-        FROM alphavantage_daily
-        """)
-    
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='polygon_data'")
-    if cursor.fetchone():
-        print("Migrando datos de polygon_data a stock_daily_data...")
-        cursor.execute("""
-        INSERT OR IGNORE INTO stock_daily_data 
-        (ticker, date, open, high, low, close, volume, source)
-        SELECT ticker, date, open, high, low, close, volume, 'polygon'
-        FROM polygon_data
-        """)
-    
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='finhub_quotes'")
-    if cursor.fetchone():
-        print("Migrando datos de finhub_quotes a market_quotes...")
-        cursor.execute("""
-        INSERT OR IGNORE INTO market_quotes 
-        (ticker, current_price, change, percent_change, high, low, open, previous_close, source, timestamp)
-        SELECT ticker, current_price, change, percent_change, high, low, open, previous_close, 'finhub', timestamp
-        FROM finhub_quotes
-        """)
-    
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='fmp_profiles'")
-    if cursor.fetchone():
-        print("Migrando datos de fmp_profiles a company_profiles...")
-        cursor.execute("""
-        INSERT OR IGNORE INTO company_profiles 
-        (ticker, company_name, industry, sector, market_cap, employees, description, ceo, website, exchange, ipo_date, source)
-        SELECT ticker, company_name, industry, sector, market_cap, employees, description, ceo, website, exchange, ipo_date, 'fmp'
-        FROM fmp_profiles
-        """)
-    
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='ticker_info'")
-    if cursor.fetchone():
-        print("Migrando datos de ticker_info a company_profiles...")
-        cursor.execute("""
-        INSERT OR IGNORE INTO company_profiles 
-        (ticker, sector, subsector, country, founded, years_public, type, source)
-        SELECT symbol, sector, subsector, pais, fundacion, anos_en_bolsa, tipo, 'manual'
-        FROM ticker_info
-        """)
-    
-    conn.commit()
-
 def get_connection():
     """
-    Get a connection to the database.
+    Get the current thread's shared connection to the database.
+    
+    The connection runs in WAL mode with a busy timeout, so readers do not
+    block behind writers and concurrent writers wait for the lock instead of
+    failing fast. Calling close() on it is a no-op (see database.connection).
     
     Returns:
         sqlite3.Connection: Database connection object
     """
-    return sqlite3.connect(DB_NAME)
+    return get_shared_connection(DB_NAME)
 
 def execute_query(query, params=None):
     """
@@ -138,36 +65,237 @@ def execute_query(query, params=None):
     
     return results
 
-def insert_many(table, columns, values):
+def executemany_in_chunks(conn, query, rows, chunk_size=BULK_INSERT_CHUNK_SIZE, commit=True):
+    """
+    Execute a parameterized statement for many rows in chunked transactions.
+    
+    The statement is prepared once by sqlite3 and reused for every row of each
+    executemany call, so this is much faster than one execute per row.
+    
+    Args:
+        conn (sqlite3.Connection): Database connection
+        query (str): SQL statement with ? placeholders
+        rows (list): List of parameter tuples
+        chunk_size (int): Number of rows per executemany call
+        commit (bool): Commit after each chunk. Pass False to let the caller
+            commit everything in a single transaction
+        
+    Returns:
+        int: Number of rows modified
+    """
+    cursor = conn.cursor()
+    query = compact.adapt_statement(conn, query)
+    # total_changes also counts rows written by triggers (compact layout views)
+    changes_before = conn.total_changes
+    
+    for i in range(0, len(rows), chunk_size):
+        cursor.executemany(query, rows[i:i + chunk_size])
+        if commit:
+            conn.commit()
+    
+    return conn.total_changes - changes_before
+
+def write_rows(conn, query, rows, writer=None, commit=True):
     """
-    Insert multiple rows into a table.
+    Write rows either directly on a connection or through a DatabaseWriter.
+    
+    Args:
+        conn (sqlite3.Connection): Database connection used when no writer is given
+        query (str): SQL statement with ? placeholders
+        rows (list): List of parameter tuples
+        writer (DatabaseWriter, optional): Background writer to queue the rows on
+        commit (bool): Commit after each chunk when writing directly
+        
+    Returns:
+        int: Number of rows modified, or queued when a writer is used
+    """
+    if writer is not None:
+        return writer.submit(query, rows)
+    return executemany_in_chunks(conn, query, rows, commit=commit)
+
+def build_upsert_sql(table, columns, conflict_columns, update_columns=None, touch_column=None,
+                     coalesce_columns=()):
+    """
+    Build an INSERT ... ON CONFLICT DO UPDATE statement that only rewrites
+    rows whose values actually changed.
+    
+    Unlike INSERT OR REPLACE, an existing row keeps its id and index entries,
+    and a row receiving identical values is not written at all. The statement
+    does not depend on the storage layout: the write paths pass it through
+    compact.adapt_statement, which turns it into a plain INSERT for tables
+    stored behind compatibility views, whose trigger applies the same rule.
     
     Args:
         table (str): Table name
-        columns (list): Column names
-        values (list): List of value tuples to insert
+        columns (list): Inserted column names, in the order of the ? placeholders
+        conflict_columns (list): Columns of the UNIQUE constraint to upsert on
+        update_columns (list, optional): Columns updated on conflict (defaults
+            to every inserted column outside the conflict key)
+        touch_column (str, optional): Column set to CURRENT_TIMESTAMP when a
+            row changes (e.g. 'timestamp')
+        coalesce_columns (list, optional): Update columns that keep their
+            stored value when the new one is NULL (data missing from a response)
         
     Returns:
-        int: Number of rows inserted
+        str: SQL statement
     """
-    if not values:
-        return 0
+    if update_columns is None:
+        update_columns = [column for column in columns if column not in conflict_columns]
+    
+    placeholders = ', '.join('?' for _ in columns)
+    sql = (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})\n"
+           f"ON CONFLICT({', '.join(conflict_columns)}) DO ")
+    if not update_columns:
+        return sql + "NOTHING"
+    
+    new_values = {
+        column: f"COALESCE(excluded.{column}, {column})" if column in coalesce_columns else f"excluded.{column}"
+        for column in update_columns
+    }
+    assignments = [f"{column} = {new_values[column]}" for column in update_columns]
+    if touch_column and touch_column not in update_columns:
+        assignments.append(f"{touch_column} = CURRENT_TIMESTAMP")
+    # IS NOT treats NULLs as comparable values
+    changed = ' OR '.join(f"{column} IS NOT {new_values[column]}" for column in update_columns)
+    return sql + f"UPDATE SET {', '.join(assignments)}\nWHERE {changed}"
+
+def get_conflict_columns(conn, table):
+    """
+    Get the columns of a table's first UNIQUE constraint (or non-rowid primary key).
+    
+    Args:
+        conn (sqlite3.Connection): Database connection
+        table (str): Table name
         
-    conn = get_connection()
+    Returns:
+        list: Column names
+        
+    Raises:
+        ValueError: If the table has no such constraint
+    """
+    if table in compact.COMPACT_TABLES and compact.is_compact(conn):
+        return list(compact.COMPACT_TABLES[table]['key'])
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA index_list({table})")
+    indexes = [(name, origin) for _, name, unique, origin, *_ in cursor.fetchall() if unique]
+    # Prefer explicit UNIQUE constraints over primary keys
+    indexes.sort(key=lambda index: index[1] != 'u')
+    for name, _ in indexes:
+        cursor.execute(f"PRAGMA index_info({name})")
+        columns = [row[2] for row in sorted(cursor.fetchall())]
+        if columns:
+            return columns
+    raise ValueError(f"Table {table} has no UNIQUE constraint to upsert on")
+
+def _count_existing_keys(conn, table, conflict_columns, keys):
+    """
+    Count how many of the given keys are already stored in a table.
+    """
+    if table in compact.COMPACT_TABLES and compact.is_compact(conn):
+        return compact.count_existing_keys(conn, table, keys)
     cursor = conn.cursor()
+    key_list = ', '.join(conflict_columns)
+    placeholders = '(' + ', '.join('?' for _ in conflict_columns) + ')'
+    # Stay below the SQLite bound-parameter limit of older versions
+    batch_size = max(1, 900 // len(conflict_columns))
+    existing = 0
+    
+    for i in range(0, len(keys), batch_size):
+        batch = keys[i:i + batch_size]
+        params = [value for key in batch for value in key]
+        cursor.execute(
+            f"SELECT COUNT(*) FROM {table} WHERE ({key_list}) IN "
+            f"(VALUES {', '.join(placeholders for _ in batch)})",
+            params
+        )
+        existing += cursor.fetchone()[0]
+    return existing
+
+def upsert_many(conn, table, columns, rows, conflict_columns=None, update_columns=None, touch_column=None,
+                chunk_size=BULK_INSERT_CHUNK_SIZE):
+    """
+    Insert or update many rows, committing one transaction per chunk.
     
-    placeholders = ', '.join(['?' for _ in range(len(columns))])
-    column_str = ', '.join(columns)
+    Existing keys are counted before each chunk is written, so the result
+    separates new rows from changed rows and from rows that already held the
+    same values (which are not rewritten).
     
-    query = f"INSERT OR REPLACE INTO {table} ({column_str}) VALUES ({placeholders})"
+    Args:
+        conn (sqlite3.Connection): Database connection
+        table (str): Table name
+        columns (list): Column names, in the order of the row values
+        rows (list): List of value tuples
+        conflict_columns (list, optional): Upsert key (defaults to the table's
+            UNIQUE constraint)
+        update_columns (list, optional): Columns updated on conflict
+        touch_column (str, optional): Column set to CURRENT_TIMESTAMP on changed rows
+        chunk_size (int): Rows per transaction
+        
+    Returns:
+        dict: Number of rows inserted, updated and unchanged
+    """
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    if not rows:
+        return counts
+    
+    # The layout on disk decides, whatever DB_COMPACT_LAYOUT says
+    compact_view = table in compact.COMPACT_TABLES and compact.is_compact(conn)
+    if conflict_columns is None or compact_view:
+        conflict_columns = get_conflict_columns(conn, table)
+    query = compact.adapt_statement(conn, build_upsert_sql(table, columns, conflict_columns, update_columns,
+                                                           touch_column))
+    key_positions = [columns.index(column) for column in conflict_columns]
+    cursor = conn.cursor()
     
-    cursor.executemany(query, values)
-    rows_inserted = cursor.rowcount
+    for i in range(0, len(rows), chunk_size):
+        chunk = rows[i:i + chunk_size]
+        keys = list({tuple(row[position] for position in key_positions) for row in chunk})
+        try:
+            existing = _count_existing_keys(conn, table, conflict_columns, keys)
+            if compact_view:
+                compact.ensure_dimensions(conn, columns, chunk)
+            # total_changes also counts the rows written by the compact layout's triggers
+            changes_before = conn.total_changes
+            cursor.executemany(query, chunk)
+            changes = conn.total_changes - changes_before
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        
+        inserted = len(keys) - existing
+        updated = max(changes - inserted, 0)
+        counts['inserted'] += inserted
+        counts['updated'] += updated
+        counts['unchanged'] += len(chunk) - inserted - updated
     
-    conn.commit()
-    conn.close()
+    return counts
+
+def insert_many(table, columns, values, conflict_columns=None, update_columns=None, touch_column='timestamp',
+                chunk_size=BULK_INSERT_CHUNK_SIZE):
+    """
+    Insert or update multiple rows of a table (see upsert_many).
     
-    return rows_inserted
+    Args:
+        table (str): Table name
+        columns (list): Column names
+        values (list): List of value tuples to insert
+        conflict_columns (list, optional): Upsert key (defaults to the table's
+            UNIQUE constraint)
+        update_columns (list, optional): Columns updated on conflict
+        touch_column (str, optional): Column set to CURRENT_TIMESTAMP on changed
+            rows (None for tables without a timestamp column)
+        chunk_size (int): Rows per transaction
+        
+    Returns:
+        dict: Number of rows inserted, updated and unchanged
+    """
+    conn = get_connection()
+    try:
+        return upsert_many(conn, table, columns, values, conflict_columns, update_columns, touch_column,
+                           chunk_size)
+    finally:
+        conn.close()
 
 def insert_or_update_company_profile(ticker_data):
     """
@@ -182,36 +310,30 @@ def insert_or_update_company_profile(ticker_data):
     if not ticker_data:
         return 0
     
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    records_inserted = 0
-    
-    for ticker, info in ticker_data.items():
-        try:
-            cursor.execute('''
-            INSERT OR REPLACE INTO company_profiles 
-            (ticker, sector, subsector, country, founded, years_public, type, description, source)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                ticker,
-                info.get('sector', ''),
-                info.get('subsector', ''),
-                info.get('pais', ''),
-                info.get('fundacion', ''),
-                info.get('anos_en_bolsa', ''),
-                info.get('tipo', ''),
-                info.get('resena', ''),
-                'manual'
-            ))
-            records_inserted += 1
-        except Exception as e:
-            print(f"Error inserting company profile for {ticker}: {e}")
+    rows = [
+        (
+            ticker,
+            info.get('sector', ''),
+            info.get('subsector', ''),
+            info.get('pais', ''),
+            info.get('fundacion', ''),
+            info.get('anos_en_bolsa', ''),
+            info.get('tipo', ''),
+            info.get('resena', ''),
+            'manual'
+        )
+        for ticker, info in ticker_data.items()
+    ]
     
-    conn.commit()
-    conn.close()
+    counts = insert_many(
+        'company_profiles',
+        ['ticker', 'sector', 'subsector', 'country', 'founded', 'years_public', 'type', 'description', 'source'],
+        rows,
+        conflict_columns=['ticker', 'source']
+    )
     
-    return records_inserted
+    # Unchanged profiles are already stored and count as up to date
+    return counts['inserted'] + counts['updated'] + counts['unchanged']
 
 def cleanup_database():
     """
@@ -0,0 +1,328 @@
+"""
+Versioned schema migrations.
+
+The number of the last applied migration is stored in PRAGMA user_version,
+so every migration runs exactly once per database and opening an up-to-date
+database costs a single pragma read. Migrations must be idempotent: a
+database created before versioning starts at version 0 and runs all of them
+on top of the tables it already has.
+
+To change the schema, append a new numbered migration to MIGRATIONS; never
+edit or renumber one that has been released. READ_INDEXES are the exception:
+create_database runs ensure_read_indexes after the migrations on every
+start, so bumping an index version needs no new migration.
+"""
+import re
+from database.schema import (
+    STOCK_DAILY_SCHEMA,
+    FINHUB_QUOTES_SCHEMA,
+    COMPANY_PROFILES_SCHEMA,
+    NEWS_ARTICLES_SCHEMA,
+    TECHNICAL_INDICATORS_SCHEMA,
+    FUNDAMENTAL_DATA_SCHEMA,
+    PORTFOLIO_SCHEMA,
+    WATCHLIST_SCHEMA,
+    BACKFILL_PROGRESS_SCHEMA,
+    REFRESH_LOG_SCHEMA,
+    NEWS_CONTENT_HASH_INDEX,
+    READ_INDEXES
+)
+from utils.news_dedup import news_content_hash
+
+def create_base_tables(conn):
+    """
+    Create every application table that does not exist yet.
+    
+    Args:
+        conn (sqlite3.Connection): Conexión a la base de datos
+    """
+    cursor = conn.cursor()
+    
+    # Create tables for each data type
+    cursor.execute(STOCK_DAILY_SCHEMA)
+    cursor.execute(FINHUB_QUOTES_SCHEMA)
+    cursor.execute(COMPANY_PROFILES_SCHEMA)
+    cursor.execute(NEWS_ARTICLES_SCHEMA)
+    cursor.execute(TECHNICAL_INDICATORS_SCHEMA)
+    
+    # Create additional tables for extended functionality
+    cursor.execute(FUNDAMENTAL_DATA_SCHEMA)
+    cursor.execute(PORTFOLIO_SCHEMA)
+    cursor.execute(WATCHLIST_SCHEMA)
+    cursor.execute(BACKFILL_PROGRESS_SCHEMA)
+    
+    conn.commit()
+
+def migrate_data(conn):
+    """
+    Migra datos de las tablas antiguas a las nuevas si existen.
+    
+    Args:
+        conn (sqlite3.Connection): Conexión a la base de datos
+        
+    Returns:
+        dict: Resultados de la migración
+    """
+    cursor = conn.cursor()
+    results = {}
+    
+    # Migrar datos de alphavantage_daily a stock_daily_data
+    try:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='alphavantage_daily'")
+        if cursor.fetchone():
+            print("Migrando datos de alphavantage_daily a stock_daily_data...")
+            cursor.execute("""
+            INSERT OR IGNORE INTO stock_daily_data 
+            (ticker, date, open, high, low, close, volume, source)
+            SELECT ticker, date, open, high, low, close, volume, 'alphavantage'
+            FROM alphavantage_daily
+            """)
+            results['alphavantage_daily'] = cursor.rowcount
+            print(f"Se migraron {cursor.rowcount} registros de alphavantage_daily.")
+    except Exception as e:
+        print(f"Error migrando alphavantage_daily: {e}")
+        results['alphavantage_daily'] = f"Error: {e}"
+    
+    # Migrar datos de polygon_data a stock_daily_data
+    try:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='polygon_data'")
+        if cursor.fetchone():
+            print("Migrando datos de polygon_data a stock_daily_data...")
+            cursor.execute("""
+            INSERT OR IGNORE INTO stock_daily_data 
+            (ticker, date, open, high, low, close, volume, source)
+            SELECT ticker, date, open, high, low, close, volume, 'polygon'
+            FROM polygon_data
+            """)
+            results['polygon_data'] = cursor.rowcount
+            print(f"Se migraron {cursor.rowcount} registros de polygon_data.")
+    except Exception as e:
+        print(f"Error migrando polygon_data: {e}")
+        results['polygon_data'] = f"Error: {e}"
+    
+    # Migrar datos de finhub_quotes a market_quotes
+    try:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='finhub_quotes'")
+        if cursor.fetchone():
+            print("Migrando datos de finhub_quotes a market_quotes...")
+            cursor.execute("""
+            INSERT OR IGNORE INTO market_quotes 
+            (ticker, current_price, change, percent_change, high, low, open, previous_close, source, timestamp)
+            SELECT ticker, current_price, change, percent_change, high, low, open, previous_close, 'finhub', timestamp
+            FROM finhub_quotes
+            """)
+            results['finhub_quotes'] = cursor.rowcount
+            print(f"Se migraron {cursor.rowcount} registros de finhub_quotes.")
+    except Exception as e:
+        print(f"Error migrando finhub_quotes: {e}")
+        results['finhub_quotes'] = f"Error: {e}"
+    
+    # Migrar datos de fmp_profiles a company_profiles
+    try:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='fmp_profiles'")
+        if cursor.fetchone():
+            print("Migrando datos de fmp_profiles a company_profiles...")
+            cursor.execute("""
+            INSERT OR IGNORE INTO company_profiles 
+            (ticker, company_name, industry, sector, market_cap, employees, description, ceo, website, exchange, ipo_date, source)
+            SELECT ticker, company_name, industry, sector, market_cap, employees, description, ceo, website, exchange, ipo_date, 'fmp'
+            FROM fmp_profiles
+            """)
+            results['fmp_profiles'] = cursor.rowcount
+            print(f"Se migraron {cursor.rowcount} registros de fmp_profiles.")
+    except Exception as e:
+        print(f"Error migrando fmp_profiles: {e}")
+        results['fmp_profiles'] = f"Error: {e}"
+    
+    # Migrar datos de ticker_info a company_profiles
+    try:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='ticker_info'")
+        if cursor.fetchone():
+            print("Migrando datos de ticker_info a company_profiles...")
+            cursor.execute("""
+            INSERT OR IGNORE INTO company_profiles 
+            (ticker, sector, subsector, country, founded, years_public, type, description, source)
+            SELECT symbol, sector, subsector, pais, fundacion, anos_en_bolsa, tipo, resena, 'manual'
+            FROM ticker_info
+            """)
+            results['ticker_info'] = cursor.rowcount
+            print(f"Se migraron {cursor.rowcount} registros de ticker_info.")
+    except Exception as e:
+        print(f"Error migrando ticker_info: {e}")
+        results['ticker_info'] = f"Error: {e}"
+    
+    conn.commit()
+    return results
+
+def ensure_news_content_hash(conn):
+    """
+    Add the content_hash column and index to news_articles if they are missing
+    and compute the hash of the articles stored without one.
+    
+    Args:
+        conn (sqlite3.Connection): Conexión a la base de datos
+        
+    Returns:
+        int: Number of articles whose hash was computed
+    """
+    cursor = conn.cursor()
+    
+    cursor.execute("PRAGMA table_info(news_articles)")
+    if 'content_hash' not in [row[1] for row in cursor.fetchall()]:
+        print("Añadiendo columna content_hash a news_articles...")
+        cursor.execute("ALTER TABLE news_articles ADD COLUMN content_hash TEXT")
+    
+    cursor.execute(NEWS_CONTENT_HASH_INDEX)
+    
+    cursor.execute("SELECT id, title, content FROM news_articles WHERE content_hash IS NULL")
+    updates = [
+        (news_content_hash(title, content), article_id)
+        for article_id, title, content in cursor.fetchall()
+    ]
+    updates = [update for update in updates if update[0]]
+    if updates:
+        cursor.executemany("UPDATE news_articles SET content_hash = ? WHERE id = ?", updates)
+    
+    conn.commit()
+    return len(updates)
+
+def ensure_read_indexes(conn):
+    """
+    Create the current READ_INDEXES, drop older versions of them and refresh
+    the planner statistics when an index was added.
+    
+    Idempotent and cheap when nothing changed (one sqlite_master read), so it
+    runs on every start. Indexes on tables that are views in this database
+    (the compact layout, see database.compact) are skipped.
+    
+    Args:
+        conn (sqlite3.Connection): Conexión a la base de datos
+        
+    Returns:
+        list: Names of the indexes created
+    """
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'index')")
+    objects = cursor.fetchall()
+    tables = {name for kind, name in objects if kind == 'table'}
+    existing = {name for kind, name in objects if kind == 'index' and re.fullmatch(r'idx_.*_v\d+', name)}
+    
+    for name in existing - set(READ_INDEXES):
+        print(f"Eliminando índice obsoleto {name}...")
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+    
+    created = [
+        name for name in READ_INDEXES
+        if name not in existing and re.search(r'\bON (\w+)\(', READ_INDEXES[name]).group(1) in tables
+    ]
+    for name in created:
+        print(f"Creando índice {name}...")
+        cursor.execute(READ_INDEXES[name])
+    
+    # The query planner needs statistics to prefer the new indexes on large tables
+    if created:
+        cursor.execute("ANALYZE")
+    
+    conn.commit()
+    return created
+
+def create_refresh_log(conn):
+    """
+    Create the refresh_log table used by the refresh planner.
+    
+    Args:
+        conn (sqlite3.Connection): Conexión a la base de datos
+    """
+    conn.execute(REFRESH_LOG_SCHEMA)
+    conn.commit()
+
+def _unique_keys(conn, table, schema='main'):
+    keys = []
+    for _, name, unique, *_ in conn.execute(f"PRAGMA {schema}.index_list({table})").fetchall():
+        if unique:
+            info = conn.execute(f"PRAGMA {schema}.index_info({name})").fetchall()
+            keys.append([row[2] for row in sorted(info)])
+    return keys
+
+def rekey_news_articles(conn, schema='main'):
+    """
+    Rebuild news_articles with a UNIQUE(ticker, url) key instead of UNIQUE(url),
+    so an article that mentions several tickers is stored for each of them.
+    
+    Args:
+        conn (sqlite3.Connection): Conexión a la base de datos
+        schema (str): Database holding the table (an attached archive for retention)
+    """
+    if ['url'] not in _unique_keys(conn, 'news_articles', schema):
+        return
+    
+    print(f"Reconstruyendo {schema}.news_articles con una fila por ticker y URL...")
+    cursor = conn.cursor()
+    old_columns = {row[1] for row in cursor.execute(f"PRAGMA {schema}.table_info(news_articles)").fetchall()}
+    cursor.execute(f"ALTER TABLE {schema}.news_articles RENAME TO news_articles_old")
+    cursor.execute(NEWS_ARTICLES_SCHEMA.replace("EXISTS news_articles (", f"EXISTS {schema}.news_articles (", 1))
+    new_columns = [row[1] for row in cursor.execute(f"PRAGMA {schema}.table_info(news_articles)").fetchall()]
+    # Ids are copied so archived rows keep matching their hot copies
+    columns = ', '.join(column for column in new_columns if column in old_columns)
+    cursor.execute(f"INSERT INTO {schema}.news_articles ({columns}) "
+                   f"SELECT {columns} FROM {schema}.news_articles_old ORDER BY id")
+    # The old indexes go with the old table and are created again below
+    cursor.execute(f"DROP TABLE {schema}.news_articles_old")
+    for index_sql in [NEWS_CONTENT_HASH_INDEX] + list(READ_INDEXES.values()):
+        if "ON news_articles(" in index_sql:
+            cursor.execute(index_sql.replace("CREATE INDEX IF NOT EXISTS ", f"CREATE INDEX IF NOT EXISTS {schema}.", 1))
+    conn.commit()
+
+# (version, description, function taking the connection)
+MIGRATIONS = [
+    (1, "Tablas base", create_base_tables),
+    (2, "Migración de las tablas antiguas", migrate_data),
+    (3, "Hash de contenido de las noticias", ensure_news_content_hash),
+    (4, "Índices de lectura", ensure_read_indexes),
+    (5, "Registro de actualizaciones", create_refresh_log),
+    (6, "Noticias únicas por ticker y URL", rekey_news_articles),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn):
+    """
+    Get the number of the last migration applied to a database.
+    
+    Args:
+        conn (sqlite3.Connection): Conexión a la base de datos
+        
+    Returns:
+        int: Schema version (0 for a new or unversioned database)
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def apply_migrations(conn, verbose=False):
+    """
+    Apply the migrations newer than the database's schema version, in order.
+    
+    Args:
+        conn (sqlite3.Connection): Conexión a la base de datos
+        verbose (bool): Print each migration as it is applied
+        
+    Returns:
+        list: Versions applied (empty when the database was up to date)
+    """
+    version = get_schema_version(conn)
+    if version >= SCHEMA_VERSION:
+        return []
+    
+    applied = []
+    for number, description, migrate in MIGRATIONS:
+        if number <= version:
+            continue
+        if verbose:
+            print(f"Aplicando migración {number}: {description}...")
+        migrate(conn)
+        # PRAGMA statements cannot take parameters; number is an int from MIGRATIONS
+        conn.execute(f"PRAGMA user_version = {int(number)}")
+        conn.commit()
+        applied.append(number)
+    
+    return applied
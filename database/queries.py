@@ -0,0 +1,118 @@
+"""
+SQL of the hot read queries.
+
+The read helpers (utils/data_utils.py, web_app.py) and the plan checks in
+database/query_plans.py build their statements from here, so the query whose
+plan is checked is the one that runs.
+
+The price queries take the date column returned by compact.date_key: 'date'
+with the row layout and 'day' with the compact one, whose views can only
+seek on the stored day.
+"""
+
+LATEST_COMPANY_PROFILE_QUERY = """
+SELECT * FROM company_profiles
+WHERE ticker = ?
+ORDER BY timestamp DESC
+LIMIT 1
+"""
+
+LATEST_MARKET_QUOTE_QUERY = """
+SELECT * FROM market_quotes
+WHERE ticker = ?
+ORDER BY timestamp DESC
+LIMIT 1
+"""
+
+# Parameters: ticker, limit
+LATEST_NEWS_QUERY = """
+SELECT title, source, url, published_at, content
+FROM news_articles
+WHERE ticker = ?
+ORDER BY published_at DESC
+LIMIT ?
+"""
+
+# Parameters: ticker, periods
+FUNDAMENTAL_DATA_QUERY = """
+SELECT *
+FROM fundamental_data
+WHERE ticker = ?
+ORDER BY period_end_date DESC
+LIMIT ?
+"""
+
+def stock_data_query(date_column='date', all_sources=False):
+    """
+    Build the query returning the daily prices of a ticker between two dates.
+
+    Args:
+        date_column (str): Column to filter and sort on (see compact.date_key)
+        all_sources (bool): Return the rows of every source
+
+    Returns:
+        str: SQL query taking ticker, start and end (and source unless all_sources)
+    """
+    query = f"""
+    SELECT date, open, high, low, close, volume
+    FROM stock_daily_data
+    WHERE ticker = ?
+    AND {date_column} BETWEEN ? AND ?
+    """
+    if not all_sources:
+        query += " AND source = ?"
+    return query + f" ORDER BY {date_column}"
+
+def latest_close_query(date_column='date'):
+    """
+    Build the query returning the latest close of a ticker and source.
+
+    Args:
+        date_column (str): Column to sort on (see compact.date_key)
+
+    Returns:
+        str: SQL query taking the :ticker and :source named parameters
+    """
+    return f"""
+    SELECT close FROM stock_daily_data
+    WHERE ticker = :ticker AND source = :source
+    ORDER BY {date_column} DESC LIMIT 1
+    """
+
+def first_close_query(date_column='date'):
+    """
+    Build the query returning the first close of a ticker and source on or after a date.
+
+    Args:
+        date_column (str): Column to filter and sort on (see compact.date_key)
+
+    Returns:
+        str: SQL query taking the :ticker, :source and :start named parameters
+    """
+    return f"""
+    SELECT close FROM stock_daily_data
+    WHERE ticker = :ticker AND source = :source
+    AND {date_column} >= :start
+    ORDER BY {date_column} ASC LIMIT 1
+    """
+
+def period_return_query(date_column='date'):
+    """
+    Build the query returning the return between the first close on or after
+    a date and the latest close (NULL without prices since that date).
+
+    Args:
+        date_column (str): Column to filter and sort on (see compact.date_key)
+
+    Returns:
+        str: SQL query taking the :ticker, :source and :start named parameters
+    """
+    first_close = first_close_query(date_column)
+    return f"""
+    SELECT
+        CASE
+            WHEN ({first_close}) IS NOT NULL
+            THEN ({latest_close_query(date_column)}) / ({first_close}) - 1
+            ELSE NULL
+        END AS period_return
+    """
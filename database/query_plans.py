@@ -0,0 +1,211 @@
+"""
+EXPLAIN QUERY PLAN checks for the hot read queries.
+
+Every query in HOT_QUERIES must be answered through its expected index and
+without a temporary b-tree for sorting, so read latency does not grow with
+the size of the tables.
+
+With the compact layout (database/compact.py) the price queries read through
+views and filter and sort on the day column (see compact.date_key): they must
+seek on the clustered (ticker_id, source_id, day) primary key, under the same
+no-sort rule.
+
+Uso:
+    python -m database.query_plans [--db financial_data.db | --compact]
+"""
+import argparse
+import sqlite3
+import sys
+from database.schema import (
+    STOCK_DAILY_SCHEMA,
+    FINHUB_QUOTES_SCHEMA,
+    COMPANY_PROFILES_SCHEMA,
+    NEWS_ARTICLES_SCHEMA,
+    FUNDAMENTAL_DATA_SCHEMA,
+    TECHNICAL_INDICATORS_SCHEMA,
+    READ_INDEXES
+)
+from database.compact import is_compact, enable_compact_layout
+from database.queries import (
+    FUNDAMENTAL_DATA_QUERY,
+    LATEST_COMPANY_PROFILE_QUERY,
+    LATEST_MARKET_QUOTE_QUERY,
+    LATEST_NEWS_QUERY,
+    first_close_query,
+    latest_close_query,
+    stock_data_query
+)
+
+# (name, query, parameters, index expected in the plan); the queries are the
+# ones the read helpers run (database/queries.py)
+HOT_QUERIES = [
+    (
+        'get_stock_data',
+        stock_data_query(),
+        ('AAPL', '2024-01-01', '2024-12-31', 'yfinance'),
+        'idx_stock_daily_ticker_source_date_v1'
+    ),
+    (
+        'calculate_returns (latest close)',
+        latest_close_query(),
+        {'ticker': 'AAPL', 'source': 'yfinance'},
+        'idx_stock_daily_ticker_source_date_v1'
+    ),
+    (
+        'calculate_returns (first close)',
+        first_close_query(),
+        {'ticker': 'AAPL', 'source': 'yfinance', 'start': '2024-01-01'},
+        'idx_stock_daily_ticker_source_date_v1'
+    ),
+    (
+        'get_market_quotes',
+        LATEST_MARKET_QUOTE_QUERY,
+        ('AAPL',),
+        'idx_market_quotes_ticker_timestamp_v1'
+    ),
+    (
+        'get_company_profile',
+        LATEST_COMPANY_PROFILE_QUERY,
+        ('AAPL',),
+        'idx_company_profiles_ticker_timestamp_v1'
+    ),
+    (
+        'get_latest_news',
+        LATEST_NEWS_QUERY,
+        ('AAPL', 5),
+        'idx_news_articles_ticker_published_v1'
+    ),
+    (
+        'get_fundamental_data',
+        FUNDAMENTAL_DATA_QUERY,
+        ('AAPL', 4),
+        'idx_fundamental_ticker_period_end_v1'
+    ),
+]
+
+# Compact layout form of the price queries: (query, parameters, plan detail
+# expected instead of the index; d is the alias of the compact table in the view)
+COMPACT_QUERIES = {
+    'get_stock_data': (
+        stock_data_query('day'),
+        ('AAPL', 19723, 20088, 'yfinance'),
+        'SEARCH d USING PRIMARY KEY (ticker_id=? AND source_id=? AND day>? AND day<?)'
+    ),
+    'calculate_returns (latest close)': (
+        latest_close_query('day'),
+        {'ticker': 'AAPL', 'source': 'yfinance'},
+        'SEARCH d USING PRIMARY KEY (ticker_id=? AND source_id=?)'
+    ),
+    'calculate_returns (first close)': (
+        first_close_query('day'),
+        {'ticker': 'AAPL', 'source': 'yfinance', 'start': 19723},
+        'SEARCH d USING PRIMARY KEY (ticker_id=? AND source_id=? AND day>?)'
+    ),
+}
+
+def create_reference_database(compact=False):
+    """
+    Create an in-memory database with the read tables and READ_INDEXES.
+
+    Args:
+        compact (bool): Convert the price and indicator tables to the compact layout
+
+    Returns:
+        sqlite3.Connection: Database connection
+    """
+    conn = sqlite3.connect(':memory:')
+    cursor = conn.cursor()
+    for schema in (STOCK_DAILY_SCHEMA, FINHUB_QUOTES_SCHEMA, COMPANY_PROFILES_SCHEMA,
+                   NEWS_ARTICLES_SCHEMA, FUNDAMENTAL_DATA_SCHEMA):
+        cursor.execute(schema)
+    for index_sql in READ_INDEXES.values():
+        cursor.execute(index_sql)
+    if compact:
+        cursor.execute(TECHNICAL_INDICATORS_SCHEMA)
+        enable_compact_layout(conn)
+    return conn
+
+def explain(conn, query, params=()):
+    """
+    Get the EXPLAIN QUERY PLAN details of a query.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        query (str): SQL query
+        params (tuple or dict): Query parameters
+
+    Returns:
+        list: Plan detail strings
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"EXPLAIN QUERY PLAN {query}", params)
+    return [row[-1] for row in cursor.fetchall()]
+
+def check_query_plans(conn, queries=HOT_QUERIES):
+    """
+    Check that each hot query uses its index and needs no temporary sort.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        queries (list): (name, query, params, expected index) tuples
+
+    Returns:
+        list: Dicts with name, expected_index, plan, ok and problem
+    """
+    compact = is_compact(conn)
+    results = []
+    for name, query, params, expected_index in queries:
+        if compact and name in COMPACT_QUERIES:
+            query, params, expected_index = COMPACT_QUERIES[name]
+        plan = explain(conn, query, params)
+        problem = None
+        if not any(expected_index in detail for detail in plan):
+            problem = f"does not use {expected_index}"
+        elif any('USE TEMP B-TREE' in detail for detail in plan):
+            problem = "sorts with a temporary b-tree"
+        results.append({'name': name, 'expected_index': expected_index, 'plan': plan,
+                        'ok': problem is None, 'problem': problem})
+    return results
+
+def format_results(results):
+    """
+    Format the results of check_query_plans as report lines.
+
+    Args:
+        results (list): Results returned by check_query_plans
+
+    Returns:
+        list: The plan of every query, followed by its problem if any
+    """
+    lines = []
+    for result in results:
+        status = "OK" if result['ok'] else "FALLO"
+        lines.append(f"{status:5} {result['name']}: {' | '.join(result['plan'])}")
+        if result['problem']:
+            lines.append(f"      {result['problem']}")
+    return lines
+
+def main():
+    """
+    Run the checks and exit with status 1 if any query plan regressed.
+    """
+    parser = argparse.ArgumentParser(description="Comprobación de los planes de las consultas de lectura")
+    parser.add_argument("--db", default=None,
+                        help="Base de datos a comprobar (por defecto una base de referencia en memoria)")
+    parser.add_argument("--compact", action="store_true",
+                        help="Usar el formato compacto en la base de referencia")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db) if args.db else create_reference_database(args.compact)
+    try:
+        results = check_query_plans(conn)
+    finally:
+        conn.close()
+
+    for line in format_results(results):
+        print(line)
+
+    sys.exit(0 if all(result['ok'] for result in results) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Retention and archival of the append-only tables.
+
+market_quotes gains a row per ticker on every poll and news_articles grows
+with every fetch. Following RETENTION_POLICIES, old quotes are downsampled to
+the last snapshot of each ticker, source and day, and rows past the archive
+age move to one SQLite file per table and year in RETENTION_ARCHIVE_DIR, so
+the hot database stays small enough to be served from the page cache.
+
+Archives are ordinary databases with the same schema: open_archives attaches
+them and creates a temporary <table>_all view over the hot and archived rows.
+"""
+import glob
+import os
+from datetime import datetime, timedelta, timezone
+from config.settings import RETENTION_POLICIES, RETENTION_ARCHIVE_DIR, DB_CACHE_SIZE_KB
+from database.migrations import rekey_news_articles
+from database.schema import FINHUB_QUOTES_SCHEMA, NEWS_ARTICLES_SCHEMA, READ_INDEXES
+
+ARCHIVE_SCHEMAS = {
+    'market_quotes': FINHUB_QUOTES_SCHEMA,
+    'news_articles': NEWS_ARTICLES_SCHEMA,
+}
+
+# UNIQUE key of each archived table
+ARCHIVE_KEYS = {
+    'market_quotes': ['ticker', 'timestamp', 'source'],
+    'news_articles': ['ticker', 'url'],
+}
+
+def _cutoff(days):
+    """
+    Get the first date (YYYY-MM-DD, UTC) that is not older than a number of days.
+
+    Both "YYYY-MM-DD HH:MM:SS" and ISO 8601 timestamps start with the date,
+    so rows are compared with it as plain strings, at day granularity.
+    """
+    return (datetime.now(timezone.utc).date() - timedelta(days=int(days))).isoformat()
+
+def _time_range(table, time_column, schema='main'):
+    """
+    Condition selecting the rows of a table whose time is in [?, ?).
+
+    A range on the raw column can seek on the (ticker, time) read index, but
+    only for one ticker at a time: the tickers are listed with a loose index
+    scan (one seek per ticker) instead of reading the whole table.
+    """
+    source = f"{schema}.{table}"
+    return (f"ticker IN (WITH RECURSIVE tickers(ticker) AS ("
+            f"SELECT MIN(ticker) FROM {source} UNION ALL "
+            f"SELECT (SELECT MIN(ticker) FROM {source} WHERE ticker > tickers.ticker) "
+            f"FROM tickers WHERE ticker IS NOT NULL) SELECT ticker FROM tickers) "
+            f"AND {time_column} >= ? AND {time_column} < ?")
+
+# Lower bound of the ranges; excludes NULL and empty times. Bounds are full
+# dates: a bare "2024" would be compared as a number with the NUMERIC
+# affinity of TIMESTAMP columns
+_MIN_TIME = '0000-01-01'
+
+def archive_path(table, year, archive_dir=RETENTION_ARCHIVE_DIR):
+    """
+    Get the archive file of a table for one year.
+
+    Args:
+        table (str): Table name
+        year (str): Four-digit year
+        archive_dir (str): Archive directory
+
+    Returns:
+        str: Path of the archive database
+    """
+    return os.path.join(archive_dir, f"{table}_{year}.db")
+
+def list_archives(table, archive_dir=RETENTION_ARCHIVE_DIR):
+    """
+    Get the archive files of a table, oldest year first.
+
+    Args:
+        table (str): Table name
+        archive_dir (str): Archive directory
+
+    Returns:
+        list: (year, path) tuples
+    """
+    paths = sorted(glob.glob(os.path.join(archive_dir, f"{table}_[0-9][0-9][0-9][0-9].db")))
+    return [(os.path.basename(path)[len(table) + 1:-3], path) for path in paths]
+
+def _columns(conn, table, schema='main'):
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})").fetchall()]
+
+def _create_archive_table(conn, table, alias):
+    """
+    Create the table and its read indexes in an attached archive database.
+    """
+    conn.execute(ARCHIVE_SCHEMAS[table].replace(f"EXISTS {table} (", f"EXISTS {alias}.{table} (", 1))
+    # Columns added to the hot table by later migrations
+    archived = set(_columns(conn, table, alias))
+    for column in _columns(conn, table):
+        if column not in archived:
+            conn.execute(f"ALTER TABLE {alias}.{table} ADD COLUMN {column}")
+    for index_sql in READ_INDEXES.values():
+        if f"ON {table}(" in index_sql:
+            conn.execute(index_sql.replace("CREATE INDEX IF NOT EXISTS ", f"CREATE INDEX IF NOT EXISTS {alias}.", 1))
+    if table == 'news_articles':
+        # Archives created while news were unique per URL get the per-ticker key too
+        rekey_news_articles(conn, alias)
+
+def downsample_daily(conn, table, time_column, older_than_days):
+    """
+    Keep only the last row of each ticker, source and day among the old rows.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        table (str): Table name (with ticker and source columns)
+        time_column (str): Timestamp column ("YYYY-MM-DD HH:MM:SS")
+        older_than_days (int): Only rows older than this are downsampled
+
+    Returns:
+        int: Number of rows deleted
+    """
+    cursor = conn.cursor()
+    # A row goes if a later row of the same ticker and source exists on the
+    # same day; the range keeps the lookup on the (ticker, timestamp) index
+    cursor.execute(f'''
+    DELETE FROM {table}
+    WHERE {_time_range(table, time_column)}
+    AND EXISTS (
+        SELECT 1 FROM {table} AS later
+        WHERE later.ticker = {table}.ticker
+        AND later.source = {table}.source
+        AND later.{time_column} > {table}.{time_column}
+        AND later.{time_column} < date({table}.{time_column}, '+1 day')
+    )
+    ''', (_MIN_TIME, _cutoff(older_than_days)))
+    deleted = cursor.rowcount
+    conn.commit()
+    return deleted
+
+def archive_rows(conn, table, time_column, older_than_days, archive_dir=RETENTION_ARCHIVE_DIR):
+    """
+    Move the rows older than a number of days to the yearly archive databases.
+
+    Rows are first copied and committed to the archive, then deleted from the
+    hot table only if they are present in the archive, so an interrupted run
+    never loses rows and can simply be repeated. A row whose key was archived
+    before (e.g. a news article fetched again) is not copied twice, but it
+    still leaves the hot table.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        table (str): Table name (one of ARCHIVE_SCHEMAS)
+        time_column (str): Column holding the age of each row
+        older_than_days (int): Rows older than this are archived
+        archive_dir (str): Archive directory
+
+    Returns:
+        dict: Mapping of year to number of rows moved
+    """
+    condition = _time_range(table, time_column)
+    cutoff = _cutoff(older_than_days)
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT MIN({time_column}) FROM {table} WHERE {condition}", (_MIN_TIME, cutoff))
+    oldest = cursor.fetchone()[0]
+    if oldest is None:
+        return {}
+
+    os.makedirs(archive_dir, exist_ok=True)
+    columns = ', '.join(_columns(conn, table))
+    key = ', '.join(ARCHIVE_KEYS[table])
+    moved = {}
+    # ATTACH is not allowed inside a transaction
+    conn.commit()
+
+    for year in (str(number) for number in range(int(oldest[:4]), int(cutoff[:4]) + 1)):
+        # Rows of the year that are past the cutoff
+        bounds = (f"{year}-01-01", min(f"{int(year) + 1}-01-01", cutoff))
+        cursor.execute(f"SELECT 1 FROM {table} WHERE {condition} LIMIT 1", bounds)
+        if cursor.fetchone() is None:
+            continue
+
+        cursor.execute("ATTACH DATABASE ? AS archive", (archive_path(table, year, archive_dir),))
+        try:
+            _create_archive_table(conn, table, 'archive')
+            cursor.execute(f'''
+            INSERT OR IGNORE INTO archive.{table} ({columns})
+            SELECT {columns} FROM main.{table}
+            WHERE {condition}
+            ''', bounds)
+            conn.commit()
+
+            # Rows ignored above because their key is already archived go too
+            cursor.execute(f'''
+            DELETE FROM main.{table}
+            WHERE {condition}
+            AND (id IN (SELECT id FROM archive.{table})
+                 OR ({key}) IN (SELECT {key} FROM archive.{table}))
+            ''', bounds)
+            moved[year] = cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.execute("DETACH DATABASE archive")
+
+    return moved
+
+def apply_retention(conn, policies=None, archive_dir=RETENTION_ARCHIVE_DIR):
+    """
+    Apply the retention policy of every table.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        policies (dict, optional): Retention policies (defaults to RETENTION_POLICIES)
+        archive_dir (str): Archive directory
+
+    Returns:
+        dict: Per table, rows deleted by downsampling and rows archived per year
+    """
+    report = {}
+    for table, policy in (policies or RETENTION_POLICIES).items():
+        result = {'downsampled': 0, 'archived': {}}
+        if policy.get('downsample_after_days') is not None:
+            result['downsampled'] = downsample_daily(conn, table, policy['time_column'],
+                                                     policy['downsample_after_days'])
+        if policy.get('archive_after_days') is not None:
+            result['archived'] = archive_rows(conn, table, policy['time_column'],
+                                              policy['archive_after_days'], archive_dir)
+        report[table] = result
+    return report
+
+def open_archives(conn, table, archive_dir=RETENTION_ARCHIVE_DIR):
+    """
+    Attach the archives of a table and create a temporary view over all its rows.
+
+    The view is named <table>_all and combines the hot table with every
+    yearly archive (SQLite attaches at most 10 databases by default).
+    Call close_archives when done.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        table (str): Table name
+        archive_dir (str): Archive directory
+
+    Returns:
+        str: Name of the view
+    """
+    columns = ', '.join(_columns(conn, table))
+    selects = [f"SELECT {columns} FROM main.{table}"]
+    conn.commit()
+    for year, path in list_archives(table, archive_dir):
+        alias = f"archive_{table}_{year}"
+        conn.execute("ATTACH DATABASE ? AS " + alias, (path,))
+        archived = set(_columns(conn, table, alias))
+        # Columns missing from an older archive read as NULL
+        selected = ', '.join(column if column in archived else f"NULL AS {column}" for column in _columns(conn, table))
+        selects.append(f"SELECT {selected} FROM {alias}.{table}")
+
+    view = f"{table}_all"
+    conn.execute(f"DROP VIEW IF EXISTS temp.{view}")
+    conn.execute(f"CREATE TEMP VIEW {view} AS {' UNION ALL '.join(selects)}")
+    return view
+
+def close_archives(conn, table):
+    """
+    Drop the view created by open_archives and detach the table's archives.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        table (str): Table name
+    """
+    conn.execute(f"DROP VIEW IF EXISTS temp.{table}_all")
+    prefix = f"archive_{table}_"
+    for _, name, _ in conn.execute("PRAGMA database_list").fetchall():
+        if name.startswith(prefix):
+            conn.execute(f"DETACH DATABASE {name}")
+
+def get_database_size(conn):
+    """
+    Get the size of the main database and how it compares with the page cache.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+
+    Returns:
+        dict: size_bytes, free_bytes (pages left by deleted rows) and
+            fits_in_cache (whether the used pages fit in DB_CACHE_SIZE_KB)
+    """
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    used_bytes = (page_count - free_pages) * page_size
+    return {
+        'size_bytes': page_count * page_size,
+        'free_bytes': free_pages * page_size,
+        'fits_in_cache': used_bytes <= DB_CACHE_SIZE_KB * 1024,
+    }
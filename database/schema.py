@@ -63,21 +63,29 @@ CREATE TABLE IF NOT EXISTS company_profiles (
 )
 '''
 
-# News articles schema
+# News articles schema (una fila por ticker y URL: una noticia que menciona
+# varios tickers se guarda para cada uno)
 NEWS_ARTICLES_SCHEMA = '''
 CREATE TABLE IF NOT EXISTS news_articles (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     ticker TEXT NOT NULL,
     title TEXT,
     source TEXT,
-    url TEXT UNIQUE,
+    url TEXT,
     published_at TEXT,
     content TEXT,
     sentiment REAL,
-    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    content_hash TEXT,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(ticker, url)
 )
 '''
 
+# Índice para detectar copias sindicadas de la misma noticia
+NEWS_CONTENT_HASH_INDEX = '''
+CREATE INDEX IF NOT EXISTS idx_news_articles_content_hash ON news_articles(content_hash)
+'''
+
 # Technical indicators schema
 TECHNICAL_INDICATORS_SCHEMA = '''
 CREATE TABLE IF NOT EXISTS technical_indicators (
@@ -154,4 +162,117 @@ CREATE TABLE IF NOT EXISTS watchlist (
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(watchlist_name, ticker)
 )
-''' 
\ No newline at end of file
+''' 
+
+# Backfill progress schema (checkpoints de la carga histórica por ticker)
+BACKFILL_PROGRESS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS backfill_progress (
+    ticker TEXT NOT NULL,
+    source TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    next_date TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    error TEXT,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (ticker, source)
+)
+'''
+
+# Esquema compacto opcional (DB_COMPACT_LAYOUT, ver database/compact.py):
+# diccionarios de tickers y fuentes con ids enteros, fechas como días desde
+# 1970-01-01 y tablas WITHOUT ROWID agrupadas por (ticker_id, source_id, day)
+TICKERS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tickers (
+    id INTEGER PRIMARY KEY,
+    symbol TEXT NOT NULL UNIQUE
+)
+'''
+
+SOURCES_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+)
+'''
+
+STOCK_DAILY_COMPACT_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS stock_daily_compact (
+    ticker_id INTEGER NOT NULL,
+    source_id INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume INTEGER,
+    updated_at INTEGER NOT NULL,
+    PRIMARY KEY (ticker_id, source_id, day)
+) WITHOUT ROWID
+'''
+
+TECHNICAL_INDICATORS_COMPACT_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS technical_indicators_compact (
+    ticker_id INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    sma_20 REAL,
+    sma_50 REAL,
+    sma_200 REAL,
+    ema_12 REAL,
+    ema_26 REAL,
+    macd REAL,
+    macd_signal REAL,
+    macd_histogram REAL,
+    rsi_14 REAL,
+    bollinger_upper REAL,
+    bollinger_middle REAL,
+    bollinger_lower REAL,
+    atr_14 REAL,
+    updated_at INTEGER NOT NULL,
+    PRIMARY KEY (ticker_id, day)
+) WITHOUT ROWID
+'''
+
+# Registro de actualizaciones (última descarga de cada tabla y ticker, aunque
+# los datos recibidos no hayan cambiado)
+REFRESH_LOG_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS refresh_log (
+    table_name TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (table_name, ticker)
+)
+'''
+
+# Índices para las consultas de lectura más frecuentes. Cada nombre lleva la
+# versión del índice (_vN): al cambiar sus columnas se sube la versión, y
+# ensure_read_indexes, que create_database ejecuta en cada arranque después de
+# las migraciones, elimina la versión anterior y crea la nueva.
+READ_INDEXES = {
+    # get_stock_data / calculate_returns: ticker = ? AND source = ? AND date BETWEEN ...
+    # Incluye las columnas de precio para no tener que leer la tabla (covering index)
+    'idx_stock_daily_ticker_source_date_v1': '''
+    CREATE INDEX IF NOT EXISTS idx_stock_daily_ticker_source_date_v1
+    ON stock_daily_data(ticker, source, date, open, high, low, close, volume)
+    ''',
+    # get_market_quotes: última cotización de un ticker
+    'idx_market_quotes_ticker_timestamp_v1': '''
+    CREATE INDEX IF NOT EXISTS idx_market_quotes_ticker_timestamp_v1
+    ON market_quotes(ticker, timestamp)
+    ''',
+    # get_company_profile: perfil más reciente de un ticker
+    'idx_company_profiles_ticker_timestamp_v1': '''
+    CREATE INDEX IF NOT EXISTS idx_company_profiles_ticker_timestamp_v1
+    ON company_profiles(ticker, timestamp)
+    ''',
+    # get_latest_news: noticias más recientes de un ticker
+    'idx_news_articles_ticker_published_v1': '''
+    CREATE INDEX IF NOT EXISTS idx_news_articles_ticker_published_v1
+    ON news_articles(ticker, published_at)
+    ''',
+    # get_fundamental_data: últimos periodos de un ticker
+    'idx_fundamental_ticker_period_end_v1': '''
+    CREATE INDEX IF NOT EXISTS idx_fundamental_ticker_period_end_v1
+    ON fundamental_data(ticker, period_end_date)
+    ''',
+}
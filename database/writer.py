@@ -0,0 +1,167 @@
+"""
+Single-writer queue that decouples network fetching from SQLite commits.
+
+Fetchers running in any thread push normalized row batches onto a bounded
+queue. One dedicated thread drains the queue and writes the batches in size-
+or time-bounded transactions, so SQLite only ever sees one writer and readers
+are never blocked by a long-running transaction.
+"""
+import queue
+import threading
+import time
+from database.compact import adapt_statement
+from database.db_manager import get_connection
+from config.settings import WRITER_QUEUE_SIZE, WRITER_BATCH_ROWS, WRITER_FLUSH_INTERVAL
+
+class DatabaseWriter:
+    """
+    Background thread owning the only write connection to the database.
+
+    Usage:
+        with DatabaseWriter() as writer:
+            writer.submit(query, rows)
+    """
+
+    _STOP = object()
+
+    def __init__(self, max_queue_size=WRITER_QUEUE_SIZE, batch_rows=WRITER_BATCH_ROWS,
+                 flush_interval=WRITER_FLUSH_INTERVAL):
+        """
+        Args:
+            max_queue_size (int): Pending batches before submit() blocks
+            batch_rows (int): Rows written per transaction before committing
+            flush_interval (float): Maximum seconds a batch waits before being committed
+        """
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self.stats = {'batches': 0, 'rows_written': 0, 'transactions': 0, 'errors': 0}
+
+    def start(self):
+        """
+        Start the writer thread.
+
+        Returns:
+            DatabaseWriter: self
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, query, rows):
+        """
+        Queue rows to be written with a parameterized statement.
+
+        Blocks while the queue is full, which slows producers down to the
+        speed of the writer.
+
+        Args:
+            query (str): SQL statement with ? placeholders
+            rows (list): List of parameter tuples
+
+        Returns:
+            int: Number of rows queued
+        """
+        return self.submit_group([(query, rows)])
+
+    def submit_group(self, statements):
+        """
+        Queue several statements that must be committed in the same transaction.
+
+        Args:
+            statements (list): List of (query, rows) tuples, applied in order
+
+        Returns:
+            int: Number of rows queued
+        """
+        statements = [(query, list(rows)) for query, rows in statements if rows]
+        if not statements:
+            return 0
+        if self._thread is None:
+            self.start()
+        self._queue.put(statements)
+        return sum(len(rows) for _, rows in statements)
+
+    def flush(self):
+        """
+        Block until every batch submitted so far has been committed.
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Write the remaining batches and stop the writer thread.
+
+        Returns:
+            dict: Writer statistics (batches, rows_written, transactions, errors)
+        """
+        if self._thread is not None:
+            self._queue.put(self._STOP)
+            self._thread.join()
+            self._thread = None
+        return dict(self.stats)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _run(self):
+        conn = get_connection()
+        pending = []
+        pending_rows = 0
+        deadline = None
+        stopping = False
+
+        while not stopping:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is self._STOP:
+                stopping = True
+                self._queue.task_done()
+            elif item is not None:
+                pending.append(item)
+                pending_rows += sum(len(rows) for _, rows in item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            timed_out = deadline is not None and time.monotonic() >= deadline
+            if pending and (stopping or timed_out or pending_rows >= self.batch_rows):
+                self._write(conn, pending)
+                for _ in pending:
+                    self._queue.task_done()
+                pending = []
+                pending_rows = 0
+                deadline = None
+
+        conn.close()
+
+    def _write(self, conn, batches):
+        cursor = conn.cursor()
+        try:
+            for statements in batches:
+                for query, rows in statements:
+                    cursor.executemany(adapt_statement(conn, query), rows)
+            conn.commit()
+            with self._stats_lock:
+                self.stats['batches'] += len(batches)
+                self.stats['rows_written'] += sum(len(rows) for statements in batches for _, rows in statements)
+                self.stats['transactions'] += 1
+        except Exception as e:
+            conn.rollback()
+            print(f"Error writing {len(batches)} batches to the database: {e}")
+            # Retry batch by batch so one bad batch does not drop the others
+            if len(batches) > 1:
+                for statements in batches:
+                    self._write(conn, [statements])
+            else:
+                with self._stats_lock:
+                    self.stats['errors'] += 1
@@ -0,0 +1,229 @@
+"""
+Proceso residente que mantiene actualizada la tabla market_quotes.
+
+El poller recorre el universo de tickers con un intervalo que depende de la
+sesión de mercado (más rápido con el mercado abierto, más lento en pre/post
+mercado y en pausa con el mercado cerrado). Las peticiones se reparten de forma
+uniforme a lo largo del intervalo para no superar la cuota de Finhub, y solo se
+guardan las cotizaciones cuyo precio ha cambiado.
+
+Uso:
+    python quote_poller.py [--once] [--tickers AAPL MSFT ...]
+"""
+import argparse
+import datetime
+import signal
+import threading
+import time
+from zoneinfo import ZoneInfo
+from config.settings import (
+    MARKET_TIMEZONE,
+    MARKET_OPEN_TIME,
+    MARKET_CLOSE_TIME,
+    EXTENDED_OPEN_TIME,
+    EXTENDED_CLOSE_TIME,
+    QUOTE_POLL_INTERVALS
+)
+from config.tickers import get_tickers
+from api.connectors import connect_to_finhub
+from api.data_fetchers import QUOTE_INSERT_SQL, quote_to_row
+from api.http_client import close_sessions
+from api.rate_limiter import get_quota
+from database.db_manager import create_database, get_connection
+from database.writer import DatabaseWriter
+
+MARKET_TZ = ZoneInfo(MARKET_TIMEZONE)
+
+def _parse_time(value):
+    return datetime.datetime.strptime(value, "%H:%M").time()
+
+def get_market_session(now=None):
+    """
+    Get the market session for a point in time.
+
+    Exchange holidays are not taken into account.
+
+    Args:
+        now (datetime.datetime, optional): Time to check (defaults to now)
+
+    Returns:
+        str: 'open', 'extended' or 'closed'
+    """
+    now = (now or datetime.datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    if now.weekday() >= 5:
+        return "closed"
+
+    current = now.time()
+    if _parse_time(MARKET_OPEN_TIME) <= current < _parse_time(MARKET_CLOSE_TIME):
+        return "open"
+    if _parse_time(EXTENDED_OPEN_TIME) <= current < _parse_time(EXTENDED_CLOSE_TIME):
+        return "extended"
+    return "closed"
+
+def seconds_until_next_poll_session(now=None):
+    """
+    Get the number of seconds until the next session that has a poll interval.
+
+    Args:
+        now (datetime.datetime, optional): Current time (defaults to now)
+
+    Returns:
+        float: Seconds to wait
+    """
+    now = (now or datetime.datetime.now(MARKET_TZ)).astimezone(MARKET_TZ)
+    polled = [session for session, interval in QUOTE_POLL_INTERVALS.items() if interval]
+    if not polled:
+        raise ValueError("QUOTE_POLL_INTERVALS does not enable polling in any session")
+
+    starts = []
+    if "extended" in polled:
+        starts.append(_parse_time(EXTENDED_OPEN_TIME))
+    if "open" in polled:
+        starts.append(_parse_time(MARKET_OPEN_TIME))
+
+    # Session starts over the next week, the first one in the future wins
+    for days in range(8):
+        day = now.date() + datetime.timedelta(days=days)
+        if day.weekday() >= 5:
+            continue
+        for start in sorted(starts):
+            candidate = datetime.datetime.combine(day, start, tzinfo=MARKET_TZ)
+            if candidate > now:
+                return (candidate - now).total_seconds()
+    return 3600.0
+
+def load_last_prices(conn, tickers):
+    """
+    Load the latest stored Finhub price of each ticker.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        tickers (list): List of ticker symbols
+
+    Returns:
+        dict: Mapping of ticker symbol to its last stored price
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+    SELECT q.ticker, q.current_price
+    FROM market_quotes q
+    JOIN (
+        SELECT ticker, MAX(timestamp) AS timestamp
+        FROM market_quotes
+        WHERE source = 'finhub'
+        GROUP BY ticker
+    ) latest ON latest.ticker = q.ticker AND latest.timestamp = q.timestamp
+    WHERE q.source = 'finhub'
+    ''')
+    wanted = set(tickers)
+    return {ticker: price for ticker, price in cursor.fetchall() if ticker in wanted}
+
+def poll_once(tickers, interval, writer, last_prices, stop_event):
+    """
+    Poll every ticker once, spreading the requests evenly across the interval.
+
+    Args:
+        tickers (list): List of ticker symbols
+        interval (float): Seconds the sweep should take
+        writer (DatabaseWriter): Writer used to store changed quotes
+        last_prices (dict): Last stored price per ticker, updated in place
+        stop_event (threading.Event): Set to stop polling early
+
+    Returns:
+        dict: Number of quotes polled, written and skipped as unchanged
+    """
+    stats = {'polled': 0, 'written': 0, 'unchanged': 0}
+    if not tickers:
+        return stats
+
+    # Never go faster than the Finhub quota allows
+    min_spacing = 60.0 / get_quota("finhub")["requests_per_minute"]
+    spacing = max(interval / len(tickers), min_spacing)
+    start = time.monotonic()
+
+    for i, ticker in enumerate(tickers):
+        delay = start + i * spacing - time.monotonic()
+        if delay > 0 and stop_event.wait(delay):
+            break
+
+        quote_data = connect_to_finhub(ticker)
+        stats['polled'] += 1
+        price = quote_data.get('c') if quote_data else None
+        if not price:
+            continue
+
+        if last_prices.get(ticker) == price:
+            stats['unchanged'] += 1
+            continue
+
+        writer.submit(QUOTE_INSERT_SQL, [quote_to_row(ticker, quote_data)])
+        last_prices[ticker] = price
+        stats['written'] += 1
+
+    return stats
+
+def run_poller(tickers, once=False, stop_event=None):
+    """
+    Poll quotes until stopped, adapting the interval to the market session.
+
+    Args:
+        tickers (list): List of ticker symbols
+        once (bool): Run a single sweep and exit
+        stop_event (threading.Event, optional): Set to stop the poller
+    """
+    stop_event = stop_event or threading.Event()
+
+    conn = get_connection()
+    last_prices = load_last_prices(conn, tickers)
+    conn.close()
+
+    with DatabaseWriter() as writer:
+        while not stop_event.is_set():
+            session = get_market_session()
+            interval = QUOTE_POLL_INTERVALS.get(session)
+
+            if not interval:
+                if once:
+                    print(f"Mercado {session}: no se consultan cotizaciones.")
+                    break
+                wait = seconds_until_next_poll_session()
+                print(f"Mercado {session}. Próxima consulta en {wait / 60:.0f} minutos.")
+                stop_event.wait(wait)
+                continue
+
+            started = time.monotonic()
+            stats = poll_once(tickers, interval, writer, last_prices, stop_event)
+            print(f"[{datetime.datetime.now():%H:%M:%S}] Sesión {session}: {stats['polled']} consultadas, "
+                  f"{stats['written']} guardadas, {stats['unchanged']} sin cambios")
+
+            if once:
+                break
+            stop_event.wait(max(0.0, interval - (time.monotonic() - started)))
+
+    close_sessions()
+
+def main():
+    """
+    Función principal para ejecutar el poller desde la línea de comandos.
+    """
+    parser = argparse.ArgumentParser(description="Poller de cotizaciones de Finhub")
+    parser.add_argument("--once", action="store_true", help="Hacer una sola pasada y salir")
+    parser.add_argument("--tickers", nargs="+", default=None, help="Tickers a consultar (por defecto todos)")
+    args = parser.parse_args()
+
+    tickers = [ticker.upper() for ticker in args.tickers] if args.tickers else get_tickers()
+
+    create_database().close()
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+
+    print(f"Iniciando poller de cotizaciones para {len(tickers)} tickers...")
+    try:
+        run_poller(tickers, once=args.once, stop_event=stop_event)
+    except KeyboardInterrupt:
+        stop_event.set()
+    print("Poller detenido.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Ingesta de cotizaciones en streaming desde un feed WebSocket estilo Finnhub.
+
+Los trades se agregan en memoria y se vuelcan periódicamente como snapshots en
+la tabla market_quotes. Con --mock se arranca un feed simulado local, lo que
+permite ejecutar y medir todo el flujo sin conexión ni claves de API.
+
+Uso:
+    python quote_stream.py [--mock] [--rate 5000] [--duration 60] [--tickers AAPL MSFT ...]
+"""
+import argparse
+import asyncio
+from config.settings import MOCK_FEED_HOST, MOCK_FEED_PORT, MOCK_FEED_RATE, STREAM_FLUSH_INTERVAL
+from config.tickers import get_tickers
+from api.streaming import TradeAggregator, get_stream_url, load_previous_closes, stream_quotes
+from database.db_manager import create_database
+from database.writer import DatabaseWriter
+
+async def run_stream(tickers, mock=False, rate=MOCK_FEED_RATE, duration=None, flush_interval=STREAM_FLUSH_INTERVAL):
+    """
+    Stream trades for the tickers into market_quotes.
+
+    Args:
+        tickers (list): List of ticker symbols
+        mock (bool): Start and use the local mock feed
+        rate (int): Trades per second of the mock feed
+        duration (float, optional): Stop after this many seconds
+        flush_interval (float): Seconds between snapshot flushes
+
+    Returns:
+        dict: Streaming and writer statistics
+    """
+    conn = create_database()
+    aggregator = TradeAggregator(load_previous_closes(conn, tickers))
+    conn.close()
+
+    server = None
+    if mock:
+        from api.mock_feed import serve_mock_feed
+        server = await serve_mock_feed(MOCK_FEED_HOST, MOCK_FEED_PORT, rate)
+        url = f"ws://{MOCK_FEED_HOST}:{MOCK_FEED_PORT}"
+    else:
+        url = get_stream_url()
+
+    try:
+        with DatabaseWriter() as writer:
+            stats = await stream_quotes(url, tickers, aggregator, writer, flush_interval=flush_interval,
+                                        duration=duration)
+        stats['writer'] = writer.stats
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+
+    return stats
+
+def main():
+    """
+    Función principal para ejecutar el streaming desde la línea de comandos.
+    """
+    parser = argparse.ArgumentParser(description="Streaming de trades hacia market_quotes")
+    parser.add_argument("--mock", action="store_true", help="Usar el feed simulado local")
+    parser.add_argument("--rate", type=int, default=MOCK_FEED_RATE, help="Trades por segundo del feed simulado")
+    parser.add_argument("--duration", type=float, default=None, help="Segundos de ejecución (por defecto sin límite)")
+    parser.add_argument("--tickers", nargs="+", default=None, help="Tickers a suscribir (por defecto todos)")
+    args = parser.parse_args()
+
+    tickers = [ticker.upper() for ticker in args.tickers] if args.tickers else get_tickers()
+
+    try:
+        stats = asyncio.run(run_stream(tickers, mock=args.mock, rate=args.rate, duration=args.duration))
+    except KeyboardInterrupt:
+        print("\nStreaming detenido.")
+        return
+
+    seconds = stats['seconds'] or 1
+    print(f"\nMensajes: {stats['messages']} ({stats['messages'] / seconds:.0f}/s), "
+          f"trades: {stats['trades']} ({stats['trades'] / seconds:.0f}/s)")
+    print(f"Snapshots guardados: {stats['snapshots']} en {stats['flushes']} volcados, "
+          f"reconexiones: {stats['reconnects']}")
+    print(f"Escritor de base de datos: {stats['writer']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Single entry point for the project's checks.
+
+Runs every check in CHECKS, prints its report and exits with status 1 if
+any of them fails, so one command covers what has to hold before a change
+is merged.
+
+Uso:
+    python -m utils.checks [--only import_budget ...]
+"""
+import argparse
+import contextlib
+import io
+import sys
+
+def check_import_budget():
+    """
+    Check the import time of every entry point against IMPORT_TIME_BUDGETS_MS.
+
+    Returns:
+        tuple: (ok, list of report lines)
+    """
+    from utils.import_budget import check_import_budgets, format_results
+
+    results = check_import_budgets()
+    return all(result['ok'] for result in results), format_results(results)
+
+def _check_reference_plans(compact):
+    from database.query_plans import create_reference_database, check_query_plans, format_results
+
+    conn = create_reference_database(compact)
+    try:
+        results = check_query_plans(conn)
+    finally:
+        conn.close()
+    return all(result['ok'] for result in results), format_results(results)
+
+def check_query_plans():
+    """
+    Check the plans of the hot read queries on a reference database with the row layout.
+
+    Returns:
+        tuple: (ok, list of report lines)
+    """
+    return _check_reference_plans(compact=False)
+
+def check_compact_query_plans():
+    """
+    Check the plans of the hot read queries on a reference database with the compact layout.
+
+    Returns:
+        tuple: (ok, list of report lines)
+    """
+    return _check_reference_plans(compact=True)
+
+def check_backfill_listing():
+    """
+    Backfill tickers listed after the start date with a simulated download.
+
+    A ticker listed in 2010 must move through the empty chunks before its
+    listing date and end 'done' with its rows stored; a ticker that never
+    returns rows must end 'failed' without being retried forever.
+
+    Returns:
+        tuple: (ok, list of report lines)
+    """
+    import sqlite3
+    import pandas as pd
+    from backfill import run_backfill
+    from database.migrations import apply_migrations
+
+    listings = {'EARLY': '2000-01-03', 'LATE': '2010-06-29'}
+
+    def download(tickers, start, end):
+        frames = []
+        for ticker in tickers:
+            if ticker not in listings:
+                continue
+            dates = pd.bdate_range(max(start, listings[ticker]), end)
+            dates = dates[dates < pd.Timestamp(end)].strftime('%Y-%m-%d')
+            frames.append(pd.DataFrame({'ticker': ticker, 'date': dates, 'open': 1.0, 'high': 1.0,
+                                        'low': 1.0, 'close': 1.0, 'volume': 100}))
+        if not frames:
+            return pd.DataFrame(columns=['ticker', 'date', 'open', 'high', 'low', 'close', 'volume'])
+        return pd.concat(frames, ignore_index=True)
+
+    conn = sqlite3.connect(':memory:')
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            apply_migrations(conn)
+            runs = [run_backfill(conn, ['EARLY', 'LATE', 'NONE'], start_date='2000-01-01', end_date='2015-01-01',
+                                 download=download) for _ in range(2)]
+        progress = dict(conn.execute("SELECT ticker, status FROM backfill_progress").fetchall())
+        first_late = conn.execute(
+            "SELECT MIN(date) FROM stock_daily_data WHERE ticker = 'LATE'"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+    expected = [
+        ("LATE cargado desde su salida a bolsa", first_late == listings['LATE']),
+        ("EARLY y LATE terminados", progress.get('EARLY') == 'done' and progress.get('LATE') == 'done'),
+        ("NONE marcado como fallido en la primera ejecución", runs[0]['failed'] == ['NONE']),
+        ("la segunda ejecución no vuelve a descargar", runs[1]['chunks'] == 0),
+    ]
+    lines = [f"{'OK' if ok else 'FALLO':5} {description}" for description, ok in expected]
+    return all(ok for _, ok in expected), lines
+
+# Check name -> function returning (ok, report lines)
+CHECKS = {
+    'import_budget': check_import_budget,
+    'query_plans': check_query_plans,
+    'query_plans_compact': check_compact_query_plans,
+    'backfill_listing': check_backfill_listing,
+}
+
+def run_checks(names=None):
+    """
+    Run the selected checks and print their reports.
+
+    Args:
+        names (list, optional): Checks to run (defaults to every check in CHECKS)
+
+    Returns:
+        bool: True if every check passed
+    """
+    all_ok = True
+    for name in names or CHECKS:
+        print(f"== {name}")
+        ok, lines = CHECKS[name]()
+        for line in lines:
+            print(line)
+        all_ok = all_ok and ok
+    return all_ok
+
+def main():
+    """
+    Run the checks and exit with status 1 if any of them fails.
+    """
+    parser = argparse.ArgumentParser(description="Comprobaciones del proyecto")
+    parser.add_argument("--only", nargs="+", choices=sorted(CHECKS), default=None,
+                        help="Comprobaciones a ejecutar (por defecto todas)")
+    args = parser.parse_args()
+
+    ok = run_checks(args.only)
+    print("Todas las comprobaciones han pasado" if ok else "Alguna comprobación ha fallado")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,56 @@
 """
 Utility functions for processing and analyzing financial data.
 """
-import pandas as pd
-import numpy as np
-import sqlite3
 from datetime import datetime, timedelta
+from database.compact import date_key
+from database.db_manager import build_upsert_sql, get_connection, write_rows
+from database.queries import (
+    FUNDAMENTAL_DATA_QUERY,
+    LATEST_COMPANY_PROFILE_QUERY,
+    LATEST_MARKET_QUOTE_QUERY,
+    LATEST_NEWS_QUERY,
+    stock_data_query
+)
+
+TECHNICAL_INDICATOR_COLUMNS = [
+    'sma_20', 'sma_50', 'sma_200', 'ema_12', 'ema_26',
+    'macd', 'macd_signal', 'macd_histogram', 'rsi_14',
+    'bollinger_upper', 'bollinger_middle', 'bollinger_lower', 'atr_14'
+]
+
+TECHNICAL_INDICATORS_UPSERT_SQL = build_upsert_sql(
+    'technical_indicators',
+    ['ticker', 'date'] + TECHNICAL_INDICATOR_COLUMNS,
+    ['ticker', 'date'],
+    touch_column='timestamp'
+)
+
+def dataframe_to_rows(df, columns):
+    """
+    Convert DataFrame columns into row tuples ready for executemany.
+    
+    Each column is converted as a whole NumPy array into native Python values,
+    with NaN/NaT replaced by None, and the columns are then zipped into rows.
+    Date columns should already be formatted as strings.
+    
+    Args:
+        df (pandas.DataFrame): Source data
+        columns (list): Column names, in the order of the SQL placeholders
+        
+    Returns:
+        list: List of row tuples
+    """
+    import pandas as pd
+    
+    column_values = []
+    for column in columns:
+        values = df[column].to_numpy()
+        python_values = values.astype(object)
+        missing = pd.isna(values)
+        if missing.any():
+            python_values[missing] = None
+        column_values.append(python_values.tolist())
+    return list(zip(*column_values))
 
 def get_stock_data(ticker, days=30, source='yfinance'):
     """
@@ -18,24 +64,21 @@ def get_stock_data(ticker, days=30, source='yfinance'):
     Returns:
         pandas.DataFrame: DataFrame containing stock data
     """
-    conn = sqlite3.connect('financial_data.db')
+    import pandas as pd
+    
+    conn = get_connection()
     
     end_date = datetime.now().strftime('%Y-%m-%d')
     start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
     
-    query = f"""
-    SELECT date, open, high, low, close, volume
-    FROM stock_daily_data
-    WHERE ticker = '{ticker}'
-    AND date BETWEEN '{start_date}' AND '{end_date}'
-    """
-    
+    # Filter and sort on a column the index can seek on in either layout
+    date_column, to_key = date_key(conn)
+    query = stock_data_query(date_column, all_sources=source == 'all')
+    params = [ticker, to_key(start_date), to_key(end_date)]
     if source != 'all':
-        query += f" AND source = '{source}'"
+        params.append(source)
     
-    query += " ORDER BY date"
-    
-    df = pd.read_sql_query(query, conn)
+    df = pd.read_sql_query(query, conn, params=params)
     conn.close()
     
     if not df.empty:
@@ -54,6 +97,8 @@ def calculate_technical_indicators(df):
     Returns:
         pandas.DataFrame: DataFrame with technical indicators
     """
+    import pandas as pd
+    
     if df.empty:
         return df
     
@@ -99,56 +144,42 @@ def calculate_technical_indicators(df):
     
     return result
 
-def store_technical_indicators(ticker, indicators_df):
+def store_technical_indicators(ticker, indicators_df, writer=None):
     """
     Store technical indicators in the database.
     
     Args:
         ticker (str): Stock ticker symbol
         indicators_df (pandas.DataFrame): DataFrame with technical indicators
+        writer (DatabaseWriter, optional): Queue the rows on a background writer
+            instead of writing them on a new connection
         
     Returns:
-        int: Number of records inserted
+        int: Number of records inserted (queued when a writer is used)
     """
+    import pandas as pd
+    
     if indicators_df.empty:
         return 0
     
-    conn = sqlite3.connect('financial_data.db')
-    cursor = conn.cursor()
+    rows = dataframe_to_rows(
+        indicators_df.reindex(columns=TECHNICAL_INDICATOR_COLUMNS).assign(
+            ticker=ticker,
+            date=pd.DatetimeIndex(indicators_df.index).strftime('%Y-%m-%d')
+        ),
+        ['ticker', 'date'] + TECHNICAL_INDICATOR_COLUMNS
+    )
+    
+    conn = get_connection() if writer is None else None
     records_inserted = 0
     
-    for date, row in indicators_df.iterrows():
-        try:
-            date_str = date.strftime('%Y-%m-%d')
-            cursor.execute('''
-            INSERT OR REPLACE INTO technical_indicators 
-            (ticker, date, sma_20, sma_50, sma_200, ema_12, ema_26, 
-            macd, macd_signal, macd_histogram, rsi_14, 
-            bollinger_upper, bollinger_middle, bollinger_lower, atr_14)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                ticker,
-                date_str,
-                row.get('sma_20'),
-                row.get('sma_50'),
-                row.get('sma_200'),
-                row.get('ema_12'),
-                row.get('ema_26'),
-                row.get('macd'),
-                row.get('macd_signal'),
-                row.get('macd_histogram'),
-                row.get('rsi_14'),
-                row.get('bollinger_upper'),
-                row.get('bollinger_middle'),
-                row.get('bollinger_lower'),
-                row.get('atr_14')
-            ))
-            records_inserted += 1
-        except Exception as e:
-            print(f"Error inserting technical indicators for {ticker} on {date_str}: {e}")
-    
-    conn.commit()
-    conn.close()
+    try:
+        records_inserted = write_rows(conn, TECHNICAL_INDICATORS_UPSERT_SQL, rows, writer=writer)
+    except Exception as e:
+        print(f"Error inserting technical indicators for {ticker}: {e}")
+    finally:
+        if conn is not None:
+            conn.close()
     
     return records_inserted
 
@@ -162,15 +193,10 @@ def get_company_profile(ticker):
     Returns:
         dict: Company profile data
     """
-    conn = sqlite3.connect('financial_data.db')
+    conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute("""
-    SELECT * FROM company_profiles
-    WHERE ticker = ?
-    ORDER BY timestamp DESC
-    LIMIT 1
-    """, (ticker,))
+    cursor.execute(LATEST_COMPANY_PROFILE_QUERY, (ticker,))
     
     profile = cursor.fetchone()
     
@@ -195,17 +221,11 @@ def get_latest_news(ticker, limit=5):
     Returns:
         pandas.DataFrame: DataFrame with news articles
     """
-    conn = sqlite3.connect('financial_data.db')
-    
-    query = f"""
-    SELECT title, source, url, published_at, content
-    FROM news_articles
-    WHERE ticker = '{ticker}'
-    ORDER BY published_at DESC
-    LIMIT {limit}
-    """
+    import pandas as pd
+    
+    conn = get_connection()
     
-    df = pd.read_sql_query(query, conn)
+    df = pd.read_sql_query(LATEST_NEWS_QUERY, conn, params=(ticker, limit))
     conn.close()
     
     return df
@@ -220,15 +240,10 @@ def get_market_quotes(ticker):
     Returns:
         dict: Market quote data
     """
-    conn = sqlite3.connect('financial_data.db')
+    conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute("""
-    SELECT * FROM market_quotes
-    WHERE ticker = ?
-    ORDER BY timestamp DESC
-    LIMIT 1
-    """, (ticker,))
+    cursor.execute(LATEST_MARKET_QUOTE_QUERY, (ticker,))
     
     quote = cursor.fetchone()
     
@@ -253,29 +268,27 @@ def get_fundamental_data(ticker, periods=4):
     Returns:
         pandas.DataFrame: DataFrame with fundamental data
     """
-    conn = sqlite3.connect('financial_data.db')
-    
-    query = f"""
-    SELECT *
-    FROM fundamental_data
-    WHERE ticker = '{ticker}'
-    ORDER BY period_end_date DESC
-    LIMIT {periods}
-    """
+    import pandas as pd
     
-    df = pd.read_sql_query(query, conn)
+    conn = get_connection()
+    
+    df = pd.read_sql_query(FUNDAMENTAL_DATA_QUERY, conn, params=(ticker, periods))
     conn.close()
     
     return df
 
-def update_technical_indicators_for_all_stocks():
+def update_technical_indicators_for_all_stocks(writer=None):
     """
     Update technical indicators for all stocks with data since 2024.
     
+    Args:
+        writer (DatabaseWriter, optional): Queue the rows on a background writer
+            instead of writing them directly
+    
     Returns:
-        int: Number of records inserted
+        int: Number of records inserted (queued when a writer is used)
     """
-    conn = sqlite3.connect('financial_data.db')
+    conn = get_connection()
     cursor = conn.cursor()
     
     # Get all unique tickers from stock_daily_data
@@ -295,7 +308,7 @@ def update_technical_indicators_for_all_stocks():
             indicators_df = calculate_technical_indicators(df)
             
             # Store in database
-            records = store_technical_indicators(ticker, indicators_df)
+            records = store_technical_indicators(ticker, indicators_df, writer=writer)
             total_records += records
             
             print(f"Inserted {records} technical indicator records for {ticker}")
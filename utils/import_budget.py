@@ -0,0 +1,134 @@
+"""
+Import-time budget check for the application entry points.
+
+Each entry point is imported in a fresh interpreter with -X importtime and
+its cumulative import time is compared with IMPORT_TIME_BUDGETS_MS. Command
+line entry points must also not load any of the DEFERRED_IMPORTS modules
+when imported.
+
+Uso:
+    python -m utils.import_budget [--repeat 3] [--modules app web_app ...]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from config.settings import IMPORT_TIME_BUDGETS_MS, DEFERRED_IMPORTS
+
+# Entry points that build the Dash app when imported and therefore need dash
+WEB_ENTRY_POINTS = {"web_app"}
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def measure_import(module):
+    """
+    Import a module in a fresh interpreter and parse the -X importtime report.
+
+    Args:
+        module (str): Dotted module name
+
+    Returns:
+        dict: cumulative_ms of the module and the set of loaded top-level packages
+
+    Raises:
+        RuntimeError: If the import fails
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+        raise RuntimeError(f"import {module} failed: {error}")
+
+    cumulative_us = None
+    loaded = set()
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        name = parts[2].strip()
+        if not parts[1].strip().isdigit():
+            continue
+        loaded.add(name.split(".")[0])
+        if name == module:
+            cumulative_us = int(parts[1])
+
+    return {'cumulative_ms': (cumulative_us or 0) / 1000, 'loaded': loaded}
+
+def check_import_budgets(modules=None, repeat=3):
+    """
+    Measure every entry point and compare it with its budget.
+
+    The fastest of several runs is kept so that .pyc compilation and cold
+    disk caches do not count against the budget.
+
+    Args:
+        modules (list, optional): Entry points to check (defaults to every budget)
+        repeat (int): Runs per entry point
+
+    Returns:
+        list: Dicts with module, ms, budget_ms, deferred_loaded and ok
+    """
+    results = []
+    for module in modules or IMPORT_TIME_BUDGETS_MS:
+        budget_ms = IMPORT_TIME_BUDGETS_MS.get(module)
+        try:
+            runs = [measure_import(module) for _ in range(max(1, repeat))]
+        except RuntimeError as e:
+            results.append({'module': module, 'ms': None, 'budget_ms': budget_ms,
+                            'deferred_loaded': [], 'ok': False, 'error': str(e)})
+            continue
+
+        ms = min(run['cumulative_ms'] for run in runs)
+        deferred_loaded = []
+        if module not in WEB_ENTRY_POINTS:
+            deferred_loaded = sorted(set(DEFERRED_IMPORTS) & runs[0]['loaded'])
+        ok = (budget_ms is None or ms <= budget_ms) and not deferred_loaded
+        results.append({'module': module, 'ms': ms, 'budget_ms': budget_ms,
+                        'deferred_loaded': deferred_loaded, 'ok': ok, 'error': None})
+    return results
+
+def format_results(results):
+    """
+    Format the results of check_import_budgets as report lines.
+
+    Args:
+        results (list): Results returned by check_import_budgets
+
+    Returns:
+        list: One line per entry point
+    """
+    lines = []
+    for result in results:
+        status = "OK" if result['ok'] else "FALLO"
+        if result['error']:
+            lines.append(f"{status:5} {result['module']}: {result['error']}")
+            continue
+        budget = f"{result['budget_ms']} ms" if result['budget_ms'] is not None else "sin límite"
+        line = f"{status:5} {result['module']}: {result['ms']:.1f} ms (presupuesto {budget})"
+        if result['deferred_loaded']:
+            line += f", importa al cargar: {', '.join(result['deferred_loaded'])}"
+        lines.append(line)
+    return lines
+
+def main():
+    """
+    Run the check and exit with status 1 if any entry point is over budget.
+    """
+    parser = argparse.ArgumentParser(description="Comprobación del tiempo de importación de los puntos de entrada")
+    parser.add_argument("--repeat", type=int, default=3, help="Ejecuciones por módulo (se toma la más rápida)")
+    parser.add_argument("--modules", nargs="+", default=None, help="Módulos a comprobar (por defecto todos)")
+    args = parser.parse_args()
+
+    results = check_import_budgets(args.modules, args.repeat)
+    for line in format_results(results):
+        print(line)
+
+    sys.exit(0 if all(result['ok'] for result in results) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 """
 Script to calculate and store technical indicators for all tickers.
 """
-from config.settings import TICKERS
+from config.tickers import get_tickers
 from utils.data_utils import get_stock_data, calculate_technical_indicators, store_technical_indicators
 
 def calculate_all_indicators(days=60):
@@ -16,7 +16,7 @@ def calculate_all_indicators(days=60):
     """
     results = {}
     
-    for ticker in TICKERS:
+    for ticker in get_tickers():
         print(f"Calculating technical indicators for {ticker}...")
         
         # Get stock data from primary source
@@ -0,0 +1,141 @@
+"""
+Content hashing and in-memory pre-filtering for news article de-duplication.
+"""
+import hashlib
+import re
+import sqlite3
+import unicodedata
+from datetime import date, timedelta
+from config.settings import NEWS_DEDUP_WINDOW_DAYS
+
+# NewsAPI truncates content with a "[+1234 chars]" suffix that differs between copies
+_TRUNCATION_MARKER = re.compile(r'\[\+\d+ chars\]')
+_NON_WORD = re.compile(r'[\W_]+', re.UNICODE)
+
+def normalize_news_text(text):
+    """
+    Normalize a title or content snippet for hashing.
+
+    Accents, case, punctuation and whitespace are removed so that syndicated
+    copies of the same story produce the same text.
+
+    Args:
+        text (str): Raw text
+
+    Returns:
+        str: Normalized text
+    """
+    if not text:
+        return ''
+    text = _TRUNCATION_MARKER.sub(' ', text)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+def news_content_hash(title, content=None):
+    """
+    Compute the de-duplication hash of a news article.
+
+    The normalized title identifies the story; the content is only used when
+    the article has no title.
+
+    Args:
+        title (str): Article title
+        content (str, optional): Article content
+
+    Returns:
+        str: Hex digest, or None if the article has neither title nor content
+    """
+    key = normalize_news_text(title) or normalize_news_text(content)
+    if not key:
+        return None
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+def _published_day(published_at):
+    try:
+        return date.fromisoformat(str(published_at)[:10])
+    except ValueError:
+        return None
+
+class NewsDeduplicator:
+    """
+    In-memory index of the known articles of each ticker.
+
+    Loaded once per run so duplicates are dropped before they reach SQLite.
+    An article is a duplicate of a ticker's stored article with the same URL,
+    or with the same content hash published within window_days of it: a
+    recurring headline ("Stock X hits 52-week high") published weeks later
+    is a new article, and an article mentioning several tickers is kept for
+    each of them.
+    """
+
+    def __init__(self, window_days=NEWS_DEDUP_WINDOW_DAYS):
+        self.window_days = window_days
+        # (ticker, url)
+        self.urls = set()
+        # (ticker, content_hash) -> publication days of the known articles
+        self.hashes = {}
+
+    @classmethod
+    def from_database(cls, conn, archive_dir=None):
+        """
+        Load the URLs, content hashes and publication days of the stored articles.
+
+        Articles moved to the yearly archives (database/retention.py) are
+        loaded too, so they are not fetched and stored again.
+
+        Args:
+            conn (sqlite3.Connection): Database connection
+            archive_dir (str, optional): Archive directory (defaults to RETENTION_ARCHIVE_DIR)
+
+        Returns:
+            NewsDeduplicator: Pre-filter with every stored article
+        """
+        from database.retention import list_archives
+        from config.settings import RETENTION_ARCHIVE_DIR
+
+        deduplicator = cls()
+        deduplicator._load(conn)
+        for _, path in list_archives('news_articles', archive_dir or RETENTION_ARCHIVE_DIR):
+            archive = sqlite3.connect(path)
+            try:
+                deduplicator._load(archive)
+            finally:
+                archive.close()
+        return deduplicator
+
+    def _load(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("SELECT ticker, url, content_hash, published_at FROM news_articles")
+        for ticker, url, content_hash, published_at in cursor:
+            self._remember(ticker, url, content_hash, _published_day(published_at))
+
+    def _remember(self, ticker, url, content_hash, day):
+        if url:
+            self.urls.add((ticker, url))
+        if content_hash and day:
+            self.hashes.setdefault((ticker, content_hash), []).append(day)
+
+    def add_if_new(self, ticker, url, content_hash, published_at=None):
+        """
+        Check an article against the ticker's known ones and remember it if it is new.
+
+        Args:
+            ticker (str): Ticker the article was fetched for
+            url (str): Article URL
+            content_hash (str): Article content hash
+            published_at (str, optional): Publication timestamp (ISO 8601); without it
+                only the URL is compared
+
+        Returns:
+            bool: True if the article was not seen before
+        """
+        if url and (ticker, url) in self.urls:
+            return False
+        day = _published_day(published_at) if published_at else None
+        if content_hash and day:
+            window = timedelta(days=self.window_days)
+            if any(abs(day - known) <= window for known in self.hashes.get((ticker, content_hash), ())):
+                return False
+        self._remember(ticker, url, content_hash, day)
+        return True
@@ -0,0 +1,101 @@
+"""
+Stage scheduler for running independent ingestion stages in parallel.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+class Stage:
+    """
+    A named unit of work in the ingestion pipeline.
+    """
+
+    def __init__(self, name, func, depends_on=()):
+        """
+        Args:
+            name (str): Unique stage name
+            func (callable): Function without arguments returning the number of records written
+            depends_on (tuple): Names of the stages that must succeed before this one starts
+        """
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+def _run_stage(stage):
+    start = time.perf_counter()
+    try:
+        records = stage.func()
+        return {'status': 'success', 'records': records, 'seconds': time.perf_counter() - start, 'error': None}
+    except Exception as e:
+        print(f"Stage {stage.name} failed: {e}")
+        return {'status': 'failed', 'records': 0, 'seconds': time.perf_counter() - start, 'error': str(e)}
+
+def run_stages(stages, max_workers=None):
+    """
+    Run stages concurrently, starting each one as soon as its dependencies succeeded.
+
+    Stages whose dependencies failed (or were skipped) are skipped. Stages run
+    in separate threads, so each stage must open its own database connection.
+
+    Args:
+        stages (list): List of Stage objects
+        max_workers (int, optional): Maximum number of stages running at once
+            (defaults to the number of stages)
+
+    Returns:
+        dict: Mapping of stage name to a dict with status ('success', 'failed'
+        or 'skipped'), records, seconds and error, in declaration order
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        unknown = [name for name in stage.depends_on if name not in by_name]
+        if unknown:
+            raise ValueError(f"Stage {stage.name} depends on unknown stages: {', '.join(unknown)}")
+
+    results = {}
+    pending = list(stages)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages) or 1, thread_name_prefix="stage") as executor:
+        while pending or running:
+            scheduled = True
+            while scheduled:
+                scheduled = False
+                for stage in list(pending):
+                    dependency_results = [results.get(name) for name in stage.depends_on]
+                    if any(result and result['status'] != 'success' for result in dependency_results):
+                        results[stage.name] = {'status': 'skipped', 'records': 0, 'seconds': 0.0,
+                                               'error': 'dependency did not succeed'}
+                    elif all(dependency_results):
+                        print(f"Starting stage {stage.name}...")
+                        running[executor.submit(_run_stage, stage)] = stage
+                    else:
+                        continue
+                    pending.remove(stage)
+                    scheduled = True
+
+            if not running:
+                if pending:
+                    names = ', '.join(stage.name for stage in pending)
+                    raise ValueError(f"Dependency cycle between stages: {names}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                results[stage.name] = future.result()
+                print(f"Stage {stage.name} finished: {results[stage.name]['status']}")
+
+    return {stage.name: results[stage.name] for stage in stages}
+
+def print_stage_report(results):
+    """
+    Print a summary table of stage results.
+
+    Args:
+        results (dict): Output of run_stages
+    """
+    print(f"{'Stage':<24}{'Status':<10}{'Records':>10}{'Seconds':>10}")
+    for name, result in results.items():
+        print(f"{name:<24}{result['status']:<10}{result['records'] or 0:>10}{result['seconds']:>10.1f}")
+        if result['error']:
+            print(f"    error: {result['error']}")
@@ -0,0 +1,128 @@
+"""
+Staleness-driven refresh planning.
+
+Reads the newest timestamp of every ticker in each data table and compares it
+with the freshness policies in REFRESH_POLICIES, so a refresh only fetches the
+tables and tickers whose data is actually out of date.
+
+Upserts leave rows that did not change untouched, so a fetch that only
+returned known data does not move any timestamp; record_refresh stores the
+time of each fetch in refresh_log and the planner uses the newer of the two.
+"""
+from config.settings import REFRESH_POLICIES
+from database.db_manager import write_rows
+
+REFRESH_LOG_SQL = '''
+INSERT INTO refresh_log (table_name, ticker, refreshed_at)
+VALUES (?, ?, CURRENT_TIMESTAMP)
+ON CONFLICT(table_name, ticker) DO UPDATE SET refreshed_at = excluded.refreshed_at
+'''
+
+def get_data_ages(conn, table, source=None):
+    """
+    Get the age of the newest row or recorded refresh of each ticker in a table.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        table (str): Table name (one of the REFRESH_POLICIES keys)
+        source (str, optional): Only consider rows from this source
+
+    Returns:
+        dict: Mapping of ticker symbol to age in seconds
+    """
+    if table not in REFRESH_POLICIES:
+        raise ValueError(f"No freshness policy for table {table}")
+
+    query = f'''
+    SELECT ticker, (julianday('now') - julianday(MAX(updated_at))) * 86400
+    FROM (
+        SELECT ticker, MAX(timestamp) AS updated_at
+        FROM {table}
+        {"WHERE source = ?" if source else ""}
+        GROUP BY ticker
+        UNION ALL
+        SELECT ticker, refreshed_at FROM refresh_log WHERE table_name = ?
+    )
+    GROUP BY ticker
+    '''
+    cursor = conn.cursor()
+    cursor.execute(query, ((source,) if source else ()) + (table,))
+    return {ticker: age for ticker, age in cursor.fetchall() if age is not None}
+
+def record_refresh(conn, table, tickers, writer=None):
+    """
+    Record that a table was just fetched for some tickers.
+
+    Args:
+        conn (sqlite3.Connection): Database connection used when no writer is given
+        table (str): Table name
+        tickers (list): Tickers whose fetch returned data (as reported by the
+            fetcher's fetched set); failed tickers must not be recorded
+        writer (DatabaseWriter, optional): Queue the rows on a background writer
+
+    Returns:
+        int: Number of tickers recorded
+    """
+    return write_rows(conn, REFRESH_LOG_SQL, [(table, ticker) for ticker in tickers], writer=writer)
+
+def plan_refresh(conn, tickers, tables=None, policies=None):
+    """
+    Build the list of (table, ticker) pairs that need to be refreshed.
+
+    Tickers without data come first, then the rest by how far they are past
+    their table's max_age, so the most out-of-date data is fetched first.
+
+    Args:
+        conn (sqlite3.Connection): Database connection
+        tickers (list): List of ticker symbols
+        tables (list, optional): Tables to plan for (defaults to every policy)
+        policies (dict, optional): Freshness policies (defaults to REFRESH_POLICIES)
+
+    Returns:
+        list: Dicts with table, ticker, age (seconds, None if missing) and
+            staleness (age / max_age, None if missing)
+    """
+    policies = policies or REFRESH_POLICIES
+    work = []
+
+    for table in tables or policies:
+        policy = policies[table]
+        ages = get_data_ages(conn, table, policy.get("source"))
+        for ticker in tickers:
+            age = ages.get(ticker)
+            if age is None:
+                work.append({'table': table, 'ticker': ticker, 'age': None, 'staleness': None})
+            elif age >= policy["max_age"]:
+                work.append({'table': table, 'ticker': ticker, 'age': age, 'staleness': age / policy["max_age"]})
+
+    work.sort(key=lambda item: (item['staleness'] is not None, -(item['staleness'] or 0)))
+    return work
+
+def group_by_table(work):
+    """
+    Group a refresh plan into the tickers to fetch per table, keeping the plan order.
+
+    Args:
+        work (list): Output of plan_refresh
+
+    Returns:
+        dict: Mapping of table name to list of ticker symbols
+    """
+    grouped = {}
+    for item in work:
+        grouped.setdefault(item['table'], []).append(item['ticker'])
+    return grouped
+
+def print_refresh_plan(work, tickers, tables):
+    """
+    Print how many tickers are stale per table.
+
+    Args:
+        work (list): Output of plan_refresh
+        tickers (list): Tickers that were considered
+        tables (list): Tables that were considered
+    """
+    grouped = group_by_table(work)
+    for table in tables:
+        stale = grouped.get(table, [])
+        print(f"  {table}: {len(stale)}/{len(tickers)} tickers desactualizados")
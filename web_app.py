@@ -3,21 +3,21 @@ Web application for visualizing financial data.
 """
 import os
 import sqlite3
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from flask import Flask, render_template, request, jsonify, redirect, url_for
 from dash import Dash, html, dcc, callback, Output, Input
 import dash_bootstrap_components as dbc
-from config.settings import DB_NAME, TICKERS
+from config.settings import REFRESH_POLICIES
+from config.tickers import get_tickers
 from api.data_fetchers import (
     fetch_yfinance_data,
     fetch_finhub_data,
     fetch_fmp_data,
     fetch_news_data,
-    fetch_fundamental_data
+    fetch_all_fundamental_data
 )
-from database.db_manager import create_database, insert_or_update_company_profile, cleanup_database
+from database.compact import date_key
+from database.db_manager import create_database, get_connection, insert_or_update_company_profile, cleanup_database
+from database.queries import period_return_query
 from utils.data_utils import (
     get_company_profile, 
     get_market_quotes, 
@@ -25,6 +25,7 @@ from utils.data_utils import (
     get_latest_news,
     update_technical_indicators_for_all_stocks
 )
+from utils.refresh_planner import plan_refresh, record_refresh, group_by_table, print_refresh_plan
 from cleanup_db import remove_duplicate_data
 from datetime import datetime, timedelta
 
@@ -75,22 +76,26 @@ app.index_string = '''
 
 # Database connection
 def get_db_connection():
-    """Get a connection to the SQLite database."""
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """
+    Get the current thread's shared connection to the SQLite database.
+    
+    The connection is reused by other helpers, so set row_factory on
+    cursors instead of on the connection.
+    """
+    return get_connection()
 
 # Routes
 @server.route('/')
 def index():
     """Render the home page."""
-    return render_template('index.html', tickers=TICKERS)
+    return render_template('index.html', tickers=get_tickers())
 
 @server.route('/admin')
 def admin():
     """Render the admin page for database management."""
     conn = get_db_connection()
     cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
     tables = [row['name'] for row in cursor.fetchall()]
     
@@ -111,22 +116,40 @@ def update_data():
     
     conn = create_database()
     
+    # Only stale tickers are fetched unless the refresh is forced
+    tickers = get_tickers()
+    fetched_tables = [table for table in tables if table in REFRESH_POLICIES]
+    if request.form.get('force'):
+        plan = {table: tickers for table in fetched_tables}
+    else:
+        work = plan_refresh(conn, tickers, fetched_tables)
+        print_refresh_plan(work, tickers, fetched_tables)
+        plan = group_by_table(work)
+    
     for table in tables:
+        table_tickers = plan.get(table, [])
+        if table in REFRESH_POLICIES and not table_tickers:
+            print(f"{table} is up to date, skipping")
+            continue
         print(f"Updating {table}...")
         
+        # Tickers that returned data; only these are recorded as refreshed
+        fetched = set()
         if table == 'company_profiles':
-            fetch_fmp_data(conn, TICKERS)
+            fetch_fmp_data(conn, table_tickers, fetched=fetched)
         elif table == 'stock_daily_data':
-            fetch_yfinance_data(conn, TICKERS)
+            fetch_yfinance_data(conn, table_tickers, fetched=fetched)
         elif table == 'market_quotes':
-            fetch_finhub_data(conn, TICKERS)
+            fetch_finhub_data(conn, table_tickers, fetched=fetched)
         elif table == 'news_articles':
-            fetch_news_data(conn, TICKERS)
+            fetch_news_data(conn, table_tickers, fetched=fetched)
         elif table == 'fundamental_data':
-            for ticker in TICKERS:
-                fetch_fundamental_data(conn, ticker)
+            fetch_all_fundamental_data(conn, table_tickers, fetched=fetched)
         elif table == 'technical_indicators':
             update_technical_indicators_for_all_stocks()
+        
+        if table in REFRESH_POLICIES:
+            record_refresh(conn, table, sorted(fetched))
     
     conn.close()
     
@@ -135,14 +158,17 @@ def update_data():
 @server.route('/api/ticker/<ticker>')
 def get_ticker_data(ticker):
     """API endpoint to get data for a specific ticker."""
+    import pandas as pd
+    
     conn = get_db_connection()
     
     # Get daily price data
-    daily_data = pd.read_sql_query("""
+    date_column, _ = date_key(conn)
+    daily_data = pd.read_sql_query(f"""
     SELECT date, open, high, low, close, volume
     FROM stock_daily_data
     WHERE ticker = ?
-    ORDER BY date DESC
+    ORDER BY {date_column} DESC
     LIMIT 30;
     """, conn, params=(ticker,))
     
@@ -171,6 +197,7 @@ def get_tables():
     """Get all tables in the database."""
     conn = get_db_connection()
     cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
     tables = [row['name'] for row in cursor.fetchall()]
     conn.close()
@@ -179,6 +206,8 @@ def get_tables():
 @server.route('/api/table/<table_name>')
 def get_table_data(table_name):
     """Get data from a specific table."""
+    import pandas as pd
+    
     conn = get_db_connection()
     try:
         df = pd.read_sql_query(f"SELECT * FROM {table_name} LIMIT 100", conn)
@@ -230,88 +259,39 @@ def calculate_returns(ticker, source='alphavantage'):
     Returns:
         dict: Returns for different time periods
     """
-    conn = sqlite3.connect(DB_NAME)
+    import pandas as pd
+    
+    conn = get_db_connection()
     
     # Get current date
     current_date = datetime.now()
     
-    # Calculate start dates for different periods
-    ytd_start = datetime(current_date.year, 1, 1).strftime('%Y-%m-%d')
-    quarter_start = (current_date - timedelta(days=90)).strftime('%Y-%m-%d')
-    year_start = (current_date - timedelta(days=365)).strftime('%Y-%m-%d')
-    
-    # Query for YTD return
-    ytd_query = f"""
-    SELECT 
-        CASE 
-            WHEN (SELECT COUNT(*) FROM stock_daily_data 
-                 WHERE ticker = '{ticker}' AND source = '{source}' 
-                 AND date >= '{ytd_start}') > 0
-            THEN
-                (SELECT close FROM stock_daily_data 
-                 WHERE ticker = '{ticker}' AND source = '{source}' 
-                 ORDER BY date DESC LIMIT 1) /
-                (SELECT close FROM stock_daily_data 
-                 WHERE ticker = '{ticker}' AND source = '{source}' 
-                 AND date >= '{ytd_start}' 
-                 ORDER BY date ASC LIMIT 1) - 1
-            ELSE NULL
-        END AS ytd_return
-    """
+    # Filter and sort on a column the index can seek on in either layout
+    date_column, to_key = date_key(conn)
     
-    # Query for quarterly return
-    quarter_query = f"""
-    SELECT 
-        CASE 
-            WHEN (SELECT COUNT(*) FROM stock_daily_data 
-                 WHERE ticker = '{ticker}' AND source = '{source}' 
-                 AND date >= '{quarter_start}') > 0
-            THEN
-                (SELECT close FROM stock_daily_data 
-                 WHERE ticker = '{ticker}' AND source = '{source}' 
-                 ORDER BY date DESC LIMIT 1) /
-                (SELECT close FROM stock_daily_data 
-                 WHERE ticker = '{ticker}' AND source = '{source}' 
-                 AND date >= '{quarter_start}' 
-                 ORDER BY date ASC LIMIT 1) - 1
-            ELSE NULL
-        END AS quarter_return
-    """
+    # Calculate start dates for different periods
+    ytd_start = to_key(datetime(current_date.year, 1, 1).strftime('%Y-%m-%d'))
+    quarter_start = to_key((current_date - timedelta(days=90)).strftime('%Y-%m-%d'))
+    year_start = to_key((current_date - timedelta(days=365)).strftime('%Y-%m-%d'))
     
-    # Query for yearly return
-    year_query = f"""
-    SELECT 
-        CASE 
-            WHEN (SELECT COUNT(*) FROM stock_daily_data 
-                 WHERE ticker = '{ticker}' AND source = '{source}' 
-                 AND date >= '{year_start}') > 0
-            THEN
-                (SELECT close FROM stock_daily_data 
-                 WHERE ticker = '{ticker}' AND source = '{source}' 
-                 ORDER BY date DESC LIMIT 1) /
-                (SELECT close FROM stock_daily_data 
-                 WHERE ticker = '{ticker}' AND source = '{source}' 
-                 AND date >= '{year_start}' 
-                 ORDER BY date ASC LIMIT 1) - 1
-            ELSE NULL
-        END AS year_return
-    """
+    # Return between the first close on or after the start date and the latest close
+    return_query = period_return_query(date_column)
     
     # Execute queries
     try:
-        ytd_return = pd.read_sql_query(ytd_query, conn).iloc[0, 0]
+        ytd_return = pd.read_sql_query(return_query, conn, params={'ticker': ticker, 'source': source, 'start': ytd_start}).iloc[0, 0]
         ytd_return = float(ytd_return) if ytd_return is not None else None
     except:
         ytd_return = None
         
     try:
-        quarter_return = pd.read_sql_query(quarter_query, conn).iloc[0, 0]
+        quarter_return = pd.read_sql_query(return_query, conn, params={'ticker': ticker, 'source': source, 'start': quarter_start}).iloc[0, 0]
         quarter_return = float(quarter_return) if quarter_return is not None else None
     except:
         quarter_return = None
         
     try:
-        year_return = pd.read_sql_query(year_query, conn).iloc[0, 0]
+        year_return = pd.read_sql_query(return_query, conn, params={'ticker': ticker, 'source': source, 'start': year_start}).iloc[0, 0]
         year_return = float(year_return) if year_return is not None else None
     except:
         year_return = None
@@ -325,63 +305,73 @@ def calculate_returns(ticker, source='alphavantage'):
     }
 
 # Dash layout
-app.layout = html.Div([
-    dbc.Container([
-        dbc.Row([
-            dbc.Col([
-                html.H1([
-                    html.I(className="fas fa-chart-line me-2"),
-                    "Financial Data Dashboard"
-                ], className="my-4 text-center")
-            ], width=12)
-        ]),
-        
-        dbc.Row([
-            dbc.Col([
-                html.Label("Select Ticker:"),
-                dcc.Dropdown(
-                    id='ticker-dropdown',
-                    options=[{'label': ticker, 'value': ticker} for ticker in TICKERS],
-                    value=TICKERS[0] if TICKERS else None,
-                    className="mb-3"
-                )
-            ], width=4)
-        ]),
-        
-        dbc.Row([
-            dbc.Col([
-                html.H3("Ticker Information"),
-                html.Div(id='ticker-info')
-            ], width=12, className="mb-4")
-        ]),
-        
-        dbc.Row([
-            dbc.Col([
-                html.H3("Price Chart"),
-                dcc.Graph(id='price-chart')
-            ], width=12, className="mt-4 mb-4")
-        ]),
-        
-        dbc.Row([
-            dbc.Col([
-                html.H3("Technical Indicators"),
-                dcc.Graph(id='technical-chart')
-            ], width=12, className="mt-4 mb-4")
-        ]),
-        
-        dbc.Row([
-            dbc.Col([
-                html.H3("Company Profile"),
-                html.Div(id='company-profile')
-            ], width=6),
+def serve_layout():
+    """
+    Build the dashboard layout.
+    
+    Dash calls this on every page load, so ticker file changes show up without
+    restarting the server.
+    """
+    tickers = get_tickers()
+    return html.Div([
+        dbc.Container([
+            dbc.Row([
+                dbc.Col([
+                    html.H1([
+                        html.I(className="fas fa-chart-line me-2"),
+                        "Financial Data Dashboard"
+                    ], className="my-4 text-center")
+                ], width=12)
+            ]),
+            
+            dbc.Row([
+                dbc.Col([
+                    html.Label("Select Ticker:"),
+                    dcc.Dropdown(
+                        id='ticker-dropdown',
+                        options=[{'label': ticker, 'value': ticker} for ticker in tickers],
+                        value=tickers[0] if tickers else None,
+                        className="mb-3"
+                    )
+                ], width=4)
+            ]),
+            
+            dbc.Row([
+                dbc.Col([
+                    html.H3("Ticker Information"),
+                    html.Div(id='ticker-info')
+                ], width=12, className="mb-4")
+            ]),
+            
+            dbc.Row([
+                dbc.Col([
+                    html.H3("Price Chart"),
+                    dcc.Graph(id='price-chart')
+                ], width=12, className="mt-4 mb-4")
+            ]),
             
-            dbc.Col([
-                html.H3("Latest News"),
-                html.Div(id='news-container')
-            ], width=6)
+            dbc.Row([
+                dbc.Col([
+                    html.H3("Technical Indicators"),
+                    dcc.Graph(id='technical-chart')
+                ], width=12, className="mt-4 mb-4")
+            ]),
+            
+            dbc.Row([
+                dbc.Col([
+                    html.H3("Company Profile"),
+                    html.Div(id='company-profile')
+                ], width=6),
+                
+                dbc.Col([
+                    html.H3("Latest News"),
+                    html.Div(id='news-container')
+                ], width=6)
+            ])
         ])
     ])
-])
+
+app.layout = serve_layout
 
 @app.callback(
     [Output('ticker-info', 'children'),
@@ -393,6 +383,10 @@ app.layout = html.Div([
 )
 def update_ticker_info(ticker):
     """Update ticker information based on selected ticker."""
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
+    
     if not ticker:
         return html.Div("No ticker selected"), html.Div(), html.Div(), {}, {}
     